@@ -3,4 +3,4 @@
 """
 screwdrivercd.changelog module
 """
-__all__ = ['generate']
+__all__ = ['cache', 'generate', 'history', 'tags']
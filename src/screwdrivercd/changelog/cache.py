@@ -0,0 +1,108 @@
+# Copyright 2019, Oath Inc.
+# Licensed under the terms of the Apache 2.0 license.  See the LICENSE file in the project root for terms
+"""
+Persistent cache of rendered changelog release sections.
+
+When the CHANGELOG_CACHE_FILE environment variable is set, the rendered section of each release is stored in that
+JSON file, keyed by the release tag name and the commit the tag points to.  Released sections do not change, so later
+runs that share the file, such as jobs using the Screwdriver pipeline cache, only compute the newer releases.
+"""
+import json
+import logging
+import os
+from typing import Any, Dict, Optional
+
+
+LOG = logging.getLogger(__name__)
+CACHE_FORMAT_VERSION = 1
+
+
+def cache_filename() -> str:
+    """
+    Get the release section cache filename from the CHANGELOG_CACHE_FILE environment variable, environment variables
+    in the value are expanded
+
+    Returns
+    -------
+    str:
+        The cache filename, or an empty string if the cache is disabled
+    """
+    filename = os.environ.get('CHANGELOG_CACHE_FILE', '')
+    if not filename:
+        return ''
+    return os.path.expandvars(filename)
+
+
+class SectionCache(object):
+    """
+    Rendered release sections, in release order, keyed by release tag name and tag commit hash
+
+    Parameters
+    ----------
+    filename: str
+        The JSON file holding the cache, the cache is not persisted if this is empty
+
+    settings: dict, optional
+        The settings the sections were rendered with, the cached sections are discarded if they differ
+    """
+    def __init__(self, filename: str, settings: Optional[Dict[str, Any]] = None):
+        self.filename = filename
+        self.settings = settings or {}
+        self.releases: Dict[str, Dict[str, str]] = {}
+        self.modified = False
+        self.load()
+
+    def load(self) -> None:
+        """
+        Read the cached sections from the cache file
+        """
+        if not self.filename or not os.path.exists(self.filename):
+            return
+        try:
+            with open(self.filename) as fh:
+                contents = json.load(fh)
+        except (OSError, ValueError) as error:
+            LOG.warning(f'Unable to read the changelog cache {self.filename!r}: {error}')
+            return
+        if contents.get('version', None) != CACHE_FORMAT_VERSION or contents.get('settings', None) != self.settings:
+            LOG.debug('The changelog cache was created with different settings, ignoring it')
+            return
+        self.releases = contents.get('releases', {})
+
+    def save(self) -> None:
+        """
+        Write the cached sections to the cache file if they changed
+        """
+        if not self.filename or not self.modified:
+            return
+        directory = os.path.dirname(self.filename)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(self.filename, 'w') as fh:
+            json.dump({'version': CACHE_FORMAT_VERSION, 'settings': self.settings, 'releases': self.releases}, fh, indent=4)
+        self.modified = False
+
+    def get(self, release: str, commit: str) -> Optional[str]:
+        """
+        Get the cached section of a release, or None if it is not cached or the tag now points to a different commit
+        """
+        cached = self.releases.get(release, None)
+        if cached is None or cached.get('commit', None) != commit:
+            return None
+        return cached.get('section', '')
+
+    def set(self, release: str, commit: str, section: str) -> None:
+        """
+        Store the section of a release, releases are kept in the order they are stored
+        """
+        self.releases.pop(release, None)
+        self.releases[release] = {'commit': commit, 'section': section}
+        self.modified = True
+
+    def clear(self) -> None:
+        """
+        Remove all the cached sections
+        """
+        if self.releases:
+            self.modified = True
+        self.releases = {}
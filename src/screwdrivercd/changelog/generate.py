@@ -10,9 +10,12 @@ import subprocess  # nosec
 import sys
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, List
+from typing import Dict, List, Optional, Set
 
 from ..utility.environment import env_bool
+from .cache import SectionCache, cache_filename
+from .history import BlobReader, release_fragments
+from .tags import tag_index
 from ..utility.package import setup_query
 from ..utility.run import run_and_log_output
 
@@ -36,24 +39,14 @@ def git_fetch_tags():
 
 
 def git_tag_dates() -> Dict[str, str]:
-    tags = {}
-
-    command = ['git', 'log', '--date-order', '--tags', '--simplify-by-decoration', '--pretty=format:%ct|%d']
-    with subprocess.Popen(command, stdout=subprocess.PIPE) as tag_command:  # nosec
-        for line in tag_command.stdout.readlines():
-            date, all_tags = line.decode(errors='ignore').strip().split('|')
-            all_tags = all_tags.strip().lstrip('(').rstrip(')')
-
-            for tag in all_tags.split(','):
-                tag = tag.strip()
-                if tag.startswith('tag: '):
-                    tag = tag[5:]
-                tags[tag] = date
-    return tags
+    """
+    Get the commit date of each tag, newest first, from the shared tag index
+    """
+    return tag_index().dates()
 
 
 def create_first_commit_tag_if_missing() -> None:
-    if 'first_commit' in git_tag_dates().keys():
+    if 'first_commit' in tag_index():
         return
 
     first_commit_hash = subprocess.check_output(['git', 'rev-list', '--max-parents=0', 'HEAD'], stderr=subprocess.DEVNULL).decode(errors='ignore').strip()  # nosec
@@ -62,38 +55,44 @@ def create_first_commit_tag_if_missing() -> None:
             subprocess.check_output(['git', 'tag', 'first_commit', first_commit_hash])  # nosec
         except subprocess.CalledProcessError:  # pragma: no cover
             pass  # Tag already exists
+        tag_index(refresh=True)
+
 
-        
 def changed_files(commit1: str, commit2: str, changelog_dir: str='changelog.d') -> List[Path]:
-    changed = []
-
-    with subprocess.Popen(['git', 'diff', f'{commit1}..{commit2}', changelog_dir], stdout=subprocess.PIPE) as diff_command:  # nosec
-        for binline in diff_command.stdout.readlines():
-            line = binline.decode(errors='ignore').strip()
-            if line.startswith('+++'):
-                line = line.lstrip('+++ b/')
-                filepath = Path(line)
-                if filepath.parts[0] != changelog_dir:  # pragma: no cover
-                    continue
-                changed_file = Path(*filepath.parts)
-                changed.append(changed_file)
-    return changed
+    """
+    Get the changelog fragments added after commit1 up to and including commit2, use release_fragments() to get the
+    fragments of several releases with one history walk
+    """
+    return release_fragments([commit2], changelog_dir=changelog_dir, exclude=[commit1]).get(commit2, [])
 
 
-def release_changes(changelog_dir: str, only_versions: bool=True, only_stable: bool=False) -> Dict[str, Dict[str, Dict[str, str]]]:
-    create_first_commit_tag_if_missing()
-    tags = git_tag_dates()
+def release_tags(only_versions: bool=True, only_stable: bool=False) -> List[str]:
+    """
+    Get the release tags, oldest first
 
-    previous_commit = commit = 'first_commit'
-    commits = list(tags.keys())
-    commits.reverse()
+    Parameters
+    ----------
+    only_versions: bool, optional
+        Only use tags that start with the letter 'v'
 
-    changes: Dict[str, Dict[str, Dict[str, str]]] = {}
-    for commit in commits:
+    only_stable: bool, optional
+        Skip version tags with a non-numeric last part, which are pre-releases
+
+    Returns
+    -------
+    list of str:
+        The release tag names
+    """
+    tags = list(tag_index().keys())
+    tags.reverse()
+
+    releases = []
+    for commit in tags:
+        if commit == 'first_commit':
+            continue
         if only_versions:
             if not commit.startswith('v'):
-                if commit != 'first_commit':
-                    continue
+                continue
         if only_stable and commit.startswith('v'):
             try:
                 int(commit.split('.')[-1])
@@ -101,32 +100,162 @@ def release_changes(changelog_dir: str, only_versions: bool=True, only_stable: b
                 # Last part of the version has a non-numeric character
                 # so it is a pre-release
                 continue
+        releases.append(commit)
+    return releases
 
-        changed = changed_files(previous_commit, commit, changelog_dir=changelog_dir)
-        if not changed:
-            previous_commit = commit
-            continue
 
-        changes[commit] = {}
-        for change in changed:
-            filename = change.parts[-1]
-            if filename in ['README.md', 'FOOTER.md', 'HEADER.md']:
-                continue
-            split_filename = str(filename).split('.')
-            changeid = split_filename[0]
-            change_type = split_filename[1]
-            if change_type not in CHANGE_TYPES:
-                LOG.warning(f'Invalid change type {change_type}')
-                previous_commit = commit
-                continue
-            if change_type not in changes[commit].keys():  # pragma: no cover
-                changes[commit][change_type] = {}
-            changes[commit][change_type][changeid] = change.read_text().rstrip()
+def release_changes(changelog_dir: str, only_versions: bool=True, only_stable: bool=False, releases: Optional[List[str]]=None, exclude: Optional[List[str]]=None) -> Dict[str, Dict[str, Dict[str, str]]]:
+    """
+    Get the changelog fragments added in each release
+
+    Parameters
+    ----------
+    changelog_dir: str
+        The directory holding the changelog fragments
+
+    only_versions: bool, optional
+        Only use tags that start with the letter 'v', ignored if releases is provided
+
+    only_stable: bool, optional
+        Skip pre-release version tags, ignored if releases is provided
+
+    releases: list of str, optional
+        The releases to get the changes of, defaults to all the release tags
+
+    exclude: list of str, optional
+        Earlier releases whose changes are already known, the history they contain is not read
+
+    Returns
+    -------
+    dict:
+        Dictionary of release to change type to change id to change text, oldest release first.
+    """
+    create_first_commit_tag_if_missing()
+    index = tag_index()
+    if releases is None:
+        releases = release_tags(only_versions=only_versions, only_stable=only_stable)
+
+    # The history walk starts at the first commit, fragments added in the first commit are not part of a release
+    releases = ['first_commit'] + [_ for _ in releases if _ != 'first_commit']
+    commits = index.commits()
+    exclude_commits = [commits[_] for _ in exclude or [] if _ in commits]
+    fragments = release_fragments(releases, changelog_dir=changelog_dir, commits=commits, exclude=exclude_commits)
+    fragments.pop('first_commit', None)
 
-        previous_commit = commit
+    changes: Dict[str, Dict[str, Dict[str, str]]] = {}
+    with BlobReader() as reader:
+        for commit, changed in fragments.items():
+            changes[commit] = {}
+            for change in changed:
+                filename = change.parts[-1]
+                if filename in ['README.md', 'FOOTER.md', 'HEADER.md']:
+                    continue
+                split_filename = str(filename).split('.')
+                changeid = split_filename[0]
+                change_type = split_filename[1]
+                if change_type not in CHANGE_TYPES:
+                    LOG.warning(f'Invalid change type {change_type}')
+                    continue
+
+                # Use the fragment as it was in the release, it may have been edited or removed since
+                change_text = reader.read(commit, change.as_posix())
+                if change_text is None:
+                    continue
+                if change_type not in changes[commit].keys():  # pragma: no cover
+                    changes[commit][change_type] = {}
+                changes[commit][change_type][changeid] = change_text.rstrip()
     return changes
 
 
+def render_release(release: str, date: datetime, changes: Dict[str, Dict[str, str]], changelog_name: str='') -> str:
+    """
+    Render the changelog section of a release, or an empty string if the release has no changes
+    """
+    if not changes or release in ['first_commit', 'last_commit']:  # pragma: no cover
+        return ''
+    if changelog_name:
+        output = f'## {changelog_name} {release} ({date:%Y-%m-%d}){os.linesep}'
+    else:  # pragma: no cover
+        output = f'## {release} ({date:%Y-%m-%d}){os.linesep}'
+    for change_type, change_desc in CHANGE_TYPES.items():
+        if change_type not in changes.keys():
+            continue
+
+        output += f'### {change_desc}{os.linesep}'
+        for changeid, change_text in changes[change_type].items():
+            output += f'- {change_text}{os.linesep}'
+    output += f'{os.linesep}'
+    return output
+
+
+def release_sections(changelog_dir: str, releases: List[str], changelog_name: str='', cache: Optional[SectionCache]=None, selected: Optional[Set[str]]=None) -> Dict[str, str]:
+    """
+    Get the rendered changelog section of each release, using the cached sections of the older releases
+
+    Parameters
+    ----------
+    changelog_dir: str
+        The directory holding the changelog fragments
+
+    releases: list of str
+        The release tags
+
+    changelog_name: str, optional
+        The project name to use in the release headings
+
+    cache: SectionCache, optional
+        Cache of rendered sections, the sections that are computed are added to it
+
+    selected: set of str, optional
+        Only get the sections of these releases.  Only the history between the selected releases and the releases
+        before them is read.
+
+    Returns
+    -------
+    dict:
+        Dictionary of release to rendered section, oldest release first.  The section is an empty string for releases
+        without changes.  When releases are selected, releases dated between the selected releases are included.
+    """
+    if cache is None:
+        cache = SectionCache('')
+    index = tag_index()
+    commits = index.commits()
+    release_dates = index.dates()
+    releases = [_ for _ in releases if _ in commits]
+
+    # Releases older than the selected releases are excluded from the history walk and newer ones are not read.
+    # Releases dated between the selected releases are computed as well so each commit goes to the right release.
+    older: List[str] = []
+    if selected is not None:
+        selected_dates = [int(release_dates[_]) for _ in releases if _ in selected]
+        if not selected_dates:
+            return {}
+        older = [_ for _ in releases if int(release_dates[_]) < min(selected_dates)]
+        releases = [_ for _ in releases if min(selected_dates) <= int(release_dates[_]) <= max(selected_dates)]
+
+    cached: Dict[str, str] = {}
+    for release in releases:
+        section = cache.get(release, commits[release])
+        if section is not None:
+            cached[release] = section
+    uncached = [_ for _ in releases if _ not in cached]
+
+    # Only releases newer than the newest cached release can be added to the cached history
+    if cached and uncached and min(int(release_dates[_]) for _ in uncached) <= max(int(release_dates[_]) for _ in cached):
+        LOG.debug('Releases older than the cached changelog releases were added, regenerating all the releases')
+        cached = {}
+        uncached = releases
+
+    sections = {release: cached[release] for release in cache.releases if release in cached}
+    if uncached:
+        changes = release_changes(changelog_dir, releases=uncached, exclude=older + list(cached))
+        for release in list(changes.keys()) + [_ for _ in uncached if _ not in changes]:
+            date = datetime.fromtimestamp(int(release_dates[release]))
+            sections[release] = render_release(release, date, changes.get(release, {}), changelog_name=changelog_name)
+            cache.set(release, commits[release], sections[release])
+    return sections
+
+
 def changelog_contents(changelog_releases: str='') -> str:
     """
     Generate the changelog and return the contents as a string
@@ -145,6 +274,9 @@ def changelog_contents(changelog_releases: str='') -> str:
     if not changelog_releases:
         changelog_releases = os.environ.get('CHANGELOG_RELEASES', 'all')
 
+    # Read the tags once, the helpers below share the index
+    tag_index(refresh=True)
+
     only_versions = bool(env_bool('CHANGELOG_ONLY_VERSION_TAGS', True))
     only_stable = bool(env_bool('CHANGELOG_ONLY_STABLE_RELEASES', False))
     changelog_dir = os.environ.get('CHANGELOG_DIR', 'changelog.d')
@@ -158,13 +290,15 @@ def changelog_contents(changelog_releases: str='') -> str:
             changelog_name = setup_query('--name')
         except subprocess.CalledProcessError:  # pragma: no cover
             changelog_name = ''
-    release_dates = git_tag_dates()
 
     output = ''
     footer = ''
     header = ''
-    release_changelog = release_changes(changelog_dir, only_versions=only_versions, only_stable=only_stable)
+    settings = dict(changelog_dir=changelog_dir, changelog_name=changelog_name, only_versions=only_versions, only_stable=only_stable)
+    cache = SectionCache(cache_filename(), settings=settings)
+    releases = release_tags(only_versions=only_versions, only_stable=only_stable)
     if changelog_releases == 'all':
+        sections = release_sections(changelog_dir, releases, changelog_name=changelog_name, cache=cache)
         if os.path.exists(header_filename):
             with open(header_filename) as fh:
                 header = fh.read()
@@ -173,39 +307,20 @@ def changelog_contents(changelog_releases: str='') -> str:
                 footer = fh.read()
     else:
         selected_releases = set([_.strip() for _ in changelog_releases.split(',')])
-        available_releases = set(list(release_changelog.keys()))
-
-        new_release_changelog = {}
-        for release in available_releases.intersection(selected_releases):
-            new_release_changelog[release] = release_changelog[release]
-
-        release_changelog = new_release_changelog
+        sections = release_sections(changelog_dir, releases, changelog_name=changelog_name, cache=cache, selected=selected_releases)
+        sections = {release: section for release, section in sections.items() if release in selected_releases}
+    cache.save()
 
     if header:
         output += header + os.linesep
 
-    releases = list(release_changelog.keys())
-    releases.reverse()
+    release_output = [_ for _ in sections.values() if _]
+    release_output.reverse()
 
-    for release in releases:
-        changes = release_changelog[release]
-        if not changes or release in ['first_commit', 'last_commit']:  # pragma: no cover
-            continue
-        date = datetime.fromtimestamp(int(release_dates[release]))
-        if len(releases) > 1:
+    for section in release_output:
+        if len(release_output) > 1:
             output += f'{os.linesep}---{os.linesep}'
-        if changelog_name:
-            output += f'## {changelog_name} {release} ({date:%Y-%m-%d}){os.linesep}'
-        else:  # pragma: no cover
-            output += f'## {release} ({date:%Y-%m-%d}){os.linesep}'
-        for change_type, change_desc in CHANGE_TYPES.items():
-            if change_type not in changes.keys():
-                continue
-
-            output += f'### {change_desc}{os.linesep}'
-            for changeid, change_text in changes[change_type].items():
-                output += f'- {change_text}{os.linesep}'
-        output += f'{os.linesep}'
+        output += section
     if footer:
         output += os.linesep + footer
 
@@ -0,0 +1,283 @@
+# Copyright 2019, Oath Inc.
+# Licensed under the terms of the Apache 2.0 license.  See the LICENSE file in the project root for terms
+"""
+Find the changelog fragments added in each release with a single walk of the git history
+"""
+import logging
+import subprocess  # nosec
+from pathlib import Path
+from typing import Dict, List, Optional, Set, Tuple
+
+
+LOG = logging.getLogger(__name__)
+COMMIT_MARKER = '\x00'
+
+
+class BlobReader(object):
+    """
+    Read file contents from git revisions using a single long running `git cat-file --batch` process
+
+    Examples
+    --------
+    >>> with BlobReader() as reader:
+    ...     text = reader.read('v0.1.0', 'changelog.d/3.feature.md')
+    """
+    def __init__(self, git_command: str = 'git'):
+        self.git_command = git_command
+        self.process: Optional[subprocess.Popen] = None
+
+    def __enter__(self) -> 'BlobReader':
+        self.open()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def open(self) -> subprocess.Popen:
+        """
+        Start the git process if it is not running
+
+        Returns
+        -------
+        subprocess.Popen:
+            The git process
+        """
+        if self.process is None:
+            self.process = subprocess.Popen([self.git_command, 'cat-file', '--batch'], stdin=subprocess.PIPE, stdout=subprocess.PIPE)  # nosec
+        return self.process
+
+    def close(self) -> None:
+        """
+        Stop the git process
+        """
+        process, self.process = self.process, None
+        if process is None:
+            return
+        if process.stdin:
+            process.stdin.close()
+        process.wait()
+        if process.stdout:
+            process.stdout.close()
+
+    def read_bytes(self, revision: str, path: str) -> Optional[bytes]:
+        """
+        Get the contents of a file at a revision
+
+        Parameters
+        ----------
+        revision: str
+            The revision, tag or commit hash to read the file from
+
+        path: str
+            The path of the file relative to the top of the repository
+
+        Returns
+        -------
+        bytes or None:
+            The file contents or None if the file does not exist at the revision
+        """
+        process = self.open()
+        assert process.stdin is not None and process.stdout is not None  # nosec - both are pipes
+        process.stdin.write(f'{revision}:{path}\n'.encode())
+        process.stdin.flush()
+        header = process.stdout.readline().decode(errors='ignore').split()
+        if len(header) != 3 or header[-1] in ('missing', 'ambiguous'):  # <object> missing, the object may contain spaces
+            return None
+        contents = process.stdout.read(int(header[2]))
+        process.stdout.readline()  # Each object is followed by a newline
+        if header[1] != 'blob':
+            return None
+        return contents
+
+    def read(self, revision: str, path: str) -> Optional[str]:
+        """
+        Get the text contents of a file at a revision, or None if the file does not exist at the revision
+        """
+        contents = self.read_bytes(revision, path)
+        if contents is None:
+            return None
+        return contents.decode(errors='ignore')
+
+
+def tag_commits(tags: List[str]) -> Dict[str, str]:
+    """
+    Get the commit hash each tag points to
+
+    Parameters
+    ----------
+    tags: list of str
+        The tag names to look up
+
+    Returns
+    -------
+    dict:
+        Dictionary of tag name to commit hash, names that do not resolve to a commit are not included
+    """
+    if not tags:
+        return {}
+    command = ['git', 'cat-file', '--batch-check=%(objectname) %(objecttype)']
+    names = ''.join(f'{tag}^{{commit}}\n' for tag in tags)
+    output = subprocess.run(command, input=names.encode(), stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, check=True).stdout  # nosec
+    commits = {}
+    for tag, line in zip(tags, output.decode(errors='ignore').splitlines()):
+        commit, _, object_type = line.partition(' ')
+        if object_type == 'commit':
+            commits[tag] = commit
+    return commits
+
+
+def fragments_in_revisions(fragments: List[Path], revisions: List[str]) -> Set[Path]:
+    """
+    Get the fragments that exist in any of the revisions, read with a single `git cat-file --batch-check`
+
+    Parameters
+    ----------
+    fragments: list of Path
+        The fragment paths relative to the top of the repository
+
+    revisions: list of str
+        The revisions to look for the fragments in
+
+    Returns
+    -------
+    set of Path:
+        The fragments found in at least one of the revisions
+    """
+    if not fragments or not revisions:
+        return set()
+    names = [(fragment, f'{revision}:{fragment.as_posix()}') for revision in dict.fromkeys(revisions) for fragment in fragments]
+    command = ['git', 'cat-file', '--batch-check=%(objecttype)']
+    output = subprocess.run(command, input=''.join(f'{name}\n' for _, name in names).encode(), stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, check=True).stdout  # nosec
+    return {fragment for (fragment, _), line in zip(names, output.decode(errors='ignore').splitlines()) if line == 'blob'}
+
+
+def fragment_history(revisions: List[str], changelog_dir: str = 'changelog.d', exclude: Optional[List[str]] = None) -> Tuple[Dict[str, List[str]], Dict[str, int], Dict[str, List[Path]]]:
+    """
+    Walk the history reachable from the revisions once, returning the commit graph and the changelog fragments added
+    by each commit.
+
+    Parameters
+    ----------
+    revisions: list of str
+        The revisions to start the walk from
+
+    changelog_dir: str, optional
+        The directory holding the changelog fragments
+
+    exclude: list of str, optional
+        Revisions whose history is not read
+
+    Returns
+    -------
+    tuple:
+        Dictionary of commit hash to parent commit hashes, dictionary of commit hash to commit date and dictionary of
+        commit hash to the fragments it added
+    """
+    parents: Dict[str, List[str]] = {}
+    dates: Dict[str, int] = {}
+    added: Dict[str, List[Path]] = {}
+    if not revisions:
+        return parents, dates, added
+
+    # --full-history --sparse lists every commit so the graph is complete, the file status is limited to the changelog_dir.
+    # Merges are diffed against their first parent, so fragments added while resolving a merge are found.
+    command = [
+        'git', 'log', '--full-history', '--sparse', '--no-renames', '--name-status', '--diff-merges=first-parent',
+        '--format=%x00%H %ct %P'
+    ] + revisions + [f'^{_}' for _ in exclude or []] + ['--', changelog_dir]
+    commit = ''
+    with subprocess.Popen(command, stdout=subprocess.PIPE) as log_command:  # nosec
+        assert log_command.stdout is not None  # nosec - stdout is a pipe
+        for binline in log_command.stdout:
+            line = binline.decode(errors='ignore').strip()
+            if line.startswith(COMMIT_MARKER):
+                commit, date, *commit_parents = line[1:].split()
+                parents[commit] = commit_parents
+                dates[commit] = int(date)
+                continue
+            status, _, filename = line.partition('\t')
+            if status == 'A' and commit:
+                added.setdefault(commit, []).append(Path(filename))
+    return parents, dates, added
+
+
+def commit_order(parents: Dict[str, List[str]], dates: Dict[str, int], commits: List[str]) -> Dict[str, Tuple[int, int]]:
+    """
+    Get a sort key for each commit that orders every commit after its ancestors and otherwise by commit date
+
+    The key is the newest commit date of the commit and its ancestors, followed by the length of the longest path to a
+    root commit, so commits made in the same second are still ordered by ancestry.
+    """
+    order: Dict[str, Tuple[int, int]] = {}
+    for start in commits:
+        stack = [start]
+        while stack:
+            commit = stack[-1]
+            if commit in order or commit not in parents:
+                stack.pop()
+                continue
+            pending = [_ for _ in parents[commit] if _ not in order and _ in parents]
+            if pending:
+                stack += pending
+                continue
+            stack.pop()
+            parent_order = [order[_] for _ in parents[commit] if _ in order]
+            order[commit] = (
+                max([dates.get(commit, 0)] + [_[0] for _ in parent_order]),
+                max([_[1] for _ in parent_order], default=0) + 1
+            )
+    return order
+
+
+def release_fragments(releases: List[str], changelog_dir: str = 'changelog.d', commits: Optional[Dict[str, str]] = None, exclude: Optional[List[str]] = None) -> Dict[str, List[Path]]:
+    """
+    Map each changelog fragment to the first release that contains the commit that added it
+
+    Parameters
+    ----------
+    releases: list of str
+        The release tags.  Commits reachable from a release that are not reachable from an earlier release belong to
+        it.
+
+    changelog_dir: str, optional
+        The directory holding the changelog fragments
+
+    commits: dict, optional
+        Dictionary of release to the commit hash of the release, looked up if not provided
+
+    exclude: list of str, optional
+        Commits of earlier releases, the fragments they contain are not part of any of the releases
+
+    Returns
+    -------
+    dict:
+        Dictionary of release to the fragments added in the release, oldest release first and the fragments in path
+        order.  Releases that did not add any fragments are not included.
+    """
+    if commits is None:
+        commits = tag_commits(releases)
+    releases = [_ for _ in releases if _ in commits]
+    parents, dates, added = fragment_history(list(dict.fromkeys(commits[_] for _ in releases)), changelog_dir=changelog_dir, exclude=exclude)
+    order = commit_order(parents, dates, [commits[_] for _ in releases])
+    releases.sort(key=lambda release: order.get(commits[release], (0, 0)))
+
+    # A merge also lists the fragments its other parents added, so each fragment is only listed in the first release.
+    # The merged fragments that are in the excluded history were released before.
+    merged = sorted({fragment for commit, fragments in added.items() if len(parents.get(commit, [])) > 1 for fragment in fragments})
+    result: Dict[str, List[Path]] = {}
+    claimed: Set[str] = set()
+    listed: Set[Path] = fragments_in_revisions(merged, exclude or [])
+    for release in releases:
+        fragments: List[Path] = []
+        pending = [commits[release]]
+        while pending:
+            commit = pending.pop()
+            if commit in claimed:
+                continue
+            claimed.add(commit)
+            fragments += [_ for _ in added.get(commit, []) if _ not in listed]
+            listed.update(added.get(commit, []))
+            pending += parents.get(commit, [])
+        if fragments:
+            result[release] = sorted(fragments)
+    return result
@@ -0,0 +1,107 @@
+# Copyright 2019, Oath Inc.
+# Licensed under the terms of the Apache 2.0 license.  See the LICENSE file in the project root for terms
+"""
+Index of the git tags in a repository, built from a single ref enumeration
+"""
+import os
+import subprocess  # nosec
+from collections.abc import Mapping
+from typing import Dict, Iterator, List, NamedTuple, Optional
+
+
+TAG_FORMAT = '%00'.join([
+    '%(refname:strip=2)', '%(objecttype)', '%(objectname)', '%(*objecttype)', '%(*objectname)', '%(committerdate:unix)',
+    '%(*committerdate:unix)', '%(creatordate:unix)'
+])
+
+
+class Tag(NamedTuple):
+    """
+    A git tag
+    """
+    name: str
+    commit: str
+    date: int
+    """Commit date of the tagged commit"""
+    created: int
+    """Date the tag was created, the commit date for lightweight tags"""
+
+
+class TagIndex(Mapping):
+    """
+    Mapping of tag name to Tag, newest first.  The tags are read with one `git for-each-ref` the first time the index
+    is used and when it is refreshed.
+    """
+    def __init__(self, git_command: str = 'git'):
+        self.git_command = git_command
+        self._tags: Optional[Dict[str, Tag]] = None
+
+    @property
+    def tags(self) -> Dict[str, Tag]:
+        if self._tags is None:
+            self.refresh()
+        return self._tags  # type: ignore
+
+    def refresh(self) -> None:
+        """
+        Re-read the tags from the repository
+        """
+        command = [self.git_command, 'for-each-ref', f'--format={TAG_FORMAT}', 'refs/tags']
+        try:
+            output = subprocess.check_output(command, stderr=subprocess.DEVNULL).decode(errors='ignore')  # nosec
+        except (subprocess.CalledProcessError, FileNotFoundError):
+            output = ''
+
+        tags: List[Tag] = []
+        for line in output.splitlines():
+            name, object_type, object_name, target_type, target_name, commit_date, target_date, created = line.split('\0')
+            if object_type == 'commit':
+                tags.append(Tag(name, object_name, int(commit_date), int(created or commit_date)))
+            elif target_type == 'commit':
+                tags.append(Tag(name, target_name, int(target_date), int(created or target_date)))
+        tags.sort(key=lambda tag: (tag.date, tag.created), reverse=True)
+        self._tags = {tag.name: tag for tag in tags}
+
+    def commits(self) -> Dict[str, str]:
+        """
+        Dictionary of tag name to the hash of the tagged commit
+        """
+        return {name: tag.commit for name, tag in self.tags.items()}
+
+    def dates(self) -> Dict[str, str]:
+        """
+        Dictionary of tag name to the commit date of the tagged commit as a unix timestamp string
+        """
+        return {name: str(tag.date) for name, tag in self.tags.items()}
+
+    def __getitem__(self, name: str) -> Tag:
+        return self.tags[name]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.tags)
+
+    def __len__(self) -> int:
+        return len(self.tags)
+
+
+_tag_indexes: Dict[str, TagIndex] = {}
+
+
+def tag_index(refresh: bool = False) -> TagIndex:
+    """
+    Get the shared tag index for the repository in the current directory
+
+    Parameters
+    ----------
+    refresh: bool, optional
+        Re-read the tags, used at the start of a run and after creating tags
+
+    Returns
+    -------
+    TagIndex:
+        The tag index
+    """
+    index = _tag_indexes.setdefault(os.getcwd(), TagIndex())
+    if refresh:
+        index.refresh()
+    return index
@@ -8,4 +8,4 @@ This module contains modules to install operating system packages in a variety o
 from typing import List
 
 
-__all__: List[str] = ['cli', 'config', 'installer', 'installers', 'requirement']
+__all__: List[str] = ['cache', 'cli', 'config', 'installer', 'installers', 'matrix', 'plan', 'requirement', 'scheduler', 'stamp', 'timing']
@@ -0,0 +1,170 @@
+# Copyright 2019, Oath Inc.
+# Licensed under the terms of the Apache 2.0 license.  See the LICENSE file in the project root for terms
+"""
+Persistent download cache.
+
+When the INSTALLDEPS_CACHE_DIR environment variable is set, the installers keep the packages they download in a
+subdirectory of it named after the installer, so later jobs that share the directory, such as jobs using the
+Screwdriver pipeline cache, don't download them again.  The cache is kept under INSTALLDEPS_CACHE_MAX_SIZE megabytes
+by removing the least recently used files.
+"""
+import logging
+import os
+import time
+from typing import Dict, Iterable, List, Mapping, Optional, Sequence, Tuple
+
+
+LOG = logging.getLogger(__name__)
+CACHE_MAX_SIZE_DEFAULT = 2048
+"""int: Default maximum size of the cache in megabytes"""
+
+
+def cache_directory() -> str:
+    """
+    Get the download cache directory from the INSTALLDEPS_CACHE_DIR environment variable, environment variables in
+    the value are expanded
+
+    Returns
+    -------
+    str:
+        The cache directory, or an empty string if the download cache is disabled
+    """
+    directory = os.environ.get('INSTALLDEPS_CACHE_DIR', '')
+    if not directory:
+        return ''
+    return os.path.expandvars(directory)
+
+
+def cache_max_size() -> int:
+    """
+    Get the maximum cache size from the INSTALLDEPS_CACHE_MAX_SIZE environment variable
+
+    Returns
+    -------
+    int:
+        The maximum size in bytes
+    """
+    try:
+        megabytes = float(os.environ.get('INSTALLDEPS_CACHE_MAX_SIZE', CACHE_MAX_SIZE_DEFAULT))
+    except ValueError:
+        LOG.warning(f'The INSTALLDEPS_CACHE_MAX_SIZE value is not a number, using {CACHE_MAX_SIZE_DEFAULT}')
+        megabytes = CACHE_MAX_SIZE_DEFAULT
+    return int(megabytes * 1024 * 1024)
+
+
+def cache_files(directory: str, extensions: Optional[Sequence[str]] = None) -> Dict[str, os.stat_result]:
+    """
+    Get the files in a cache directory
+
+    Parameters
+    ----------
+    directory: str
+        The cache directory
+
+    extensions: list of str, optional
+        Only include files with these extensions, default is all files
+
+    Returns
+    -------
+    dict:
+        The file status by full path
+    """
+    files = {}
+    for root, _, filenames in os.walk(directory):
+        for filename in filenames:
+            if extensions and not filename.endswith(tuple(extensions)):
+                continue
+            path = os.path.join(root, filename)
+            try:
+                files[path] = os.stat(path)
+            except OSError:  # pragma: no cover - File removed while walking
+                continue
+    return files
+
+
+def cached_package_files(dependencies: Iterable[str], filenames: Iterable[str]) -> Dict[str, List[str]]:
+    """
+    Find the cached package files for dependencies, package files are named after the package followed by a dash or
+    underscore and the version
+
+    Parameters
+    ----------
+    dependencies: list of str
+        The package names
+
+    filenames: list of str
+        The cached file paths
+
+    Returns
+    -------
+    dict:
+        The cached files by package name, for the packages that have cached files
+    """
+    basenames = [(os.path.basename(_), _) for _ in filenames]
+    found: Dict[str, List[str]] = {}
+    for dependency in dependencies:
+        for basename, path in basenames:
+            remainder = basename[len(dependency):]
+            if basename.startswith(dependency) and remainder[:1] in ['-', '_'] and remainder[1:2].isdigit():
+                found.setdefault(dependency, []).append(path)
+    return found
+
+
+def touch(paths: Iterable[str]) -> None:
+    """
+    Mark cached files as used
+
+    Parameters
+    ----------
+    paths: list of str
+        The file paths
+    """
+    now = time.time()
+    for path in paths:
+        try:
+            os.utime(path, (now, now))
+        except OSError:  # pragma: no cover
+            LOG.debug(f'Unable to update the modification time of {path!r}')
+
+
+def evict(directory: str, max_size: int, extensions: Optional[Mapping[str, Optional[Sequence[str]]]] = None) -> Tuple[int, List[str]]:
+    """
+    Remove the least recently used files until the cache is no larger than the maximum size
+
+    Parameters
+    ----------
+    directory: str
+        The cache directory
+
+    max_size: int
+        The maximum size in bytes
+
+    extensions: dict, optional
+        The package file extensions of each installer cache subdirectory, None for an installer that can have any of
+        its files removed.  Only the package files of the subdirectories listed are counted and removed, so the
+        metadata of the package utilities is kept.  Default is all the files in the cache.
+
+    Returns
+    -------
+    tuple:
+        The size in bytes of the files that can be removed after the eviction and the paths of the removed files
+    """
+    if extensions is None:
+        files = cache_files(directory)
+    else:
+        files = {}
+        for subdirectory, subdirectory_extensions in extensions.items():
+            files.update(cache_files(os.path.join(directory, subdirectory), subdirectory_extensions))
+    size = sum(_.st_size for _ in files.values())
+    removed: List[str] = []
+    for path, status in sorted(files.items(), key=lambda _: max(_[1].st_atime, _[1].st_mtime)):
+        if size <= max_size:
+            break
+        try:
+            os.remove(path)
+        except OSError:  # pragma: no cover
+            LOG.debug(f'Unable to remove {path!r} from the download cache')
+            continue
+        size -= status.st_size
+        removed.append(path)
+    return size, removed
@@ -6,25 +6,248 @@ Command line `sdv4_install_deps` utility.
 The main() function of this utility provides a command line interface to install Operating system packages based on
 the configuration in the `pyproject.toml` file.
 """
+import argparse
+import functools
 import json
 import logging
 import os
+import subprocess  # nosec - Used for the CalledProcessError exception
 import sys
+from typing import Any, Dict, List, Optional
 
 from termcolor import colored
 
-from ..utility import create_artifact_directory
+from ..utility import create_artifact_directory, env_bool
+from .cache import cache_directory, cache_max_size, evict
 from .installer import Configuration
 from .installers import install_plugins
+from .matrix import dependency_matrix, load_environments, render_matrix
+from .plan import PLAN_FORMATS, installation_plan, render_dockerfile, render_shell, write_plan
+from .requirement import EnvironmentLookup
+from .scheduler import installer_stages, run_concurrently
+from .stamp import configuration_fingerprint, read_stamp, write_stamp
+from .timing import PhaseTimer
 
 LOG_NAME = 'platform_installdeps' if __name__ == '__main__' else __name__
 LOG = logging.getLogger(LOG_NAME)
+REPORT_META_KEY = '_meta'
+"""str: Report key holding the details, timing and cache information, the other keys are installer names"""
 
 
-def main():  # pragma: no cover
+def write_report(report):
+    """
+    Write the installdeps report to the reports/installdeps/installdeps.json file in the artifacts directory
+    """
+    # Make sure the report directory exists
+    artifacts_dir = os.environ.get('SD_ARTIFACTS_DIR', '')
+    report_dir = os.path.join(artifacts_dir, 'reports/installdeps')
+    report_filename = os.path.join(report_dir, 'installdeps.json')
+    create_artifact_directory(report_dir)
+
+    with open(report_filename, 'w') as fh:
+        json.dump(report, fh)
+
+
+def download_cache_report(details, extensions: Optional[Dict[str, Optional[List[str]]]] = None) -> dict:
+    """
+    Remove the least recently used files from the download cache and summarize the cache usage of the installers
+
+    Parameters
+    ----------
+    details: dict
+        The report details of the installers
+
+    extensions: dict, optional
+        The package file extensions of each installer cache subdirectory, only those files are removed.  Default is
+        all the files in the cache.
+
+    Returns
+    -------
+    dict:
+        The cache report, an empty dictionary if the download cache is disabled
+    """
+    directory = cache_directory()
+    if not directory:
+        return {}
+    size, evicted = evict(directory, cache_max_size(), extensions=extensions)
+    hits = sum(_.get('cache', {}).get('hits', 0) for _ in details.values())
+    misses = sum(_.get('cache', {}).get('misses', 0) for _ in details.values())
+    hit_rate = round(hits / (hits + misses), 3) if hits + misses else 0.0
+    return {'directory': directory, 'hits': hits, 'misses': misses, 'hit_rate': hit_rate, 'size': size, 'evicted': len(evicted)}
+
+
+def parse_arguments(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    """
+    Parse the command line arguments
+
+    Parameters
+    ----------
+    argv: list of str, optional
+        The command line arguments, default is sys.argv
+
+    Returns
+    -------
+    argparse.Namespace:
+        The parsed arguments
+    """
+    parser = argparse.ArgumentParser(formatter_class=argparse.ArgumentDefaultsHelpFormatter)
+    parser.add_argument('--plan', default=False, action='store_true', help='Write the commands that install the dependencies to a plan instead of running them')
+    parser.add_argument('--plan_format', default='shell', choices=list(PLAN_FORMATS.keys()), help='Format of the plan')
+    parser.add_argument('--plan_dir', default='', help='Directory to write the plan to, default is reports/installdeps in the artifacts directory')
+    parser.add_argument('--environment', default='', help='JSON environment snapshot file to evaluate the environment markers with when writing a plan, default is the current environment')
+    parser.add_argument('--lock', default=False, action='store_true', help='Resolve the dependencies of the installers that support lock files, such as pip3, into their lock files instead of installing them')
+    parser.add_argument('--matrix', default=[], nargs='+', metavar='SNAPSHOT', help='Print the packages each installer installs in each of the JSON environment snapshot files instead of installing them')
+    return parser.parse_args(argv)
+
+
+def plan_main(arguments: argparse.Namespace, installers) -> int:
+    """
+    Write the installation plan without running any of the package tools
+
+    Parameters
+    ----------
+    arguments: argparse.Namespace
+        The parsed command line arguments
+
+    installers: list of tuple
+        Installer name and installer instance pairs, in install order
+
+    Returns
+    -------
+    int:
+        The exit code
+    """
+    environment = None
+    if arguments.environment:
+        try:
+            environment = EnvironmentLookup.read_snapshot(arguments.environment)
+        except (OSError, ValueError) as error:
+            print(colored(f'Unable to read the environment snapshot: {error}', 'red'), file=sys.stderr, flush=True)
+            return 1
+
+    plan = installation_plan(installers, environment)
+    json_filename, rendered_filename = write_plan(plan, plan_format=arguments.plan_format, output_dir=arguments.plan_dir)
+    print(render_dockerfile(plan) if arguments.plan_format == 'dockerfile' else render_shell(plan), flush=True)
+    print(f'Wrote the installation plan to {rendered_filename!r} and {json_filename!r}', flush=True)
+    return 0
+
+
+def lock_main(installers) -> int:
+    """
+    Write the lock files of the installers that support them
+
+    Parameters
+    ----------
+    installers: list of tuple
+        Installer name and installer instance pairs, in install order
+
+    Returns
+    -------
+    int:
+        The exit code
+    """
+    for installer_name, installer_instance in installers:
+        if not installer_instance.supports_lock_file or not installer_instance.has_dependencies:
+            continue
+        try:
+            lock_filename = installer_instance.write_lock_file()
+        except (ValueError, subprocess.CalledProcessError) as error:
+            print(colored(f'Unable to write the {installer_name} lock file: {error}', 'red'), file=sys.stderr, flush=True)
+            return 1
+        print(f'Wrote the {installer_name} lock file {lock_filename!r}', flush=True)
+    return 0
+
+
+def matrix_main(arguments: argparse.Namespace, installers) -> int:
+    """
+    Print the dependency matrix for the environment snapshots without running any of the package tools
+
+    Parameters
+    ----------
+    arguments: argparse.Namespace
+        The parsed command line arguments
+
+    installers: list of tuple
+        Installer name and installer instance pairs, in install order
+
+    Returns
+    -------
+    int:
+        The exit code
+    """
+    try:
+        environments = load_environments(arguments.matrix)
+        rows = dependency_matrix(installers, environments)
+    except (OSError, ValueError) as error:
+        print(colored(f'Unable to evaluate the dependency matrix: {error}', 'red'), file=sys.stderr, flush=True)
+        return 1
+    print(render_matrix(rows, list(environments.keys())), flush=True)
+    return 0
+
+
+def run_installer(installer_name, installer_instance):
+    """
+    Install the dependencies for an installer
+
+    Returns
+    -------
+    list of str or None:
+        The dependencies installed, or None if the installer has no dependencies to install
+    """
+    if not installer_instance.has_dependencies:
+        return None
+
+    if not installer_instance.plugin_configuration:  # pragma: no cover
+        return None
+
+    print(f'Running {installer_name} installer ', flush=True)
+    result = installer_instance.install_dependencies()
+    if result:
+        print(colored(f'Installed {len(result)} package{"s" if len(result) > 1 else ""}', 'green'), flush=True)
+    else:
+        print('No packages installed', flush=True)
+    if installer_instance.skipped:
+        print(f'Skipped {len(installer_instance.skipped)} already installed package{"s" if len(installer_instance.skipped) > 1 else ""}', flush=True)
+    print('')
+    return result
+
+
+def installation_fingerprint(config: Configuration, installer_classes) -> str:
+    """
+    Get the stamp fingerprint of the installation from the installer classes, so an unchanged installation is found
+    without creating the installers or running any package utilities
+
+    Parameters
+    ----------
+    config: Configuration
+        The installdeps configuration
+
+    installer_classes: list of tuple
+        Installer name and installer class pairs, in install order
+
+    Returns
+    -------
+    str:
+        The fingerprint
+    """
+    install_commands = []
+    for _, installer_class in installer_classes:
+        bin_dir = config.configuration.get(installer_class.config_section, {}).get('bin_dir', None)
+        install_commands.append([installer_class.find_command(bin_dir) or installer_class.install_command[0]])
+    lock_files = [installer_class.configured_lock_filename(config) for _, installer_class in installer_classes]
+    return configuration_fingerprint(config.configuration, install_commands, lock_files=lock_files)
+
+
+def main(argv: Optional[List[str]] = None):  # pragma: no cover
     """
     Run all installers from the command line
+
+    Parameters
+    ----------
+    argv: list of str, optional
+        The command line arguments, default is sys.argv
     """
+    arguments = parse_arguments(argv)
     loglevel = logging.WARNING
     if os.environ.get('INSTALLDEPS_DEBUG', 'false').lower() in ['true', '1', 'on']:
         loglevel = logging.DEBUG
@@ -34,45 +257,96 @@ def main():  # pragma: no cover
     #     print('Legacy configuration file exists, using the legacy installer', flush=True)
     #     return legacy_main()
 
-    config = Configuration().configuration
+    timer = PhaseTimer()
+    with timer.phase('configuration'):
+        configuration = Configuration.cached()
+        config = configuration.configuration
     installer_order = config.get('install', None)
     fail_on_error = config.get('fail_on_error', False)
     if not installer_order:
         installer_order = install_plugins.keys()
 
-    installed = {}
+    installer_classes = []
     for installer_name in installer_order:
-        try:
-            installer_class = install_plugins[installer_name]
-        except KeyError:
+        with timer.phase('plugin_discovery'):
+            installer_class = install_plugins.get(installer_name, None)
+        if not installer_class:
             # No such installer class
             continue
+        installer_classes.append((installer_name, installer_class))
+
+    # Check the stamp before creating the installers, which run the package utilities to check they are supported
+    install = not (arguments.lock or arguments.matrix or arguments.plan)
+    fingerprint = ''
+    if install:
+        with timer.phase('fingerprint'):
+            fingerprint = installation_fingerprint(configuration, installer_classes)
+        stamp = read_stamp()
+        if stamp.get('fingerprint', '') == fingerprint and not env_bool('INSTALLDEPS_FORCE', False):
+            print('Dependencies are already installed for this configuration, set INSTALLDEPS_FORCE=True to reinstall', flush=True)
+            write_report(stamp.get('report', {}))
+            return 0
+
+    installers = []
+    for installer_name, installer_class in installer_classes:
+        # Plans and matrices for environment snapshots are for other hosts, so the installers are not checked against this one
+        check_host = not (arguments.matrix or (arguments.plan and arguments.environment))
         LOG.debug(f'Seeing if the {installer_name} tool is supported')
-        installer_instance = installer_class()
-        installer_instance.exit_on_missing = fail_on_error
-        if not installer_instance.is_supported:
-            continue
-        if not installer_instance.has_dependencies:
+        with timer.phase(f'is_supported:{installer_name}'):
+            # Skip installers with no install command on the host before creating them, unless the bin_dir setting points somewhere else
+            if check_host and not installer_class.command_available() and not config.get(installer_class.config_section, {}).get('bin_dir', None):
+                continue
+            installer_instance = installer_class()
+            installer_instance.exit_on_missing = fail_on_error
+            supported = not check_host or installer_instance.is_supported
+        if not supported:
             continue
+        installers.append((installer_name, installer_instance))
 
-        if installer_instance.plugin_configuration:
-            print(f'Running {installer_name} installer ', flush=True)
-            result = installer_instance.install_dependencies()
-            if result:
-                print(colored(f'Installed {len(result)} package{"s" if len(result) > 1 else ""}', 'green'), flush=True)
-            else:
-                print('No packages installed', flush=True)
-            installed[installer_name] = result
-            print('')
+    if arguments.lock:
+        return lock_main(installers)
+    if arguments.matrix:
+        return matrix_main(arguments, installers)
+    if arguments.plan:
+        return plan_main(arguments, installers)
 
-    # Make sure the report directory exists
-    artifacts_dir = os.environ.get('SD_ARTIFACTS_DIR', '')
-    report_dir = os.path.join(artifacts_dir, 'reports/installdeps')
-    report_filename = os.path.join(report_dir, 'installdeps.json')
-    create_artifact_directory(report_dir)
+    installer_instances = dict(installers)
+    results = {}
+    for stage in installer_stages([installer_name for installer_name, _ in installers], config.get('parallel_groups', [])):
+        if len(stage) > 1:
+            LOG.debug(f'Running the {", ".join(stage)} installers at the same time')
+        results.update(run_concurrently([
+            (installer_name, functools.partial(run_installer, installer_name, installer_instances[installer_name])) for installer_name in stage
+        ]))
 
-    with open(report_filename, 'w') as fh:
-        json.dump(installed, fh)
+    installed = {}
+    details = {}
+    failed = False
+    for installer_name, installer_instance in installers:
+        if results.get(installer_name, None) is None:
+            continue
+        installed[installer_name] = results[installer_name]
+        details[installer_name] = installer_instance.report_details
+        failed = failed or installer_instance.failed
+
+    meta: Dict[str, Any] = {'details': details, 'timing': timer.phases}
+    cache_extensions = {installer_instance.config_section: installer_instance.cache_file_extensions for _, installer_instance in installers}
+    cache_report = download_cache_report(details, extensions=cache_extensions)
+    if cache_report:
+        meta['cache'] = cache_report
+        print(f'Download cache: {cache_report["hits"]} hits, {cache_report["misses"]} misses, {cache_report["hit_rate"]:.1%} hit rate', flush=True)
+    report: Dict[str, Any] = dict(installed)
+    report[REPORT_META_KEY] = meta
+    write_report(report)
+    if loglevel == logging.DEBUG:
+        print('Installdeps timing:')
+        print(timer.summary(prefix='    '))
+        for installer_name, installer_instance in installers:
+            if installer_instance.timer.phases:
+                print(f'  {installer_name}:')
+                print(installer_instance.timer.summary(prefix='    '))
+    if not failed:
+        write_stamp(fingerprint, report)
     return 0
 
 
@@ -5,9 +5,11 @@ Read/Parse the configuration file for the screwdrivercd.installdeps tool
 """
 import copy
 import os
+import threading
 
 from collections.abc import Mapping  # pylint: disable no-name-in-module
-from typing import Any, Dict, Optional
+from types import MappingProxyType
+from typing import Any, Dict, Optional, Tuple
 
 import tomllib as toml
 
@@ -24,8 +26,10 @@ CONFIGURATION_SCHEMA = {
         'deps': []
     },
     'install': ['apk', 'apt-get', 'yinst', 'yum', 'pip3'],
+    'parallel_groups': [],
     'pip3': {
         'deps': [],
+        'lock_file': '',
         'repos': {}
     },
     'yinst': {
@@ -57,6 +61,32 @@ def deep_update(source, update_dict):
     return source
 
 
+def read_only(value):
+    """
+    Return a read-only copy of a configuration value, dictionaries become mapping proxies and lists become tuples
+    """
+    if isinstance(value, Mapping):
+        return MappingProxyType({key: read_only(item) for key, item in value.items()})
+    if isinstance(value, (list, tuple)):
+        return tuple(read_only(item) for item in value)
+    return value
+
+
+def file_signature(filename: str) -> Optional[Tuple[int, int, int]]:
+    """
+    Get the inode, modification time and size of a file, or None if the file does not exist
+    """
+    try:
+        file_stat = os.stat(filename)
+    except OSError:
+        return None
+    return file_stat.st_ino, file_stat.st_mtime_ns, file_stat.st_size
+
+
+_configuration_cache: Dict[str, Tuple[Optional[Tuple[int, int, int]], 'Configuration']] = {}
+_configuration_cache_lock = threading.Lock()
+
+
 class Configuration():
     """
     installdeps configuration class
@@ -70,6 +100,36 @@ class Configuration():
         self.configuration = copy.deepcopy(CONFIGURATION_SCHEMA)
         self.load_configuration()
 
+    @classmethod
+    def cached(cls, filename: Optional[str] = None) -> 'Configuration':
+        """
+        Get a configuration that is shared by everything in the process.
+
+        The shared configuration is read-only, and the configuration file is only parsed again when its inode,
+        modification time or size changes.
+
+        Parameters
+        ----------
+        filename: str, optional
+            The configuration filename, default is pyproject.toml
+
+        Returns
+        -------
+        Configuration:
+            The shared configuration
+        """
+        filename = filename or cls.filename
+        key = os.path.abspath(filename)
+        signature = file_signature(filename)
+        with _configuration_cache_lock:
+            cached = _configuration_cache.get(key, None)
+            if cached and cached[0] == signature:
+                return cached[1]
+            configuration = cls(filename)
+            configuration.configuration = read_only(configuration.configuration)
+            _configuration_cache[key] = (signature, configuration)
+        return configuration
+
     def load_configuration(self):
         """
         Load the configuration from the configuration file
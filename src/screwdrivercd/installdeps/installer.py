@@ -1,20 +1,151 @@
 # Copyright 2019, Oath Inc.
 # Licensed under the terms of the Apache 2.0 license.  See the LICENSE file in the project root for terms
 """Base Installer Functionality"""
+import asyncio
 import copy
 import logging
 import os
 import shutil
 import subprocess  # nosec - All subprocess calls use full path
 import sys
-from typing import Dict, Optional, List
+import threading
+from typing import Any, Dict, Mapping, Optional, List, Sequence, Set, Tuple
 
 from termcolor import colored
+from .cache import cache_directory, cache_files, cached_package_files, touch
 from .config import Configuration
-from .requirement import Requirement
+from .requirement import PLAIN_NAME_RE, marker_cache
+from .timing import PhaseTimer
+from ..utility.environment import env_bool
+from ..utility.run import run_and_stream_output
 
 
 LOG = logging.getLogger(__name__)
+_command_cache: Dict[Tuple[str, Tuple[str, ...], str], Optional[str]] = {}
+_command_cache_lock = threading.Lock()
+
+
+def resolve_command(command: str, search_path: Sequence[str], use_system_path: bool = False) -> Optional[str]:
+    """
+    Find a command in a list of directories, and the system path if use_system_path is True.
+
+    The result for each command and search path is cached for the life of the process, so installers created more than
+    once only search for their command once.
+
+    Parameters
+    ----------
+    command: str
+        The command name
+
+    search_path: list of str
+        Directories to search, in order
+
+    use_system_path: bool, optional
+        If True, search the directories in the PATH environment variable if the command is not in the search_path
+
+    Returns
+    -------
+    str or None:
+        The full path of the command, or None if it was not found
+    """
+    key = (command, tuple(search_path), os.environ.get('PATH', '') if use_system_path else '')
+    if key in _command_cache:
+        return _command_cache[key]
+
+    resolved = None
+    for directory in search_path:
+        filename = os.path.join(directory, command)
+        if os.path.exists(filename):
+            resolved = os.path.abspath(filename)
+            break
+    else:
+        if use_system_path:
+            resolved = shutil.which(command)
+    with _command_cache_lock:
+        _command_cache[key] = resolved
+    return resolved
+
+
+def clear_command_cache() -> None:
+    """
+    Remove the cached resolve_command() results, for when commands are installed or removed
+    """
+    with _command_cache_lock:
+        _command_cache.clear()
+
+
+async def _run_command_async(command: List[str], semaphore: asyncio.Semaphore) -> subprocess.CompletedProcess:
+    """
+    Run a command once the semaphore allows it, killing the command if the task is cancelled
+    """
+    async with semaphore:
+        try:
+            process = await asyncio.create_subprocess_exec(*command, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+        except OSError as error:
+            LOG.debug(f'Unable to run {" ".join(command)!r}: {error}')
+            return subprocess.CompletedProcess(command, 127, b'')
+        try:
+            stdout, _ = await process.communicate()
+            returncode = await process.wait()
+        except asyncio.CancelledError:
+            if process.returncode is None:
+                process.kill()
+                await process.wait()
+            raise
+        return subprocess.CompletedProcess(command, returncode, stdout)
+
+
+async def run_commands_async(commands: Sequence[List[str]], max_concurrency: int = 4, stop_on_failure: bool = False) -> List[Optional[subprocess.CompletedProcess]]:
+    """
+    Run independent commands at the same time
+
+    Parameters
+    ----------
+    commands: list of list of str
+        The commands to run
+
+    max_concurrency: int, optional
+        The maximum number of commands to run at the same time
+
+    stop_on_failure: bool, optional
+        If True, cancel the commands that are still waiting or running when a command fails
+
+    Returns
+    -------
+    list:
+        The completed process for each command, in the order of the commands, or None for cancelled commands
+    """
+    semaphore = asyncio.Semaphore(max(1, max_concurrency))
+    tasks = [asyncio.ensure_future(_run_command_async(list(command), semaphore)) for command in commands]
+    results: List[Optional[subprocess.CompletedProcess]] = [None] * len(tasks)
+    pending = set(tasks)
+    while pending:
+        done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+        failed = False
+        for task in done:
+            results[tasks.index(task)] = task.result()
+            failed = failed or task.result().returncode != 0
+        if failed and stop_on_failure and pending:
+            LOG.debug(f'A command failed, cancelling {len(pending)} commands')
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+            break
+    return results
+
+
+def run_commands(commands: Sequence[List[str]], max_concurrency: int = 4, stop_on_failure: bool = False) -> List[Optional[subprocess.CompletedProcess]]:
+    """
+    Run independent commands at the same time and wait for them to complete, see run_commands_async()
+
+    Returns
+    -------
+    list:
+        The completed process for each command, in the order of the commands, or None for cancelled commands
+    """
+    if not commands:
+        return []
+    return asyncio.run(run_commands_async(commands, max_concurrency=max_concurrency, stop_on_failure=stop_on_failure))
 
 
 class Installer():
@@ -35,9 +166,23 @@ class Installer():
     use_system_path: bool = False
     """bool: If True, search the system path if the command cannot be found in the install_command_path"""
 
+    install_repo_command: List[str] = []
+    """:obj:`list` of :obj:`str`: The command that adds a repository, for installers that support repositories"""
+
     supports_repositories: bool = False
     """bool: If True the installer supports adding repositories"""
 
+    supports_lock_file: bool = False
+    """bool: If True the installer can resolve its dependencies into a lock file with write_lock_file()"""
+
+    supported_distros: Optional[List[str]] = None
+    """:obj:`list` of :obj:`str`: The distro_id or distro_like values of the environments the installer supports, used
+    to pick the installers when planning for an environment snapshot.  None supports every environment."""
+
+    concurrent_validation: bool = True
+    """bool: If True, run the validation_command() of the dependencies at the same time instead of calling
+    validate_dependency() for each one.  Set to False when validate_dependency() is overridden."""
+
     default_repos: Optional[Dict[str, str]] = {}
     """A dictionary of repo name, repo url to enable by default"""
 
@@ -53,6 +198,20 @@ class Installer():
     exit_on_missing: bool = False
     """bool: If True, terminate installation immediately if a dependency is missing"""
 
+    skip_installed: bool = True
+    """bool: If True, don't install dependencies that are already installed on the host"""
+
+    max_concurrent_commands: int = 4
+    """int: The maximum number of independent commands, such as dependency validations, to run at the same time"""
+
+    cache_file_extensions: Optional[List[str]] = None
+    """:obj:`list` of :obj:`str`: Extensions of the package files kept in the download cache, or None for all files"""
+
+    download_cache_dir: str = ''
+    """str: The download cache directory for this installer, or an empty string if the download cache is disabled"""
+
+    _installed_packages: Optional[Set[str]] = None
+
     def __init__(self, dry_run: bool = False, bin_dir: Optional[str] = None):
         """
         Generic Package Installer
@@ -66,12 +225,23 @@ class Installer():
             If True, Don't execute packaging commands, default=False
         """
         self.dry_run = dry_run
+        # Copy the command lists so resolving the command paths doesn't change the class attributes
+        self.install_command = list(self.install_command)
+        self.install_repo_command = list(self.install_repo_command)
+        self.skip_installed = bool(env_bool('INSTALLDEPS_SKIP_INSTALLED', self.skip_installed))
+        self.skipped: List[str] = []
+        self.failed: bool = False
+        self.timer = PhaseTimer()
+        self.cache_hits: int = 0
+        self.cache_misses: int = 0
+        if cache_directory():
+            self.download_cache_dir = os.path.abspath(os.path.join(cache_directory(), self.config_section))
 
         if bin_dir:
             self.bin_dir = bin_dir
 
 
-        self.config = Configuration()
+        self.config = Configuration.cached()
         self.find_install_command()
         self._handle_custom_settings()
 
@@ -108,6 +278,98 @@ class Installer():
                     return True
         return False
 
+    @property
+    def installed_packages(self) -> Set[str]:
+        """
+        Names of the packages installed on the host, queried once per installer
+
+        Returns
+        -------
+        set of str:
+            The installed package names
+        """
+        if self._installed_packages is None:
+            self._installed_packages = self.query_installed_packages()
+            LOG.debug(f'Found {len(self._installed_packages)} installed {self.name!r} packages')
+        return self._installed_packages
+
+    @classmethod
+    def find_command(cls, bin_dir: Optional[str] = None) -> Optional[str]:
+        """
+        Find the install command on the host, without creating an installer
+
+        Parameters
+        ----------
+        bin_dir: str, optional
+            The bin_dir setting from the configuration, default is the bin_dir class attribute
+
+        Returns
+        -------
+        str or None:
+            The full path of the install command found in the bin_dir, the install_command_path directories or the
+            system path if use_system_path is True, or None if it was not found
+        """
+        command = cls.install_command[0]
+        if command.startswith('/'):
+            return command if os.path.exists(command) else None
+        bin_dir = bin_dir or cls.bin_dir
+        if bin_dir:
+            filename = os.path.abspath(os.path.join(bin_dir, command))
+            return filename if os.path.exists(filename) else None
+        return resolve_command(command, cls.install_command_path or [], cls.use_system_path)
+
+    @classmethod
+    def command_available(cls) -> bool:
+        """
+        Check if the install command is present on the host, without creating an installer or reading the
+        configuration
+
+        Returns
+        -------
+        bool:
+            True if the install command is found in the bin_dir, the install_command_path directories or the system
+            path if use_system_path is True
+        """
+        return cls.find_command() is not None
+
+    @classmethod
+    def supports_environment(cls, environment: Mapping[str, str]) -> bool:
+        """
+        Check if the installer supports an environment, without creating an installer
+
+        Parameters
+        ----------
+        environment: dict
+            The environment marker values, such as an environment snapshot
+
+        Returns
+        -------
+        bool:
+            True if the installer supports every environment, the environment does not have a distro_id value, or the
+            distro_id or one of the distro_like values is in supported_distros
+        """
+        if cls.supported_distros is None or 'distro_id' not in environment:
+            return True
+        distros = [environment['distro_id']] + environment.get('distro_like', '').split()
+        return any(_ in cls.supported_distros for _ in distros)
+
+    @classmethod
+    def configured_lock_filename(cls, config: Configuration) -> str:
+        """
+        Get the lock file the configuration sets for this installer, without creating an installer
+
+        Parameters
+        ----------
+        config: Configuration
+            The installdeps configuration
+
+        Returns
+        -------
+        str:
+            The full path of the lock file, or an empty string if the installer does not use a lock file
+        """
+        return ''
+
     @property
     def is_supported(self) -> bool:  # pragma: no cover
         """
@@ -123,6 +385,21 @@ class Installer():
             return True
         return False
 
+    @property
+    def report_details(self) -> Dict[str, Any]:
+        """
+        Details about the installation to add to the installdeps report
+
+        Returns
+        -------
+        dict:
+            Report details
+        """
+        details: Dict[str, Any] = {'skipped': self.skipped, 'timing': self.timer.phases}
+        if self.download_cache_dir:
+            details['cache'] = {'hits': self.cache_hits, 'misses': self.cache_misses}
+        return details
+
     @property
     def plugin_configuration(self):  # pragma: no cover
         """
@@ -151,27 +428,46 @@ class Installer():
         -------
         """
 
-    def add_repos(self):  # pragma: no cover
-        """
-        Add repositories to the host configuration
+    def filtered_repos(self, environment: Optional[Dict[str, str]] = None) -> Dict[str, str]:
         """
-        if not self.supports_repositories:
-            LOG.debug(f'Install plugin {self.config_section} does not support repositories')
-            return
+        Get the configured repositories that match their environment markers
+
+        Parameters
+        ----------
+        environment: dict, optional
+            The environment marker values to evaluate the markers with, default is the current environment
 
-        repos = copy.copy(self.default_repos)
+        Returns
+        -------
+        dict:
+            The repository urls by repository name, with the environment markers removed
+        """
+        repos = copy.copy(self.default_repos) or {}
         repos.update(self.plugin_configuration.get('repos', {}))
 
-        LOG.debug('Adding package repositories')
+        filtered = {}
         for repo_name, repo_url in repos.items():
             repo_url_env = repo_url.split(';')
             if len(repo_url_env) > 1:
-                repo_url_req = Requirement(f'{repo_name};{repo_url_env[-1]}')
-                LOG.debug(f'Evaluating the repository environment marker {repo_name};{repo_url_env[-1]} == {repo_url_req.env_matches}')
-                if not repo_url_req.env_matches:
+                repo_env_matches = marker_cache.evaluate(repo_url_env[-1], environment)
+                LOG.debug(f'Evaluating the repository environment marker {repo_name};{repo_url_env[-1]} == {repo_env_matches}')
+                if not repo_env_matches:
                     LOG.debug(f'Filtered {repo_name!r} as it is not supported in this environment')
                     continue
                 repo_url = repo_url_env[0]
+            filtered[repo_name] = repo_url
+        return filtered
+
+    def add_repos(self):  # pragma: no cover
+        """
+        Add repositories to the host configuration
+        """
+        if not self.supports_repositories:
+            LOG.debug(f'Install plugin {self.config_section} does not support repositories')
+            return
+
+        LOG.debug('Adding package repositories')
+        for repo_name, repo_url in self.filtered_repos().items():
             if self.print_output:
                 print(f'Enabling {repo_name!r} repo: ', end='', flush=True)
             else:
@@ -202,21 +498,12 @@ class Installer():
         if self.plugin_configuration and self.plugin_configuration.get('bin_dir', None):  # pragma: no cover
             LOG.debug('Setting the configuartion directory from the configuration')
             self.bin_dir = self.plugin_configuration['bin_dir']
+            return
 
-        # LOG.debug(f'Searching for the install command in {self.install_command_path}')
-        for directory in self.install_command_path:
-            filename = os.path.join(directory, self.install_command[0])
-            if os.path.exists(filename):
-                # LOG.debug(f'Found install command in install_command_path {directory!r} directory')
-                self.bin_dir = directory
-                return
-
-        if self.use_system_path:
-            install_binary = shutil.which(self.install_command[0])
-            if install_binary:
-                self.bin_dir = os.path.dirname(install_binary)
-                LOG.debug(f'Found install command in system path {self.bin_dir}')
-                return
+        install_binary = resolve_command(self.install_command[0], self.install_command_path or [], self.use_system_path)
+        if install_binary:
+            self.bin_dir = os.path.dirname(install_binary)
+            LOG.debug(f'Found install command in {self.bin_dir}')
 
     def find_install_command(self):
         """
@@ -229,33 +516,110 @@ class Installer():
         if self.bin_dir:
             full_command = os.path.abspath(os.path.join(self.bin_dir, self.install_command[0]))
             self.install_command[0] = full_command
-        else:
-            if self.use_system_path:
-                LOG.debug(f'Finding the install command in the system PATH')
-                install_command = shutil.which(self.install_command[0])
-                if install_command:
-                    self.install_command[0] = install_command
-                return
 
-    def filter_environment_markers(self, dependencies: List[str]) -> List[str]:
+    def filter_environment_markers(self, dependencies: List[str], environment: Optional[Dict[str, str]] = None) -> List[str]:
         """
         Remove any dependencies that don't match environment markers for the current environment
+
+        Parameters
+        ----------
+        dependencies: list of str
+            The dependencies, with optional environment markers
+
+        environment: dict, optional
+            The environment marker values to evaluate the markers with, default is the current environment
         """
         new_dependencies = []
         for dependency in dependencies:
-            req = Requirement(dependency)
-            if not req.env_evals:
-                new_dependencies.append(dependency)
+            requirement, _, marker = dependency.partition(';')
+            if not marker.strip():
+                new_dependencies.append(requirement)
                 continue
 
-            if req.env_matches:
-                dependency = dependency.split(';')[0]
-                new_dependencies.append(dependency)
+            if marker_cache.evaluate(marker, environment):
+                new_dependencies.append(requirement)
                 continue
 
             LOG.debug(f'Filtered dependency {dependency} due to the environment marker')
         return new_dependencies
 
+    def query_installed_packages(self) -> Set[str]:
+        """
+        Query the package database for the installed package names.  Installers that can't query the package
+        database return an empty set, so no dependencies are skipped.
+
+        Returns
+        -------
+        set of str:
+            The installed package names
+        """
+        return set()
+
+    def query_package_names(self, command: List[str]) -> Set[str]:
+        """
+        Run a package query command that lists one package name at the start of each output line
+
+        Parameters
+        ----------
+        command: list of str
+            The query command to run
+
+        Returns
+        -------
+        set of str:
+            The package names, or an empty set if the query failed
+        """
+        try:
+            output = subprocess.run(command, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, check=True).stdout  # nosec - All subprocess calls use full path
+        except (OSError, subprocess.CalledProcessError):
+            LOG.debug(f'Installed package query {" ".join(command)!r} failed')
+            return set()
+        return {line.split()[0] for line in output.decode(errors='ignore').splitlines() if line.strip()}
+
+    def dependency_satisfied(self, dependency: str) -> bool:
+        """
+        Check if a dependency is already installed on the host
+
+        Parameters
+        ----------
+        dependency: str
+            The dependency, with any environment marker removed
+
+        Returns
+        -------
+        bool:
+            True if the dependency is a plain package name that is already installed
+        """
+        plain_name = PLAIN_NAME_RE.match(dependency)
+        if not plain_name:
+            return False
+        return plain_name.group(1) in self.installed_packages
+
+    def unsatisfied_dependencies(self, dependencies: List[str]) -> List[str]:
+        """
+        Remove the dependencies that are already installed, the removed dependencies are added to self.skipped
+
+        Parameters
+        ----------
+        dependencies: list of str
+            The dependencies, with the environment markers removed
+
+        Returns
+        -------
+        list of str:
+            The dependencies that still need to be installed
+        """
+        if not self.skip_installed:
+            return dependencies
+        unsatisfied = []
+        for dependency in dependencies:
+            if self.dependency_satisfied(dependency):
+                LOG.debug(f'Dependency {dependency!r} is already installed')
+                self.skipped.append(dependency)
+                continue
+            unsatisfied.append(dependency)
+        return unsatisfied
+
     def install_dependencies(self) -> List[str]:
         """
         Install all of the dependencies using the install command
@@ -264,8 +628,10 @@ class Installer():
             LOG.debug(f'No {self.name!r} dependencies to install')
             return []
 
-        self.add_repos()
-        self.update_index()
+        with self.timer.phase('add_repos'):
+            self.add_repos()
+        with self.timer.phase('update_index'):
+            self.update_index()
 
         installed: List[str] = []
         invalid: List[str] = []
@@ -274,9 +640,15 @@ class Installer():
             dependencies = self.config.configuration[self.config_section][config_key]
             if dependencies:
                 dependencies = self.filter_environment_markers(dependencies)
+                with self.timer.phase('query_installed'):
+                    dependencies = self.unsatisfied_dependencies(dependencies)
+                if not dependencies:
+                    continue
                 # LOG.debug(f'Processing dependencies {dependencies!r}')
-                invalid += self.invalid_dependencies(dependencies, config_key=config_key)
+                with self.timer.phase('validate'):
+                    invalid += self.invalid_dependencies(dependencies, config_key=config_key)
                 if invalid:
+                    self.failed = True
                     if self.print_error_output:  # pragma: no cover
                         print(colored('Invalid %r dependencies %r specified' % (config_key, invalid), 'red'), flush=True)
                     else:
@@ -290,7 +662,8 @@ class Installer():
                         print(f'Installing dependencies {dependencies!r}')
                     else:
                         LOG.debug(f'Installing dependencies: {dependencies!r}')
-                    installed += self.install(dependencies, config_key=config_key)
+                    with self.timer.phase('install'):
+                        installed += self.install(dependencies, config_key=config_key)
         return installed
 
     def install(self, dependencies, config_key=None):
@@ -307,7 +680,7 @@ class Installer():
         list:
             Dependencies installed
         """
-        command = self.install_command + self.install_arguments(config_key=config_key) + dependencies
+        command = self.install_command_line(dependencies, config_key=config_key)
         if self.dry_run:
             LOG.debug('Dry Run: %r', ' '.join(command))
             return dependencies
@@ -315,25 +688,46 @@ class Installer():
             print('Running command: %r' % ' '.join(command))
         else:  # pragma: no cover
             LOG.debug('Running command: %r', ' '.join(command))
-        try:
-            output = subprocess.check_output(command, stderr=subprocess.STDOUT)  # nosec - All subprocess calls use full path
-        except subprocess.CalledProcessError as error:  # pragma: no cover
+        cached = cache_files(self.download_cache_dir, self.cache_file_extensions) if self.download_cache_dir else {}
+        returncode, output_tail = run_and_stream_output(command, self.log_filename, line_handler=self._handle_output_line)
+        if self.download_cache_dir:
+            self.record_cache_usage(dependencies, cached)
+        if returncode:  # pragma: no cover
+            self.failed = True
             if self.print_error_output:
-                print(colored(f'Install command {" ".join(command)!r} failed', "red"), flush=True)
-                print(error.stdout.decode().strip())
+                print(colored(f'Install command {" ".join(command)!r} failed, the output is in {self.log_filename!r}', "red"), flush=True)
+                if not self.print_output:
+                    print(os.linesep.join(output_tail).strip())
                 if self.exit_on_missing:
                     sys.exit(1)
             else:
-                LOG.error('Install command failed')
-                LOG.error(error.stdout.decode.strip())
+                LOG.error(f'Install command failed, the output is in {self.log_filename!r}')
+                LOG.error(os.linesep.join(output_tail).strip())
             return []
 
+        return dependencies
+
+    @property
+    def log_filename(self) -> str:
+        """
+        The log file for the output of the install commands
+
+        Returns
+        -------
+        str:
+            The full path of the log file
+        """
+        artifacts_dir = os.environ.get('SD_ARTIFACTS_DIR', '')
+        return os.path.join(artifacts_dir, 'logs/installdeps', f'{self.config_section}.log')
+
+    def _handle_output_line(self, line: str) -> None:
+        """
+        Send a line of install command output to the console or the debug log
+        """
         if self.print_output:  # pragma: no cover
-            print(output.decode().strip())
+            print(line, flush=True)
         else:  # pragma: no cover
-            LOG.debug(output.decode().strip())
-
-        return dependencies
+            LOG.debug(line)
 
     def validate_dependency(self, dependency):
         """
@@ -347,9 +741,46 @@ class Installer():
         Returns
         -------
         bool
-            True if valid
+            True if valid, the dependency is valid if its validation_command() succeeds or the installer has no
+            validation command
+        """
+        command = self.validation_command(dependency)
+        if not command:
+            return True
+        result = run_commands([command])[0]
+        return result is not None and result.returncode == 0
+
+    def validation_command(self, dependency: str) -> Optional[List[str]]:
+        """
+        Get a command that succeeds if the dependency is valid
+
+        Parameters
+        ----------
+        dependency: str
+            Dependency to validate
+
+        Returns
+        -------
+        list of str or None:
+            The command, or None if the installer does not validate dependencies
+        """
+        return None
+
+    def confirmed_dependencies(self, dependencies: List[str]) -> List[str]:
+        """
+        Validate a list of dependencies with a single query, for installers that support it
+
+        Parameters
+        ----------
+        dependencies: list of str
+            The dependency list to validate
+
+        Returns
+        -------
+        list of str:
+            Dependencies the query confirmed are valid, dependencies not returned are validated one at a time
         """
-        return True
+        return []
 
     def invalid_dependencies(self, dependencies, config_key=None):
         """
@@ -365,12 +796,182 @@ class Installer():
         list of str:
             Dependencies that are invalid
         """
+        confirmed = set(self.confirmed_dependencies(dependencies))
+        unconfirmed = [_ for _ in dependencies if _ not in confirmed]
+        commands = [self.validation_command(_) for _ in unconfirmed]
+
+        # Run the validation commands at the same time, unless the installer validates dependencies another way
+        if unconfirmed and all(commands) and self.concurrent_validation:
+            results = run_commands(commands, max_concurrency=self.max_concurrent_commands, stop_on_failure=self.exit_on_missing)
+            return [depend for depend, result in zip(unconfirmed, results) if result is not None and result.returncode != 0]
+
         invalid = []
-        for depend in dependencies:
+        for depend in unconfirmed:
             if self.validate_dependency(depend) is False:
                 invalid.append(depend)
+                if self.exit_on_missing:
+                    break
         return invalid
 
+    def install_command_line(self, dependencies: List[str], config_key=None, use_cache: bool = True) -> List[str]:
+        """
+        Get the command that installs a list of dependencies
+
+        Parameters
+        ----------
+        dependencies: list of str
+            List of the dependencies to install
+
+        config_key: str, optional
+            The configuration key the dependencies are from
+
+        use_cache: bool, optional
+            If True and the download cache is enabled, add the cache_arguments() to the command
+
+        Returns
+        -------
+        list of str:
+            The install command
+        """
+        cache_arguments = self.cache_arguments() if use_cache and self.download_cache_dir else []
+        return self.install_command + cache_arguments + self.install_arguments(config_key=config_key) + dependencies
+
+    def cache_arguments(self) -> List[str]:
+        """
+        Get the install command arguments that keep the downloaded packages in the download_cache_dir, for
+        installers that support the download cache
+
+        Returns
+        -------
+        list of str:
+            Extra arguments to add
+        """
+        return []
+
+    def record_cache_usage(self, dependencies: List[str], cached: Dict[str, os.stat_result]) -> None:
+        """
+        Update the cache hit and miss counts after running the install command.
+
+        A dependency with a package file that was in the cache before the install is a hit, and each package file
+        added to the cache by the install is a miss.  The package files of the hits are marked as recently used.
+
+        Parameters
+        ----------
+        dependencies: list of str
+            The dependencies that were installed
+
+        cached: dict
+            The files in the download cache before the install, from cache_files()
+        """
+        added = set(cache_files(self.download_cache_dir, self.cache_file_extensions)) - set(cached)
+        hits = cached_package_files(dependencies, cached)
+        self.cache_misses += len(added)
+        self.cache_hits += len(hits)
+        touch(path for paths in hits.values() for path in paths)
+
+    def repo_commands(self, repo_name: str, repo_url: str) -> List[List[str]]:
+        """
+        Get the commands that add a repository to the host configuration, for installers that support repositories
+
+        Parameters
+        ----------
+        repo_name: str
+            The human readable name string for the repository
+
+        repo_url: str
+            The url of the repository to add
+
+        Returns
+        -------
+        list of list of str:
+            The commands to run
+        """
+        return []
+
+    def add_repos_commands(self, repos: Dict[str, str]) -> List[List[str]]:
+        """
+        Get the commands that add several repositories to the host configuration
+
+        Parameters
+        ----------
+        repos: dict
+            The repository urls by repository name
+
+        Returns
+        -------
+        list of list of str:
+            The commands to run, by default the repo_commands() of each repository
+        """
+        commands: List[List[str]] = []
+        for repo_name, repo_url in repos.items():
+            commands += self.repo_commands(repo_name, repo_url)
+        return commands
+
+    @property
+    def lock_filename(self) -> str:
+        """
+        The full path of the lock file, or an empty string if the installer does not use a lock file
+        """
+        return self.configured_lock_filename(self.config)
+
+    def write_lock_file(self) -> str:
+        """
+        Resolve the dependencies into a lock file, for installers that support lock files
+
+        Returns
+        -------
+        str:
+            The lock filename
+
+        Raises
+        ------
+        ValueError: The installer does not support lock files
+        """
+        raise ValueError(f'The {self.config_section} installer does not support lock files')
+
+    def update_index_commands(self) -> List[List[str]]:
+        """
+        Get the commands that update the package index
+
+        Returns
+        -------
+        list of list of str:
+            The commands to run
+        """
+        return []
+
+    def plan(self, environment: Optional[Dict[str, str]] = None) -> Dict[str, Any]:
+        """
+        Determine the commands that install the dependencies, without running them
+
+        Unlike install_dependencies(), the plan does not query the installed packages or validate the dependencies,
+        so the plan installs everything the configuration lists for the environment.
+
+        Parameters
+        ----------
+        environment: dict, optional
+            The environment marker values to evaluate the markers with, default is the current environment
+
+        Returns
+        -------
+        dict:
+            The installer name, the dependencies by configuration key and the ordered list of commands
+        """
+        commands: List[List[str]] = []
+        dependencies: Dict[str, List[str]] = {}
+        for config_key in self.deps_config_keys:
+            config_dependencies = self.filter_environment_markers(self.config.configuration[self.config_section][config_key], environment)
+            if config_dependencies:
+                dependencies[config_key] = config_dependencies
+
+        if dependencies:
+            if self.supports_repositories:
+                commands += self.add_repos_commands(self.filtered_repos(environment))
+            commands += self.update_index_commands()
+            for config_key, config_dependencies in dependencies.items():
+                commands.append(self.install_command_line(config_dependencies, config_key=config_key, use_cache=False))
+        return {'installer': self.config_section, 'dependencies': dependencies, 'commands': commands}
+
     def install_arguments(self, config_key=None):
         """
         Return extra command line arguments list based on the config_key
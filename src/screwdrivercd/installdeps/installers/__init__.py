@@ -2,19 +2,95 @@
 # Licensed under the terms of the Apache 2.0 license.  See the LICENSE file in the project root for terms
 """
 Package installer classes
+
+The installer classes are registered in the `screwdrivercd.installdeps.installer` entry point group and are imported
+the first time they are looked up in the install_plugins registry.
 """
-from .apk import ApkInstaller
-from .apt import AptInstaller
-from .brew import BrewInstaller
-from .pip3 import PipInstaller
-from .yum import YumInstaller
+import importlib
+import importlib.metadata
+import logging
+import threading
+from collections.abc import Mapping
+from typing import Dict, Iterator, Optional
+
+
+LOG = logging.getLogger(__name__)
+ENTRY_POINT_GROUP = 'screwdrivercd.installdeps.installer'
+BUILTIN_INSTALLERS = {
+    'apk': 'screwdrivercd.installdeps.installers.apk:ApkInstaller',
+    'apt-get': 'screwdrivercd.installdeps.installers.apt:AptInstaller',
+    'brew': 'screwdrivercd.installdeps.installers.brew:BrewInstaller',
+    'pip3': 'screwdrivercd.installdeps.installers.pip3:PipInstaller',
+    'yum': 'screwdrivercd.installdeps.installers.yum:YumInstaller',
+}
+"""The installers in this package, used if the package metadata is not available"""
+
+
+class InstallerRegistry(Mapping):
+    """
+    Mapping of installer names to installer classes that imports each class when it is first looked up
+    """
+    def __init__(self, builtin_installers: Optional[Dict[str, str]] = None, group: str = ENTRY_POINT_GROUP):
+        self.builtin_installers = BUILTIN_INSTALLERS if builtin_installers is None else builtin_installers
+        self.group = group
+        self._lock = threading.Lock()
+        self._references: Optional[Dict[str, str]] = None
+        self._classes: Dict[str, type] = {}
+
+    @property
+    def references(self) -> Dict[str, str]:
+        """
+        The `module:class` reference of each installer, the entry points are read on first use
+        """
+        if self._references is None:
+            references = dict(self.builtin_installers)
+            for entry_point in importlib.metadata.entry_points(group=self.group):
+                references[entry_point.name] = entry_point.value
+            self._references = references
+        return self._references
+
+    def __getitem__(self, name: str) -> type:
+        installer_class = self._classes.get(name, None)
+        if installer_class:
+            return installer_class
+
+        module_name, _, class_name = self.references[name].partition(':')
+        try:
+            installer_class = getattr(importlib.import_module(module_name), class_name)
+        except (ImportError, AttributeError) as error:
+            # Report a plugin that fails to load as missing so the other installers still run
+            LOG.warning(f'Installer plugin {name!r} failed to load: {error}')
+            raise KeyError(name) from error
+        with self._lock:
+            self._classes[name] = installer_class
+        return installer_class
+
+    def __contains__(self, name) -> bool:
+        return name in self.references
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.references)
+
+    def __len__(self) -> int:
+        return len(self.references)
 
 
 __all__ = ['apk', 'apt', 'brew', 'pip3', 'yum']
-install_plugins = {
-    'apk': ApkInstaller,
-    'apt-get': AptInstaller,
-    'brew': BrewInstaller,
-    'pip3': PipInstaller,
-    'yum': YumInstaller
+install_plugins = InstallerRegistry()
+INSTALLER_CLASSES = {
+    'ApkInstaller': 'apk',
+    'AptInstaller': 'apt-get',
+    'BrewInstaller': 'brew',
+    'PipInstaller': 'pip3',
+    'YumInstaller': 'yum',
 }
+"""The installer classes this package exports, by the name they are registered with"""
+
+
+def __getattr__(name: str) -> type:
+    """
+    Import the installer classes this package exports when they are first used
+    """
+    if name in INSTALLER_CLASSES:
+        return install_plugins[INSTALLER_CLASSES[name]]
+    raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
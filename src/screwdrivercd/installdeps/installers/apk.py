@@ -2,7 +2,7 @@
 # Licensed under the terms of the Apache 2.0 license.  See the LICENSE file in the project root for terms
 """Install apk dependencies"""
 import logging
-from typing import List
+from typing import List, Optional, Set
 
 from ..installer import Installer
 
@@ -17,3 +17,27 @@ class ApkInstaller(Installer):
     install_command: List[str] = ['apk', 'add']
     config_section: str = 'apk'
     install_command_path: List[str] = ['/sbin']
+    cache_file_extensions: Optional[List[str]] = ['.apk']
+    supported_distros: Optional[List[str]] = ['alpine']
+
+    def cache_arguments(self) -> List[str]:
+        """
+        Keep the downloaded packages in the download cache directory
+
+        Returns
+        -------
+        list of str:
+            Extra arguments to add
+        """
+        return ['--cache-dir', self.download_cache_dir]
+
+    def query_installed_packages(self) -> Set[str]:
+        """
+        Query the apk database for the installed package names
+
+        Returns
+        -------
+        set of str:
+            The installed package names
+        """
+        return self.query_package_names([self.install_command[0], 'info'])
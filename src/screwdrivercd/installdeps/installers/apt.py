@@ -5,11 +5,12 @@ import logging
 import os
 import shutil
 import subprocess  # nosec - All subprocess calls use full path
-from typing import List
+import time
+from typing import Any, Dict, List, Optional, Set
 
 from termcolor import colored
 
-from ..installer import Installer
+from ..installer import Installer, clear_command_cache, resolve_command
 
 
 LOG = logging.getLogger(__name__)
@@ -24,18 +25,146 @@ class AptInstaller(Installer):
     config_section: str = 'apt-get'
     install_command_path: List[str] = ['/usr/bin']
     supports_repositories: bool = True
+    cache_file_extensions: Optional[List[str]] = ['.deb']
+    supported_distros: Optional[List[str]] = ['debian', 'ubuntu']
+    lists_dir: str = '/var/lib/apt/lists'
+    index_stamp: str = '/var/lib/apt/periodic/update-success-stamp'
+    """str: File touched after each successful package index update"""
+    index_max_age: int = 3600
+    """int: Maximum age in seconds of the package lists before they are updated, 0 always updates the package lists"""
+    index_update: Dict[str, Any] = {}
     _repo_tool_install_failed: bool = False
+    _sources_changed: bool = False
     _updated_index: bool = False
 
+    def _handle_custom_settings(self):
+        """
+        Get the index_max_age setting from the configuration
+        """
+        try:
+            self.index_max_age = int(self.plugin_configuration.get('index_max_age', self.index_max_age))
+        except (TypeError, ValueError):
+            LOG.warning(f'The {self.config_section} index_max_age value is not a number, using {self.index_max_age}')
+
+    @property
+    def report_details(self) -> Dict[str, Any]:
+        """
+        Details about the installation to add to the installdeps report, including the package index update decision
+        """
+        details = super().report_details
+        if self.index_update:
+            details['index_update'] = self.index_update
+        return details
+
+    def index_age(self) -> Optional[float]:
+        """
+        Get the age of the package index
+
+        apt sets the modification time of each package list to the Last-Modified time of the mirror, so the time of the
+        last update is the modification time of the index_stamp file.  If there is no stamp file, the modification
+        time of the lists directory is used, apt-get update moves the new package lists into it.
+
+        Returns
+        -------
+        float or None:
+            Seconds since the package index was updated, or None if there are no package lists
+        """
+        try:
+            entries = list(os.scandir(self.lists_dir))
+        except OSError:
+            return None
+        if not [_ for _ in entries if _.name not in ['lock', 'partial'] and _.is_file()]:
+            return None
+        try:
+            updated = os.stat(self.index_stamp).st_mtime
+        except OSError:
+            updated = os.stat(self.lists_dir).st_mtime
+        return time.time() - updated
+
+    def write_index_stamp(self) -> None:
+        """
+        Record that the package index was updated
+        """
+        try:
+            os.makedirs(os.path.dirname(self.index_stamp), exist_ok=True)
+            with open(self.index_stamp, 'w'):
+                pass
+        except OSError as error:  # pragma: no cover
+            LOG.debug(f'Unable to write the package index stamp {self.index_stamp!r}: {error}')
+
+    def index_update_reason(self) -> str:
+        """
+        Determine if the package index needs to be updated
+
+        Returns
+        -------
+        str:
+            The reason the package index needs to be updated, or an empty string if it is fresh
+        """
+        if self._sources_changed:
+            return 'repositories were added'
+        if self.index_max_age <= 0:
+            return 'index_max_age is 0'
+        age = self.index_age()
+        if age is None:
+            return 'there are no package lists'
+        if age > self.index_max_age:
+            return f'the package lists are {int(age)} seconds old'
+        return ''
+
     def update_index(self):  # pragma: no cover - Function is OS specific
         """
-        Method to update the package index
+        Method to update the package index, if the package lists are older than the index_max_age or repositories
+        were added
         """
         if self._updated_index:
             return
-        subprocess.check_call([self.install_command[0], 'update'], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)  # nosec - All subprocess calls use full path
+        reason = self.index_update_reason()
+        if not reason:
+            LOG.debug(f'Not updating the package index, the package lists are newer than {self.index_max_age} seconds')
+            self.index_update = {'updated': False, 'reason': f'the package lists are newer than {self.index_max_age} seconds'}
+            return
+        LOG.debug(f'Updating the package index because {reason}')
+        for command in self.update_index_commands():
+            subprocess.check_call(command, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)  # nosec - All subprocess calls use full path
+        self.write_index_stamp()
+        self.index_update = {'updated': True, 'reason': reason}
         self._updated_index = True
 
+    def cache_arguments(self) -> List[str]:
+        """
+        Keep the downloaded packages in the download cache directory
+
+        Returns
+        -------
+        list of str:
+            Extra arguments to add
+        """
+        os.makedirs(os.path.join(self.download_cache_dir, 'partial'), exist_ok=True)
+        return ['-o', f'Dir::Cache::Archives={self.download_cache_dir}', '-o', 'APT::Keep-Downloaded-Packages=true']
+
+    def update_index_commands(self) -> List[List[str]]:
+        """
+        Get the apt-get update command
+
+        Returns
+        -------
+        list of list of str:
+            The commands to run
+        """
+        return [[self.install_command[0], 'update']]
+
+    def repo_commands(self, repo_name: str, repo_url: str) -> List[List[str]]:
+        """
+        Get the add-apt-repository command for a repository
+
+        Returns
+        -------
+        list of list of str:
+            The commands to run
+        """
+        return [self.install_repo_command + [repo_url]]
+
     def install_repo_tool(self):  # pragma: no cover - Function is OS specific
         """
         Install the repo install tool
@@ -43,14 +172,15 @@ class AptInstaller(Installer):
         if self.install_repo_command[0].startswith('/') or self._repo_tool_install_failed:
             return
 
-        install_repo_command = shutil.which(self.install_repo_command[0])
+        install_repo_command = resolve_command(self.install_repo_command[0], [], use_system_path=True)
         if install_repo_command:
             self.install_repo_command[0] = install_repo_command
 
         if not os.path.exists(self.install_repo_command[0]):
             LOG.debug(f'Tool to add repos, {self.install_repo_command[0]!r} is missing, trying to install it')
             subprocess.check_call([self.install_command[0], 'install', '-y', 'software-properties-common'], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)  # nosec - All subprocess calls use full path
-            install_repo_command = shutil.which(self.install_repo_command[0])
+            clear_command_cache()
+            install_repo_command = resolve_command(self.install_repo_command[0], [], use_system_path=True)
             if install_repo_command:
                 self.install_repo_command[0] = install_repo_command
             else:
@@ -74,7 +204,8 @@ class AptInstaller(Installer):
         if self.print_output:
             print(f'Enabling {repo_name!r} repo: ', end='', flush=True)
         try:
-            subprocess.check_call(self.install_repo_command + [repo_url], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)  # nosec - All subprocess calls use full path
+            subprocess.check_call(self.repo_commands(repo_name, repo_url)[0], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)  # nosec - All subprocess calls use full path
+            self._sources_changed = True
             if self.print_output:
                 print(colored('Ok', 'green'), flush=True)
         except subprocess.CalledProcessError:
@@ -82,3 +213,26 @@ class AptInstaller(Installer):
                 print(colored('Failed', 'red'), flush=True)
             else:
                 LOG.error(f'Adding {repo_name!r} repo failed')
+
+    def query_installed_packages(self) -> Set[str]:
+        """
+        Query the dpkg database for the installed package names
+
+        Returns
+        -------
+        set of str:
+            The installed package names
+        """
+        dpkg_query_command = shutil.which('dpkg-query')
+        if not dpkg_query_command:  # pragma: no cover
+            return set()
+        try:
+            output = subprocess.run([dpkg_query_command, '-W', '-f', '${db:Status-Abbrev} ${Package}\\n'], stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, check=True).stdout  # nosec - All subprocess calls use full path
+        except (OSError, subprocess.CalledProcessError):  # pragma: no cover
+            return set()
+        installed = set()
+        for line in output.decode(errors='ignore').splitlines():
+            fields = line.split()
+            if len(fields) == 2 and fields[0] == 'ii':
+                installed.add(fields[1])
+        return installed
@@ -2,7 +2,7 @@
 # Licensed under the terms of the Apache 2.0 license.  See the LICENSE file in the project root for terms
 """Install brew dependencies"""
 import logging
-from typing import List
+from typing import List, Optional, Set
 
 from ..installer import Installer
 
@@ -17,3 +17,15 @@ class BrewInstaller(Installer):
     install_command: List[str] = ['brew', 'install']
     config_section: str = 'brew'
     install_command_path: List[str] = ['/usr/local/bin']
+    supported_distros: Optional[List[str]] = ['darwin']
+
+    def query_installed_packages(self) -> Set[str]:
+        """
+        Query homebrew for the installed formula names
+
+        Returns
+        -------
+        set of str:
+            The installed formula names
+        """
+        return self.query_package_names([self.install_command[0], 'list', '--formula', '-1'])
@@ -1,14 +1,53 @@
 # Copyright 2019, Oath Inc.
 # Licensed under the terms of the Apache 2.0 license.  See the LICENSE file in the project root for terms
 """Install pip dependencies"""
+import hashlib
+import json
 import logging
 import os
-from typing import Optional, List
+import platform
+import subprocess  # nosec - All subprocess calls use full path
+from typing import Any, Dict, Optional, List, Set
 
-from ..installer import Installer
+from packaging.requirements import InvalidRequirement, Requirement as PackagingRequirement
+from packaging.utils import canonicalize_name
+
+from ..installer import Configuration, Installer
 
 
 LOG = logging.getLogger(__name__)
+LOCK_FINGERPRINT_PREFIX = '# deps-sha256: '
+LOCK_PYTHON_PREFIX = '# python: '
+
+
+def dependencies_fingerprint(dependencies: List[str]) -> str:
+    """
+    Get the fingerprint of a dependency list that is stored in the lock file
+
+    Parameters
+    ----------
+    dependencies: list of str
+        The dependencies, with the environment markers removed
+
+    Returns
+    -------
+    str:
+        The sha256 hex digest of the sorted dependencies
+    """
+    return hashlib.sha256('\n'.join(sorted(_.strip() for _ in dependencies)).encode()).hexdigest()
+
+
+def lock_environment() -> str:
+    """
+    Get the Python version and platform the lock file hashes are for, wheels differ between them
+
+    Returns
+    -------
+    str:
+        The Python major.minor version, the system and the machine, separated by spaces
+    """
+    python_version = '.'.join(platform.python_version_tuple()[:2])
+    return f'{python_version} {platform.system().lower()} {platform.machine()}'
 
 
 class PipInstaller(Installer):
@@ -30,6 +69,162 @@ class PipInstaller(Installer):
         # Ubuntu/Fedora
         '/usr/bin'
     ]
+    supports_lock_file: bool = True
+    _installed_versions: Optional[Dict[str, str]] = None
+    _lock_header: Optional[Dict[str, str]] = None
+    _used_lock_file: bool = False
+
+    @classmethod
+    def configured_lock_filename(cls, config: Configuration) -> str:
+        """
+        Get the full path of the lock_file setting, the hash pinned requirements file to install from, relative to the
+        pyproject.toml directory.  An empty string if the lock_file setting is not set.
+        """
+        lock_file = config.configuration.get(cls.config_section, {}).get('lock_file', '') or ''
+        if not lock_file:
+            return ''
+        return os.path.join(os.path.dirname(os.path.abspath(config.filename)), lock_file)
+
+    @property
+    def report_details(self) -> Dict[str, Any]:
+        """
+        Details about the installation to add to the installdeps report, including the lock file used
+        """
+        details = super().report_details
+        if self._used_lock_file:
+            details['lock_file'] = self.lock_filename
+        return details
+
+    def lock_matches(self, dependencies: List[str]) -> bool:
+        """
+        Check if the lock file was generated from the dependencies for this Python version and platform
+
+        Parameters
+        ----------
+        dependencies: list of str
+            The dependencies, with the environment markers removed
+
+        Returns
+        -------
+        bool:
+            True if the lock file exists and its fingerprint and environment match
+        """
+        if not self.lock_filename:
+            return False
+        if self._lock_header is None:
+            self._lock_header = {}
+            try:
+                with open(self.lock_filename) as fh:
+                    for line in fh:
+                        for key, prefix in [('fingerprint', LOCK_FINGERPRINT_PREFIX), ('python', LOCK_PYTHON_PREFIX)]:
+                            if line.startswith(prefix):
+                                self._lock_header[key] = line[len(prefix):].strip()
+            except OSError:
+                LOG.debug(f'The pip3 lock file {self.lock_filename!r} does not exist')
+        if not self._lock_header.get('fingerprint', ''):
+            return False
+        if self._lock_header['fingerprint'] != dependencies_fingerprint(dependencies):
+            LOG.warning(f'The pip3 lock file {self.lock_filename!r} does not match the dependencies, run screwdrivercd_install_deps --lock to update it')
+            return False
+        if self._lock_header.get('python', '') != lock_environment():
+            LOG.warning(f'The pip3 lock file {self.lock_filename!r} is for python {self._lock_header.get("python", "unknown")!r} not {lock_environment()!r}, installing without it')
+            return False
+        return True
+
+    def resolve_locked_requirements(self, dependencies: List[str]) -> List[str]:
+        """
+        Resolve the dependencies with the pip resolver, without installing them
+
+        Parameters
+        ----------
+        dependencies: list of str
+            The dependencies, with the environment markers removed
+
+        Returns
+        -------
+        list of str:
+            A hash pinned requirement line for each distribution that would be installed
+
+        Raises
+        ------
+        subprocess.CalledProcessError: The pip resolver failed
+        ValueError: The pip report is not valid, or a distribution to install does not have an archive hash, such as a
+            VCS or directory requirement
+        """
+        command = self.install_command + ['--dry-run', '--ignore-installed', '--quiet', '--disable-pip-version-check', '--report', '-'] + dependencies
+        output = subprocess.run(command, stdout=subprocess.PIPE, check=True).stdout  # nosec - All subprocess calls use full path
+        try:
+            distributions = [(item['metadata']['name'], item['metadata']['version'], item['download_info']) for item in json.loads(output)['install']]
+        except (KeyError, TypeError) as error:
+            raise ValueError(f'The pip install report is missing the install metadata or download_info: {error!r}') from error
+        requirements = []
+        for name, version, download_info in distributions:
+            name = canonicalize_name(name)
+            archive_info = download_info.get('archive_info', {})
+            hashes = archive_info.get('hashes', {})
+            if not hashes and '=' in archive_info.get('hash', ''):
+                algorithm, _, value = archive_info['hash'].partition('=')
+                hashes = {algorithm: value}
+            if 'sha256' not in hashes:
+                raise ValueError(f'The {name} distribution from {download_info.get("url", "")!r} has no sha256 hash and cannot be locked')
+            requirements.append(f'{name}=={version} --hash=sha256:{hashes["sha256"]}')
+        return sorted(requirements)
+
+    def write_lock_file(self) -> str:
+        """
+        Resolve the dependencies for the current environment into the hash pinned lock file
+
+        Returns
+        -------
+        str:
+            The lock filename
+
+        Raises
+        ------
+        subprocess.CalledProcessError: The pip resolver failed
+        ValueError: The lock_file setting is not set or a distribution cannot be locked
+        """
+        if not self.lock_filename:
+            raise ValueError('The [tool.sdv4_installdeps.pip3] lock_file setting is not set')
+        dependencies = self.filter_environment_markers(list(self.plugin_configuration.get('deps', [])))
+        requirements = self.resolve_locked_requirements(dependencies)
+        with open(self.lock_filename, 'w') as fh:
+            fh.write('# Generated by screwdrivercd_install_deps --lock from the [tool.sdv4_installdeps.pip3] deps, do not edit\n')
+            fh.write(f'{LOCK_PYTHON_PREFIX}{lock_environment()}\n')
+            fh.write(f'{LOCK_FINGERPRINT_PREFIX}{dependencies_fingerprint(dependencies)}\n')
+            for requirement in requirements:
+                fh.write(requirement + '\n')
+        self._lock_header = None
+        return self.lock_filename
+
+    def unsatisfied_dependencies(self, dependencies: List[str]) -> List[str]:
+        """
+        Get the dependencies that are not installed, all of the dependencies are returned if they are installed from
+        the lock file, because pip checks the locked versions of all the distributions
+        """
+        if self.lock_matches(dependencies):
+            return dependencies
+        return super().unsatisfied_dependencies(dependencies)
+
+    def install_command_line(self, dependencies: List[str], config_key=None, use_cache: bool = True) -> List[str]:
+        """
+        Get the command that installs the dependencies, from the lock file if it was generated from the dependencies
+        """
+        if not self.lock_matches(dependencies):
+            return super().install_command_line(dependencies, config_key=config_key, use_cache=use_cache)
+        self._used_lock_file = True
+        cache_arguments = self.cache_arguments() if use_cache and self.download_cache_dir else []
+        return self.install_command + cache_arguments + self.install_arguments(config_key=config_key) + ['--no-deps', '--require-hashes', '-r', self.lock_filename]
+
+    @classmethod
+    def command_available(cls) -> bool:
+        """
+        Check if the BASE_PYTHON interpreter or the pip3 command is present on the host
+        """
+        base_python = os.environ.get('BASE_PYTHON', '')
+        if base_python and os.path.exists(base_python):  # pragma: no cover
+            return True
+        return super().command_available()
 
     def find_install_command(self):
         """
@@ -40,3 +235,86 @@ class PipInstaller(Installer):
             self.install_command = [base_python, '-m', 'pip', 'install']
             return
         super().find_install_command()
+
+    @property
+    def wheelhouse(self) -> str:
+        """
+        The directory in the download cache that pip searches for wheels before the package index
+        """
+        return os.path.join(self.download_cache_dir, 'wheelhouse')
+
+    def cache_arguments(self) -> List[str]:
+        """
+        Use the download cache as the pip cache directory, and the wheelhouse in it as a find links directory
+
+        Returns
+        -------
+        list of str:
+            Extra arguments to add
+        """
+        os.makedirs(self.wheelhouse, exist_ok=True)
+        return ['--cache-dir', self.download_cache_dir, '--find-links', self.wheelhouse]
+
+    def record_cache_usage(self, dependencies: List[str], cached: Dict[str, os.stat_result]) -> None:
+        """
+        The pip cache hits and misses are counted from the install command output by _handle_output_line(), because
+        the pip cache file names are hashes
+        """
+
+    def _handle_output_line(self, line: str) -> None:
+        """
+        Count the packages pip used from the cache or downloaded, then handle the line as usual
+        """
+        if self.download_cache_dir:
+            stripped = line.strip()
+            if stripped.startswith('Using cached ') or stripped.startswith(f'Processing {self.wheelhouse}'):
+                self.cache_hits += 1
+            elif stripped.startswith('Downloading '):
+                self.cache_misses += 1
+        super()._handle_output_line(line)
+
+    def query_installed_packages(self) -> Set[str]:
+        """
+        Query pip for the installed distributions
+
+        Returns
+        -------
+        set of str:
+            The canonicalized names of the installed distributions
+        """
+        self._installed_versions = {}
+        command = self.install_command[:-1] + ['list', '--format=json', '--disable-pip-version-check']
+        try:
+            output = subprocess.run(command, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, check=True).stdout  # nosec - All subprocess calls use full path
+            distributions = json.loads(output)
+        except (OSError, subprocess.CalledProcessError, ValueError):  # pragma: no cover
+            LOG.debug(f'Installed package query {" ".join(command)!r} failed')
+            return set()
+        for distribution in distributions:
+            self._installed_versions[canonicalize_name(distribution['name'])] = distribution['version']
+        return set(self._installed_versions)
+
+    def dependency_satisfied(self, dependency: str) -> bool:
+        """
+        Check if an installed distribution satisfies the dependency
+
+        Parameters
+        ----------
+        dependency: str
+            The requirement string, with any environment marker removed
+
+        Returns
+        -------
+        bool:
+            True if the dependency has no extras or url and the installed version matches the version specifier
+        """
+        try:
+            requirement = PackagingRequirement(dependency)
+        except InvalidRequirement:
+            return False
+        if requirement.url or requirement.extras:
+            return False
+        name = canonicalize_name(requirement.name)
+        if name not in self.installed_packages or not self._installed_versions:
+            return False
+        return requirement.specifier.contains(self._installed_versions[name], prereleases=True)
@@ -3,16 +3,18 @@
 """Install yum dependencies"""
 import logging
 import os
+import re
 import shutil
 import subprocess  # nosec - All subprocess calls use full path
-from typing import Dict, Optional, List
+from typing import Dict, Optional, List, Set, Tuple
 
 from termcolor import colored
 
-from ..installer import Installer
+from ..installer import Installer, clear_command_cache, resolve_command
 
 
 LOG = logging.getLogger(__name__)
+YUM_INFO_NAME_RE = re.compile(r'^Name\s*:\s*(\S+)', re.MULTILINE)
 
 
 class YumInstaller(Installer):
@@ -26,8 +28,18 @@ class YumInstaller(Installer):
     use_system_path: bool = False
     supports_repositories: bool = True
     default_repos: Optional[Dict[str, str]] = dict()
+    cache_file_extensions: Optional[List[str]] = ['.rpm']
+    supported_distros: Optional[List[str]] = ['rhel', 'centos', 'fedora']
     _repo_tool_install_failed = False
 
+    def _handle_custom_settings(self):
+        """
+        Limit the number of yum commands run at the same time.  The yum 3 utility holds a lock for each command, so yum
+        commands only run at the same time when yum is dnf.
+        """
+        if not os.path.basename(os.path.realpath(self.install_command[0])).startswith('dnf'):
+            self.max_concurrent_commands = 1
+
     def install_repo_tool(self):  # pragma: no cover - Function is OS specific
         """
         Installer the tool needed to add repositories to the system
@@ -39,88 +51,213 @@ class YumInstaller(Installer):
         if self.install_repo_command[0].startswith('/') or self._repo_tool_install_failed:
             return
 
-        install_command = shutil.which(self.install_repo_command[0])
+        install_command = resolve_command(self.install_repo_command[0], [], use_system_path=True)
         if install_command:
             self.install_repo_command[0] = install_command
 
         if not os.path.exists(self.install_repo_command[0]):
             LOG.debug(f'Tool to add repos, {self.install_repo_command[0]} is missing, trying to install it')
             subprocess.check_call([self.install_command[0], 'install', '-y', 'yum-utils'], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)  # nosec - All subprocess calls use full path
-            install_command = shutil.which(self.install_repo_command[0])
+            clear_command_cache()
+            install_command = resolve_command(self.install_repo_command[0], [], use_system_path=True)
             if install_command:
                 self.install_repo_command[0] = install_command
             else:
                 self._repo_tool_install_failed = True
                 raise FileNotFoundError('Could not find the {self.install_repo_command[0]} utility')
 
+    def repo_batches(self, repos: Dict[str, str]) -> List[Tuple[List[str], List[Tuple[str, str]]]]:
+        """
+        Group the repositories into as few yum-config-manager commands as possible.
+
+        All the repository urls are added with one command first, so the repositories they define can be enabled or
+        disabled.  Consecutive enable: or disable: values are then grouped into one command each, keeping their order.
+
+        Parameters
+        ----------
+        repos: dict
+            The repository urls by repository name, urls starting with enable: or disable: enable or disable an
+            existing repository
+
+        Returns
+        -------
+        list of tuple:
+            The command and the repository name and url pairs it configures
+        """
+        added = [(repo_name, repo_url) for repo_name, repo_url in repos.items() if not repo_url.startswith(('enable:', 'disable:'))]
+        batches: List[Tuple[List[str], List[Tuple[str, str]]]] = []
+        if added:
+            command = [self.install_repo_command[0]]
+            for _, repo_url in added:
+                command += self.install_repo_command[1:] + [repo_url]
+            batches.append((command, added))
+
+        operation = ''
+        for repo_name, repo_url in repos.items():
+            repo_operation, _, repo_id = repo_url.partition(':')
+            if repo_operation not in ['enable', 'disable']:
+                continue
+            if repo_operation != operation:
+                operation = repo_operation
+                batches.append(([self.install_repo_command[0], f'--{operation}', '--save'], []))
+            command, batch = batches[-1]
+            command.insert(-1, repo_id)
+            batch.append((repo_name, repo_url))
+        return batches
+
+    def add_repos_commands(self, repos: Dict[str, str]) -> List[List[str]]:
+        """
+        Get the batched yum-config-manager commands that configure the repositories
+
+        Returns
+        -------
+        list of list of str:
+            The commands to run
+        """
+        return [command for command, _ in self.repo_batches(repos)]
+
+    def add_repos(self):
+        """
+        Add the Yum repos specified in the configuration, with one yum-config-manager command for each operation.
+
+        If a command that configures more than one repository fails, the repositories are configured one at a time to
+        find the ones that failed.
+        """
+        repos = self.filtered_repos()
+        if not repos:
+            return
+
+        try:
+            self.install_repo_tool()
+        except FileNotFoundError:
+            print(colored(f'The yum-config-manager utility is missing and cannot be installed, cannot add the {", ".join(repos)} repositories', 'red'), flush=True)
+            return
+
+        for command, batch in self.repo_batches(repos):
+            if self._run_repo_command(command):
+                results = [(repo_name, repo_url, True) for repo_name, repo_url in batch]
+            elif len(batch) == 1:
+                results = [(batch[0][0], batch[0][1], False)]
+            else:
+                LOG.debug(f'Configuring {len(batch)} repositories with one command failed, configuring them one at a time')
+                results = [(repo_name, repo_url, self._run_repo_command(self.repo_commands(repo_name, repo_url)[0])) for repo_name, repo_url in batch]
+            for repo_name, repo_url, success in results:
+                self._report_repo(repo_name, repo_url, success)
+
     def add_repo(self, repo_name, repo_url):  # pragma: no cover - Function is OS specific
         """
-        Add Yum repos specified in the configuration
+        Add a Yum repo
         """
         try:
             self.install_repo_tool()
         except FileNotFoundError:
             print(colored(f'The yum-config-manager utility is missing and cannot be installed, cannot add the {repo_name} repository', 'red'), flush=True)
             return
+        self._report_repo(repo_name, repo_url, self._run_repo_command(self.repo_commands(repo_name, repo_url)[0]))
 
-        if repo_url.startswith('enable:'):
-            repo_name = repo_url[7:]
-            if self.print_output:
-                print(f'Enabling {repo_name!r} repo: ', end='', flush=True)
-            try:
-                subprocess.check_call([self.install_repo_command[0], '--enable', repo_name, '--save'], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)  # nosec - All subprocess calls use full path
-                if self.print_output:
-                    print(colored('Ok', 'green'), flush=True)
-            except subprocess.CalledProcessError:
-                if self.print_output:
-                    print(colored('Failed', 'red'), flush=True)
-                else:
-                    LOG.error('Enabling repository {repo_name!r} failed')
-            return
+    def _run_repo_command(self, command: List[str]) -> bool:
+        """
+        Run a yum-config-manager command
 
-        if repo_url.startswith('disable:'):
-            repo_name = repo_url[8:]
-            if self.print_output:
-                print(f'Disabling {repo_name!r} repo: ', end='', flush=True)
-            try:
-                subprocess.check_call([self.install_repo_command[0], '--disable', repo_name, '--save'], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)  # nosec - All subprocess calls use full path
-                if self.print_output:
-                    print(colored('Ok', 'green'), flush=True)
-            except subprocess.CalledProcessError:
-                if self.print_output:
-                    print(colored('Failed', 'red'), flush=True)
-                else:
-                    LOG.error('Disabling repository {repo_name!r} failed')
-            return
+        Returns
+        -------
+        bool:
+            True if the command succeeded
+        """
+        try:
+            subprocess.check_call(command, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)  # nosec - All subprocess calls use full path
+        except subprocess.CalledProcessError:
+            return False
+        return True
+
+    def _report_repo(self, repo_name: str, repo_url: str, success: bool) -> None:
+        """
+        Print or log the result of configuring a repository
+        """
+        if repo_url.startswith('enable:'):
+            description = f'Enabling {repo_url[7:]!r} repo'
+        elif repo_url.startswith('disable:'):
+            description = f'Disabling {repo_url[8:]!r} repo'
+        else:
+            description = f'Adding {repo_name!r} with url {repo_url!r} repo'
 
         if self.print_output:
-            print(f'Adding {repo_name!r} with url {repo_url!r} repo: ', end='', flush=True)
+            print(f'{description}: ' + (colored('Ok', 'green') if success else colored('Failed', 'red')), flush=True)
+        elif success:
+            LOG.debug(f'{description}: Ok')
         else:
-            LOG.debug(f'Adding {repo_name!r} with url {repo_url!r} repo')
-        try:
-            subprocess.check_call(self.install_repo_command + [repo_url], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)  # nosec - All subprocess calls use full path
-            if self.print_output:
-                print(colored('Ok', 'green'), flush=True)
-        except subprocess.CalledProcessError:
-            if self.print_output:
-                print(colored('Failed', 'red'), flush=True)
-            else:
-                LOG.error('Adding repository {repo_name!r} failed')
+            LOG.error(f'{description}: Failed')
+
+    def cache_arguments(self) -> List[str]:
+        """
+        Keep the downloaded packages in the download cache directory
+
+        The cache directory holds the repository metadata as well, so like the default yum cache directory it is
+        separated by architecture and release, which yum substitutes, to keep different distributions that share the
+        cache from using each other's metadata.
+
+        Returns
+        -------
+        list of str:
+            Extra arguments to add
+        """
+        return ['--setopt=keepcache=1', f'--setopt=cachedir={self.download_cache_dir}/$basearch/$releasever']
+
+    def repo_commands(self, repo_name: str, repo_url: str) -> List[List[str]]:
+        """
+        Get the yum-config-manager command for a repository, urls starting with enable: or disable: enable or disable
+        an existing repository
 
-    def validate_dependency(self, dependency):  # pragma: no cover - Function is OS specific
+        Returns
+        -------
+        list of list of str:
+            The commands to run
+        """
+        if repo_url.startswith('enable:'):
+            return [[self.install_repo_command[0], '--enable', repo_url[7:], '--save']]
+        if repo_url.startswith('disable:'):
+            return [[self.install_repo_command[0], '--disable', repo_url[8:], '--save']]
+        return [self.install_repo_command + [repo_url]]
+
+    def confirmed_dependencies(self, dependencies: List[str]) -> List[str]:
         """
-        Validate a dependency is valid
+        Query the package metadata for all the dependencies with a single yum info command
+
         Parameters
         ----------
-        dependency: str
-            The package name to validate
+        dependencies: list of str
+            The dependency list to validate
+
         Returns
         -------
-        bool
-            True if valid
+        list of str:
+            The dependencies that are listed in the yum info output
         """
+        if not dependencies:
+            return []
         try:
-            subprocess.check_call([self.install_command[0], 'info', dependency], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)  # nosec - All subprocess calls use full path
-        except subprocess.CalledProcessError:
-            return False
-        return True
+            output = subprocess.run([self.install_command[0], 'info'] + dependencies, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, check=False).stdout  # nosec - All subprocess calls use full path
+        except OSError:  # pragma: no cover
+            return []
+        names = set(YUM_INFO_NAME_RE.findall(output.decode(errors='ignore')))
+        return [_ for _ in dependencies if _ in names]
+
+    def query_installed_packages(self) -> Set[str]:
+        """
+        Query the rpm database for the installed package names
+
+        Returns
+        -------
+        set of str:
+            The installed package names
+        """
+        rpm_command = shutil.which('rpm')
+        if not rpm_command:  # pragma: no cover
+            return set()
+        return self.query_package_names([rpm_command, '-qa', '--queryformat', '%{NAME}\\n'])
+
+    def validation_command(self, dependency: str) -> Optional[List[str]]:
+        """
+        Get the yum info command for a dependency, which fails if the package is not in the enabled repositories
+        """
+        return [self.install_command[0], 'info', dependency]
@@ -0,0 +1,122 @@
+# Copyright 2019, Oath Inc.
+# Licensed under the terms of the Apache 2.0 license.  See the LICENSE file in the project root for terms
+"""
+Dependency matrix evaluation.
+
+Evaluates the environment markers of the configured dependencies against several environment snapshots at once, to
+show which packages each target environment gets without running the installers in each environment.
+"""
+import os
+from typing import Any, Dict, List, Sequence, Tuple
+
+from .installer import Installer
+from .requirement import EnvironmentLookup, marker_cache
+
+
+def load_environments(filenames: Sequence[str]) -> Dict[str, Dict[str, str]]:
+    """
+    Read environment snapshot files
+
+    Parameters
+    ----------
+    filenames: list of str
+        The JSON environment snapshot filenames
+
+    Returns
+    -------
+    dict:
+        The environment marker values by environment name, the name is the filename without the directory and .json
+        extension, or the full filename if more than one file has the same name
+
+    Raises
+    ------
+    OSError: A snapshot file could not be read
+    ValueError: A snapshot file does not contain a JSON object of string values
+    """
+    names = [os.path.splitext(os.path.basename(_))[0] for _ in filenames]
+    environments = {}
+    for name, filename in zip(names, filenames):
+        if names.count(name) > 1:
+            name = filename
+        environments[name] = EnvironmentLookup.read_snapshot(filename)
+    return environments
+
+
+def dependency_matrix(installers: Sequence[Tuple[str, Installer]], environments: Dict[str, Dict[str, str]]) -> List[Dict[str, Any]]:
+    """
+    Evaluate the dependencies of the installers against each environment
+
+    Each distinct marker is parsed once and the results are shared through the marker cache, so dependencies with the
+    same marker are only evaluated once per environment.
+
+    Parameters
+    ----------
+    installers: list of tuple
+        Installer name and installer instance pairs, in install order
+
+    environments: dict
+        The environment marker values by environment name
+
+    Returns
+    -------
+    list of dict:
+        One entry per dependency with the installer name, the dependency, the marker and whether the dependency is
+        installed in each environment
+
+    Raises
+    ------
+    ValueError: An environment does not have a value for a variable used in a marker
+    """
+    rows = []
+    for installer_name, installer_instance in installers:
+        for config_key in installer_instance.deps_config_keys:
+            for dependency in installer_instance.plugin_configuration.get(config_key, []):
+                requirement, _, marker = dependency.partition(';')
+                marker = marker.strip()
+                matches = {}
+                for environment_name, environment in environments.items():
+                    if not marker:
+                        matches[environment_name] = True
+                        continue
+                    try:
+                        matches[environment_name] = marker_cache.evaluate(marker, environment)
+                    except KeyError as error:
+                        raise ValueError(f'The {environment_name!r} environment has no value for {error} used by the {dependency!r} dependency') from None
+                rows.append({
+                    'installer': installer_name,
+                    'config_key': config_key,
+                    'dependency': requirement.strip(),
+                    'marker': marker,
+                    'environments': matches,
+                })
+    return rows
+
+
+def render_matrix(rows: List[Dict[str, Any]], environment_names: Sequence[str]) -> str:
+    """
+    Format the dependency matrix as a text table with one row per dependency and one column per environment
+
+    Parameters
+    ----------
+    rows: list of dict
+        The dependency matrix from dependency_matrix()
+
+    environment_names: list of str
+        The environment names, in column order
+
+    Returns
+    -------
+    str:
+        The table, an x marks the environments that install the dependency
+    """
+    header = ['installer', 'package'] + list(environment_names)
+    table = [header]
+    for row in rows:
+        table.append([row['installer'], row['dependency']] + ['x' if row['environments'][_] else '-' for _ in environment_names])
+
+    widths = [max(len(line[column]) for line in table) for column in range(len(header))]
+    lines = []
+    for line in table:
+        lines.append('  '.join(value.ljust(width) for value, width in zip(line, widths)).rstrip())
+    lines.insert(1, '  '.join('-' * _ for _ in widths))
+    return os.linesep.join(lines)
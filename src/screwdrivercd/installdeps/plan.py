@@ -0,0 +1,163 @@
+# Copyright 2019, Oath Inc.
+# Licensed under the terms of the Apache 2.0 license.  See the LICENSE file in the project root for terms
+"""
+Installation plan export.
+
+An installation plan is the ordered list of commands the installers would run for an environment.  The plan can be
+written as a shell script or a Dockerfile RUN instruction, so the dependencies can be installed when baking an image
+without running the installers on the build host.
+"""
+import json
+import logging
+import os
+import shlex
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from ..utility import create_artifact_directory
+from ..version import __version__
+from .installer import Installer
+
+
+LOG = logging.getLogger(__name__)
+PLAN_FORMATS = {
+    'shell': 'installdeps_plan.sh',
+    'dockerfile': 'installdeps_plan.Dockerfile',
+}
+"""Plan output formats and the filename each format is written to"""
+
+
+def installation_plan(installers: Sequence[Tuple[str, Installer]], environment: Optional[Dict[str, str]] = None) -> Dict[str, Any]:
+    """
+    Build the installation plan for a list of installers
+
+    Parameters
+    ----------
+    installers: list of tuple
+        Installer name and installer instance pairs, in install order
+
+    environment: dict, optional
+        The environment marker values to plan for, default is the current environment.  Installers that do not
+        support the environment are left out of the plan.
+
+    Returns
+    -------
+    dict:
+        The plan, with the environment the plan is for and the plan of each installer that has dependencies
+    """
+    installer_plans = []
+    for installer_name, installer_instance in installers:
+        if environment is not None and not installer_instance.supports_environment(environment):
+            LOG.debug(f'The {installer_name} installer does not support the {environment.get("distro_id", "")!r} environment')
+            continue
+        installer_plan = installer_instance.plan(environment)
+        if not installer_plan['commands']:
+            continue
+        installer_plan['installer'] = installer_name
+        installer_plans.append(installer_plan)
+    return {
+        'version': __version__,
+        'environment': dict(environment) if environment is not None else None,
+        'installers': installer_plans,
+    }
+
+
+def plan_commands(plan: Dict[str, Any]) -> List[str]:
+    """
+    Get all of the commands in a plan as shell quoted command lines
+
+    Parameters
+    ----------
+    plan: dict
+        The installation plan
+
+    Returns
+    -------
+    list of str:
+        The command lines in the order they run
+    """
+    return [' '.join(shlex.quote(_) for _ in command) for installer_plan in plan['installers'] for command in installer_plan['commands']]
+
+
+def render_shell(plan: Dict[str, Any]) -> str:
+    """
+    Render a plan as a shell script
+
+    Parameters
+    ----------
+    plan: dict
+        The installation plan
+
+    Returns
+    -------
+    str:
+        The shell script
+    """
+    lines = [
+        '#!/bin/sh',
+        f'# Generated by screwdrivercd {plan["version"]} installdeps',
+        'set -e',
+    ]
+    for installer_plan in plan['installers']:
+        lines.append('')
+        lines.append(f'# {installer_plan["installer"]}')
+        for command in installer_plan['commands']:
+            lines.append(' '.join(shlex.quote(_) for _ in command))
+    return os.linesep.join(lines) + os.linesep
+
+
+def render_dockerfile(plan: Dict[str, Any]) -> str:
+    """
+    Render a plan as a Dockerfile RUN instruction, all of the commands run in a single image layer
+
+    Parameters
+    ----------
+    plan: dict
+        The installation plan
+
+    Returns
+    -------
+    str:
+        The Dockerfile RUN instruction, or a comment if the plan has no commands
+    """
+    commands = plan_commands(plan)
+    header = f'# Generated by screwdrivercd {plan["version"]} installdeps'
+    if not commands:
+        return header + os.linesep + '# No dependencies to install' + os.linesep
+    return header + os.linesep + 'RUN ' + f' && \\{os.linesep}    '.join(commands) + os.linesep
+
+
+def write_plan(plan: Dict[str, Any], plan_format: str = 'shell', output_dir: str = '') -> Tuple[str, str]:
+    """
+    Write the plan as JSON and in the requested format
+
+    Parameters
+    ----------
+    plan: dict
+        The installation plan
+
+    plan_format: str, optional
+        The format to render the plan in, shell or dockerfile
+
+    output_dir: str, optional
+        The directory to write the plan to, default is reports/installdeps in the artifacts directory
+
+    Returns
+    -------
+    tuple of str:
+        The JSON plan filename and the rendered plan filename
+    """
+    if not output_dir:
+        output_dir = os.path.join(os.environ.get('SD_ARTIFACTS_DIR', ''), 'reports/installdeps')
+    create_artifact_directory(output_dir)
+
+    json_filename = os.path.join(output_dir, 'installdeps_plan.json')
+    with open(json_filename, 'w') as fh:
+        json.dump(plan, fh, indent=4)
+
+    rendered_filename = os.path.join(output_dir, PLAN_FORMATS[plan_format])
+    renderer = render_dockerfile if plan_format == 'dockerfile' else render_shell
+    with open(rendered_filename, 'w') as fh:
+        fh.write(renderer(plan))
+    if plan_format == 'shell':
+        os.chmod(rendered_filename, 0o755)  # nosec - The plan is meant to be executed
+    return json_filename, rendered_filename
@@ -3,16 +3,20 @@
 """
 Requirements parsing functions
 """
+import json
 import logging
 import os
 import platform
+import re
 import sys
-from typing import Dict
+import threading
+from collections.abc import Mapping
+from typing import Any, Dict, Iterator, Optional, Tuple
 
 import distro
 import parsley
 
-from packaging.version import Version, parse
+from packaging.version import InvalidVersion, Version
 
 logger = logging.getLogger(__name__)
 
@@ -126,18 +130,144 @@ GRAMMAR: str = """
     hexdig        = digit | 'a' | 'A' | 'b' | 'B' | 'c' | 'C' | 'd' | 'D' | 'e' | 'E' | 'f' | 'F'
 """
 
+PLAIN_NAME_RE = re.compile(r'^[ \t]*([A-Za-z0-9](?:[A-Za-z0-9._-]*[A-Za-z0-9])?)[ \t]*$')
+"""Regular expression that matches a requirement that is only a package name, with no extras, versions, url or markers"""
 
-class Requirement():
+_grammar: Optional[Any] = None
+_grammar_lock = threading.Lock()
+
+
+class MarkerVariable():
     """
-    Requirement parser
+    An environment marker variable in a parsed marker.
+
+    Variables are resolved when the marker is evaluated so a parsed marker can be evaluated against any environment.
+    """
+    __slots__ = ['name']
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def __repr__(self):
+        return f'MarkerVariable({self.name!r})'
+
+    def __eq__(self, other):
+        return isinstance(other, MarkerVariable) and other.name == self.name
+
+    def __hash__(self):
+        return hash(self.name)
+
+
+def requirement_grammar():
+    """
+    Get the compiled PEP 508 grammar.
+
+    The grammar is expensive to compile so it is compiled on first use and shared by all Requirement instances.
+
+    Returns
+    -------
+    parsley grammar wrapper class
+    """
+    global _grammar  # pylint: disable=global-statement
+    if _grammar is None:
+        with _grammar_lock:
+            if _grammar is None:
+                _grammar = parsley.makeGrammar(GRAMMAR, {"lookup": MarkerVariable})
+    return _grammar
+
+
+def evaluate_marker(operation, val1, val2, environment: Mapping[str, str]):
+    """
+    Evaluate a parsed environment marker expression
+
+    Parameters
+    ----------
+    operation: str
+        The marker operation
+
+    val1, val2:
+        The operands, which can be strings, marker variables or nested marker expressions
+
+    environment: mapping
+        The environment marker variable values to evaluate against
+
+    Returns
+    -------
+    The result of the operation
+    """
+    if isinstance(val1, tuple):
+        operation1, left1, right1 = val1
+        val1 = evaluate_marker(operation1, left1, right1, environment)
+    if isinstance(val2, tuple):
+        operation2, left2, right2 = val2
+        val2 = evaluate_marker(operation2, left2, right2, environment)
+
+    if isinstance(val1, MarkerVariable):
+        val1 = environment[val1.name]
+    if isinstance(val2, MarkerVariable):
+        val2 = environment[val2.name]
+
+    if isinstance(val1, str) and isinstance(val2, str):
+        # Values are compared as versions if both are valid versions, otherwise as strings, as PEP 508 specifies
+        try:
+            val1, val2 = Version(val1), Version(val2)
+        except InvalidVersion:
+            pass
+
+    result = None
+    if operation == '>':
+        result = val1 > val2
+    elif operation == '<':
+        result = val1 < val2
+    elif operation == '>=':
+        result = val1 >= val2
+    elif operation == '<=':
+        result = val1 <= val2
+    elif operation == '==':
+        result = val1 == val2
+    elif operation in ['!', '!=']:
+        result = val1 != val2
+    elif operation == 'and':
+        result = val1 and val2
+    elif operation == 'or':
+        result = val1 or val2
+    else:
+        logger.error(f'Invalid operation {operation}')
+    return result
+
+
+ENVIRONMENT_SNAPSHOT_VARIABLE = 'INSTALLDEPS_ENVIRONMENT_SNAPSHOT'
+"""Environment variable with the filename of a JSON environment snapshot to use instead of probing the host"""
+
+
+def _implementation_version() -> str:
+    """
+    Format the interpreter implementation version the way PEP 508 defines it
+    """
+    info = sys.implementation.version
+    version = f'{info.major}.{info.minor}.{info.micro}'
+    if info.releaselevel != 'final':
+        version += info.releaselevel[0] + str(info.serial)
+    return version
+
+
+def probe_environment() -> Dict[str, str]:
+    """
+    Probe the host for the values of all the environment marker variables
+
+    Returns
+    -------
+    dict:
+        Environment marker variable names and values
     """
-    _parser = None
-    _lookup: Dict[str, str] = dict(
+    return dict(
         distro_codename=distro.codename(),
         distro_id=distro.id(),
         distro_like=distro.like(),
         distro_name=distro.name(),
         distro_version=distro.version(),
+        implementation_name=sys.implementation.name,
+        implementation_version=_implementation_version(),
         os_name=os.name,
         platform_machine=platform.machine(),
         platform_python_implementation=platform.python_implementation(),
@@ -145,13 +275,145 @@ class Requirement():
         platform_system=platform.system(),
         platform_version=platform.version(),
         platform_full_version=platform.python_version(),
-        python_version=platform.python_version()[:3],
+        python_full_version=platform.python_version(),
+        python_version='.'.join(platform.python_version_tuple()[:2]),
         sys_platform=sys.platform
     )
 
+
+class EnvironmentLookup(Mapping):
+    """
+    Lookup table of environment marker variable values.
+
+    The host is not probed until a value is first needed.  If the INSTALLDEPS_ENVIRONMENT_SNAPSHOT environment
+    variable names an existing JSON snapshot file the values are loaded from it instead, if it names a file that does
+    not exist the probed values are saved to it.
+    """
+    def __init__(self, table: Optional[Dict[str, str]] = None):
+        self._lock = threading.Lock()
+        self._table: Optional[Dict[str, str]] = dict(table) if table is not None else None
+
+    @property
+    def table(self) -> Dict[str, str]:
+        """
+        The environment marker variable values, populating them on first use
+        """
+        if self._table is None:
+            with self._lock:
+                if self._table is None:
+                    self._table = self._initial_table()
+        return self._table
+
+    def _initial_table(self) -> Dict[str, str]:
+        snapshot_filename = os.environ.get(ENVIRONMENT_SNAPSHOT_VARIABLE, '')
+        if snapshot_filename and os.path.exists(snapshot_filename):
+            logger.debug(f'Loading the environment marker values from {snapshot_filename!r}')
+            return self.read_snapshot(snapshot_filename)
+
+        table = probe_environment()
+        if snapshot_filename:
+            logger.debug(f'Saving the environment marker values to {snapshot_filename!r}')
+            self.write_snapshot(snapshot_filename, table)
+        return table
+
+    def __getitem__(self, key: str) -> str:
+        return self.table[key]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.table)
+
+    def __len__(self) -> int:
+        return len(self.table)
+
+    def load(self, filename: str) -> None:
+        """
+        Replace the values with the values from a JSON snapshot file
+
+        Parameters
+        ----------
+        filename: str
+            The snapshot filename
+        """
+        table = self.read_snapshot(filename)
+        with self._lock:
+            self._table = table
+
+    def save(self, filename: str) -> None:
+        """
+        Save the values to a JSON snapshot file
+
+        Parameters
+        ----------
+        filename: str
+            The snapshot filename
+        """
+        self.write_snapshot(filename, self.table)
+
+    def reset(self) -> None:
+        """
+        Discard the values so they are populated again on next use
+        """
+        with self._lock:
+            self._table = None
+
+    @staticmethod
+    def read_snapshot(filename: str) -> Dict[str, str]:
+        """
+        Read environment marker values from a JSON snapshot file
+
+        Parameters
+        ----------
+        filename: str
+            The snapshot filename
+
+        Returns
+        -------
+        dict:
+            Environment marker variable names and values
+
+        Raises
+        ------
+        ValueError: The snapshot file does not contain a JSON object of string values
+        """
+        with open(filename) as fh:
+            table = json.load(fh)
+        if not isinstance(table, dict) or not all(isinstance(_, str) for _ in table.values()):
+            raise ValueError(f'The environment snapshot {filename!r} is not a JSON object of string values')
+        return table
+
+    @staticmethod
+    def write_snapshot(filename: str, table: Dict[str, str]) -> None:
+        """
+        Write environment marker values to a JSON snapshot file
+
+        Parameters
+        ----------
+        filename: str
+            The snapshot filename
+
+        table: dict
+            Environment marker variable names and values
+        """
+        snapshot_dir = os.path.dirname(filename)
+        if snapshot_dir:
+            os.makedirs(snapshot_dir, exist_ok=True)
+        with open(filename, 'w') as fh:
+            json.dump(table, fh, indent=4, sort_keys=True)
+
+
+class Requirement():
+    """
+    Requirement parser
+    """
+    _lookup: EnvironmentLookup = EnvironmentLookup()
+
     def __init__(self, s):
-        self._parser = parsley.makeGrammar(GRAMMAR, {"lookup": self._lookup.__getitem__})
-        self._parsed_requirement = self._parser(s).specification()
+        plain_name = PLAIN_NAME_RE.match(s)
+        if plain_name:
+            # Plain package names are the most common requirement, so don't run the full grammar for them
+            self._parsed_requirement = (plain_name.group(1), [], [], None)
+            return
+        self._parsed_requirement = requirement_grammar()(s).specification()
 
     @property
     def name(self):
@@ -213,7 +475,7 @@ class Requirement():
         """
         for element_num in range(len(env_evals)):  # pylint: disable=consider-using-enumerate
             entry = env_evals[element_num]
-            if isinstance(entry, str):
+            if not isinstance(entry, tuple):
                 continue
             operation, val1, val2 = entry
             env_evals[element_num] = self.evaluate(operation, val1, val2)
@@ -221,33 +483,90 @@ class Requirement():
 
     def evaluate(self, operation, val1, val2):
         """Evaluate"""
-        if isinstance(val1, tuple):
-            val1 = self.evaluate(*val1)
-        if isinstance(val2, tuple):
-            val2 = self.evaluate(*val2)
-
-        if isinstance(val1, str):
-            val1 = parse(val1)
-        if isinstance(val2, str):
-            val2 = parse(val2)
-
-        result = None
-        if operation == '>':
-            result = val1 > val2
-        elif operation == '<':
-            result = val1 < val2
-        elif operation == '>=':
-            result = val1 >= val2
-        elif operation == '<=':
-            result = val1 <= val2
-        elif operation == '==':
-            result = val1 == val2
-        elif operation in ['!', '!=']:
-            result = val1 != val2
-        elif operation == 'and':
-            result = val1 and val2
-        elif operation == 'or':
-            result = val1 or val2
-        else:
-            logger.error(f'Invalid operation {operation}')
+        return evaluate_marker(operation, val1, val2, self._lookup)
+
+
+class MarkerCache():
+    """
+    Cache of parsed and evaluated environment markers.
+
+    Each distinct marker is parsed once, and evaluated once for each environment it is evaluated against.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._parsed: Dict[str, Any] = {}
+        self._results: Dict[Tuple[str, Tuple[Tuple[str, Any], ...]], bool] = {}
+        self.hits: int = 0
+        self.misses: int = 0
+
+    def clear(self):
+        """
+        Remove all cached markers and reset the counters
+        """
+        with self._lock:
+            self._parsed = {}
+            self._results = {}
+            self.hits = 0
+            self.misses = 0
+
+    def parse(self, marker: str):
+        """
+        Get the parsed form of an environment marker
+
+        Parameters
+        ----------
+        marker: str
+            The marker text, without the leading semicolon
+
+        Returns
+        -------
+        tuple:
+            The parsed marker expression
+        """
+        marker = marker.strip()
+        parsed = self._parsed.get(marker, None)
+        if parsed is None:
+            parsed = requirement_grammar()(marker).marker()
+            with self._lock:
+                self._parsed[marker] = parsed
+        return parsed
+
+    def evaluate(self, marker: str, environment: Optional[Mapping[str, str]] = None) -> bool:
+        """
+        Determine if an environment marker matches an environment
+
+        Parameters
+        ----------
+        marker: str
+            The marker text, without the leading semicolon
+
+        environment: mapping, optional
+            The environment marker variable values to evaluate against, default is the Requirement._lookup table
+
+        Returns
+        -------
+        bool:
+            True if the environment matches the marker
+        """
+        if environment is None:
+            environment = Requirement._lookup
+        key = (marker.strip(), tuple(sorted(environment.items())))
+        result = self._results.get(key, None)
+        if result is not None:
+            with self._lock:
+                self.hits += 1
+            return result
+
+        operation, val1, val2 = self.parse(marker)
+        result = evaluate_marker(operation, val1, val2, environment) is not False
+        with self._lock:
+            self.misses += 1
+            self._results[key] = result
         return result
+
+
+environment_lookup = Requirement._lookup
+"""Environment marker values for the host"""
+
+marker_cache = MarkerCache()
+"""Process wide environment marker cache"""
@@ -0,0 +1,158 @@
+# Copyright 2019, Oath Inc.
+# Licensed under the terms of the Apache 2.0 license.  See the LICENSE file in the project root for terms
+"""
+Installer scheduling.
+
+Installers run one after another in the configured install order, except installers that are listed together in the
+`parallel_groups` setting, which run at the same time.
+"""
+import io
+import logging
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+
+LOG = logging.getLogger(__name__)
+
+
+class ThreadOutput():
+    """
+    sys.stdout replacement that buffers the output written by capturing threads and passes all other output through
+    to the original stream.
+    """
+    def __init__(self, stream):
+        self.stream = stream
+        self._buffers: Dict[int, io.StringIO] = {}
+
+    def __getattr__(self, name):
+        return getattr(self.stream, name)
+
+    def write(self, text: str) -> int:
+        """
+        Write the text to the buffer of the current thread, or the original stream if the thread is not capturing
+        """
+        buffer = self._buffers.get(threading.get_ident(), None)
+        if buffer is None:
+            return self.stream.write(text)
+        return buffer.write(text)
+
+    def flush(self) -> None:
+        """
+        Flush the original stream if the current thread is not capturing
+        """
+        if threading.get_ident() not in self._buffers:
+            self.stream.flush()
+
+    def run_captured(self, function: Callable[[], Any]) -> Tuple[str, Any, Optional[BaseException]]:
+        """
+        Run a function capturing everything it prints
+
+        Parameters
+        ----------
+        function: callable
+            The function to run
+
+        Returns
+        -------
+        tuple:
+            The captured output, the function return value and the exception raised by the function or None
+        """
+        buffer = io.StringIO()
+        self._buffers[threading.get_ident()] = buffer
+        result = None
+        error: Optional[BaseException] = None
+        try:
+            result = function()
+        except BaseException as exception:  # pylint: disable=broad-except
+            error = exception
+        finally:
+            del self._buffers[threading.get_ident()]
+        return buffer.getvalue(), result, error
+
+
+def installer_stages(installer_names: Sequence[str], parallel_groups: Optional[Sequence[Sequence[str]]] = None) -> List[List[str]]:
+    """
+    Split the installers into stages that run one after another, the installers in each stage run at the same time
+
+    Parameters
+    ----------
+    installer_names: list of str
+        The installer names in install order
+
+    parallel_groups: list of list of str, optional
+        Groups of installer names that can run at the same time.  A group runs at the position of its first
+        installer in the install order.
+
+    Returns
+    -------
+    list of list of str:
+        The stages in the order they run
+    """
+    group_of: Dict[str, int] = {}
+    for group_number, group in enumerate(parallel_groups or []):
+        for installer_name in group:
+            if installer_name in group_of:
+                LOG.warning(f'Installer {installer_name!r} is in more than one parallel group, using the first one')
+                continue
+            group_of[installer_name] = group_number
+
+    stages: List[List[str]] = []
+    scheduled_groups = set()
+    for installer_name in installer_names:
+        if installer_name not in group_of:
+            stages.append([installer_name])
+            continue
+        stage_group = group_of[installer_name]
+        if stage_group in scheduled_groups:
+            continue
+        scheduled_groups.add(stage_group)
+        stages.append([_ for _ in installer_names if group_of.get(_, None) == stage_group])
+    return stages
+
+
+def run_concurrently(tasks: Sequence[Tuple[str, Callable[[], Any]]]) -> Dict[str, Any]:
+    """
+    Run functions at the same time, printing the output of each function after it completes in the order given
+
+    Parameters
+    ----------
+    tasks: list of tuple
+        Name and function pairs to run
+
+    Returns
+    -------
+    dict:
+        The function return values by name
+
+    Raises
+    ------
+    BaseException:
+        The first exception raised by a function, after the output of all of the functions is printed
+    """
+    if len(tasks) == 1:
+        name, function = tasks[0]
+        return {name: function()}
+
+    original_stdout = sys.stdout
+    output = ThreadOutput(original_stdout)
+    sys.stdout = output
+    results: Dict[str, Any] = {}
+    first_error: Optional[BaseException] = None
+    try:
+        with ThreadPoolExecutor(max_workers=len(tasks)) as executor:
+            futures = [(name, executor.submit(output.run_captured, function)) for name, function in tasks]
+            for name, future in futures:
+                captured, result, error = future.result()
+                original_stdout.write(captured)
+                original_stdout.flush()
+                results[name] = result
+                if error and not first_error:
+                    first_error = error
+    finally:
+        sys.stdout = original_stdout
+
+    if first_error:
+        raise first_error
+    return results
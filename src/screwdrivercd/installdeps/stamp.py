@@ -0,0 +1,150 @@
+# Copyright 2019, Oath Inc.
+# Licensed under the terms of the Apache 2.0 license.  See the LICENSE file in the project root for terms
+"""
+Installation stamp file handling.
+
+The stamp file records a fingerprint of everything that determines what the installers do, so a repeated run with
+the same fingerprint can skip installing the dependencies again.
+"""
+import hashlib
+import json
+import logging
+import os
+from collections.abc import Mapping
+from typing import Any, Dict, List, Optional
+
+from ..utility.environment import env_bool
+from ..version import __version__
+from .cache import cache_directory
+from .requirement import environment_lookup
+
+
+LOG = logging.getLogger(__name__)
+STAMP_FILENAME = 'installdeps_stamp.json'
+
+
+def stamp_filename() -> str:
+    """
+    Get the stamp filename, the directory can be set with the INSTALLDEPS_STAMP_DIR environment variable
+
+    Returns
+    -------
+    str:
+        The full path to the stamp file
+    """
+    stamp_dir = os.environ.get('INSTALLDEPS_STAMP_DIR', '')
+    if not stamp_dir:
+        stamp_dir = os.path.join(os.path.expanduser('~'), '.cache', 'screwdrivercd')
+    return os.path.join(stamp_dir, STAMP_FILENAME)
+
+
+def _json_default(value):
+    """
+    Convert the read-only configuration mappings to dictionaries when serializing to JSON
+    """
+    if isinstance(value, Mapping):
+        return dict(value)
+    return str(value)
+
+
+def _file_digest(filename: str) -> Optional[str]:
+    """
+    Get the sha256 hex digest of the contents of a file, or None if it can't be read
+    """
+    try:
+        with open(filename, 'rb') as fh:
+            return hashlib.sha256(fh.read()).hexdigest()
+    except OSError:
+        return None
+
+
+def configuration_fingerprint(configuration: Dict[str, Any], install_commands: List[List[str]], lock_files: Optional[List[str]] = None) -> str:
+    """
+    Generate a fingerprint of the installation
+
+    Parameters
+    ----------
+    configuration: dict
+        The resolved installdeps configuration
+
+    install_commands: list of list of str
+        The install commands of the supported installers
+
+    lock_files: list of str, optional
+        The lock files used by the installers, their contents are part of the fingerprint
+
+    Returns
+    -------
+    str:
+        A sha256 hex digest of the configuration, environment marker values, installer binaries, lock file contents,
+        the settings that change how the dependencies are installed and the version of this package
+    """
+    binaries: Dict[str, Optional[List[int]]] = {}
+    for command in install_commands:
+        try:
+            binary_stat = os.stat(command[0])
+            binaries[command[0]] = [binary_stat.st_size, binary_stat.st_mtime_ns]
+        except OSError:
+            binaries[command[0]] = None
+
+    fingerprint_data = {
+        'binaries': binaries,
+        'configuration': configuration,
+        'environment': dict(environment_lookup),
+        'lock_files': {filename: _file_digest(filename) for filename in lock_files or [] if filename},
+        'settings': {
+            'cache_dir': cache_directory(),
+            'skip_installed': env_bool('INSTALLDEPS_SKIP_INSTALLED'),
+        },
+        'version': __version__,
+    }
+    return hashlib.sha256(json.dumps(fingerprint_data, sort_keys=True, default=_json_default).encode()).hexdigest()
+
+
+def read_stamp(filename: str = '') -> Dict[str, Any]:
+    """
+    Read the stamp file
+
+    Parameters
+    ----------
+    filename: str, optional
+        The stamp filename, default is the value from stamp_filename()
+
+    Returns
+    -------
+    dict:
+        The stamp contents, an empty dictionary if there is no valid stamp file
+    """
+    filename = filename or stamp_filename()
+    try:
+        with open(filename) as fh:
+            stamp = json.load(fh)
+    except (OSError, ValueError):
+        return {}
+    if not isinstance(stamp, dict):
+        return {}
+    return stamp
+
+
+def write_stamp(fingerprint: str, report: Dict[str, Any], filename: str = '') -> None:
+    """
+    Write the stamp file, a stamp file that can't be written is logged and otherwise ignored
+
+    Parameters
+    ----------
+    fingerprint: str
+        The installation fingerprint
+
+    report: dict
+        The installdeps report for the installation
+
+    filename: str, optional
+        The stamp filename, default is the value from stamp_filename()
+    """
+    filename = filename or stamp_filename()
+    try:
+        os.makedirs(os.path.dirname(filename), exist_ok=True)
+        with open(filename, 'w') as fh:
+            json.dump({'fingerprint': fingerprint, 'report': report}, fh)
+    except OSError as error:  # pragma: no cover
+        LOG.debug(f'Unable to write the stamp file {filename!r}: {error}')
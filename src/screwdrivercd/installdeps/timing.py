@@ -0,0 +1,100 @@
+# Copyright 2019, Oath Inc.
+# Licensed under the terms of the Apache 2.0 license.  See the LICENSE file in the project root for terms
+"""
+Installation phase timing instrumentation
+"""
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, Union
+
+
+_subprocess_counts = threading.local()
+_hook_lock = threading.Lock()
+_hook_installed = False
+
+
+def _audit_hook(event: str, args) -> None:  # pylint: disable=unused-argument
+    """
+    Count the subprocesses started by each thread while it is timing a phase
+    """
+    if event == 'subprocess.Popen' and getattr(_subprocess_counts, 'active', 0) > 0:
+        _subprocess_counts.value = getattr(_subprocess_counts, 'value', 0) + 1
+
+
+def _install_audit_hook() -> None:
+    """
+    Add the audit hook the first time a phase is timed.  Audit hooks can't be removed, so importing this module does
+    not add it and it ignores the threads that are not timing a phase.
+    """
+    global _hook_installed  # pylint: disable=global-statement
+    if _hook_installed:
+        return
+    with _hook_lock:
+        if not _hook_installed:
+            sys.addaudithook(_audit_hook)
+            _hook_installed = True
+
+
+def subprocess_count() -> int:
+    """
+    Get the number of subprocesses the current thread has started while timing phases
+
+    Returns
+    -------
+    int:
+        Number of subprocesses
+    """
+    return getattr(_subprocess_counts, 'value', 0)
+
+
+class PhaseTimer():
+    """
+    Record the wall clock time and the number of subprocesses started for each phase of an operation.
+
+    A phase that runs more than once accumulates the time and subprocess count of every run.
+    """
+    def __init__(self):
+        self.phases: Dict[str, Dict[str, Union[float, int]]] = {}
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        """
+        Context manager that times the code it wraps as the named phase
+
+        Parameters
+        ----------
+        name: str
+            The phase name
+        """
+        _install_audit_hook()
+        start_time = time.monotonic()
+        start_count = subprocess_count()
+        _subprocess_counts.active = getattr(_subprocess_counts, 'active', 0) + 1
+        try:
+            yield
+        finally:
+            _subprocess_counts.active -= 1
+            entry = self.phases.setdefault(name, {'seconds': 0.0, 'subprocesses': 0})
+            entry['seconds'] = round(entry['seconds'] + time.monotonic() - start_time, 6)
+            entry['subprocesses'] += subprocess_count() - start_count
+
+    def summary(self, prefix: str = '') -> str:
+        """
+        Format the phases as lines of text
+
+        Parameters
+        ----------
+        prefix: str, optional
+            Text to start each line with
+
+        Returns
+        -------
+        str:
+            One line per phase
+        """
+        lines = []
+        for name, entry in self.phases.items():
+            lines.append(f'{prefix}{name:<24} {entry["seconds"]:10.3f}s {entry["subprocesses"]:4d} subprocesses')
+        return '\n'.join(lines)
@@ -183,7 +183,7 @@ def install_ssh_agent():  # pragma: no cover
     with InTemporaryDirectory():
         with open('pyproject.toml', 'w') as fh:
             fh.write(ssh_agent_deploy_conf)
-        installdeps_main()
+        installdeps_main([])
 
 
 def setup_ssh_main() -> int:  # pragma: no cover
@@ -3,9 +3,10 @@
 """
 Command execution utilities
 """
+import collections
 import os
 import subprocess  # nosec
-from typing import List
+from typing import Callable, Deque, List, Optional, Tuple
 
 
 def run_and_log_output(command: List[str], logfile: str, print_errors: bool=True):
@@ -39,3 +40,44 @@ def run_and_log_output(command: List[str], logfile: str, print_errors: bool=True
             if print_errors and error.stdout:  # pragma: no cover
                 print(error.stdout.decode(errors='ignore'))
             raise error
+
+
+def run_and_stream_output(command: List[str], logfile: str, line_handler: Optional[Callable[[str], None]] = None, tail_lines: int = 100) -> Tuple[int, List[str]]:
+    """
+    Run a command, appending the output to the logfile and passing each line to the line_handler as it is produced.
+
+    Only the last tail_lines lines of output are kept in memory.
+
+    Parameters
+    ----------
+    command: list of str
+        The parsed command to execute
+
+    logfile: str
+        The full path to the logfile to append the output to
+
+    line_handler: callable, optional
+        Function that is called with each line of output, without the line ending
+
+    tail_lines: int, optional
+        The number of lines at the end of the output to return, default=100
+
+    Returns
+    -------
+    tuple:
+        The command returncode and a list of the last lines of output
+    """
+    log_dir = os.path.dirname(logfile)
+    if log_dir:
+        os.makedirs(log_dir, exist_ok=True)
+
+    tail: Deque[str] = collections.deque(maxlen=tail_lines)
+    with open(logfile, 'ab') as fh:
+        with subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.STDOUT) as process:  # nosec
+            for binline in process.stdout:  # type: ignore
+                fh.write(binline)
+                line = binline.decode(errors='ignore').rstrip('\r\n')
+                tail.append(line)
+                if line_handler:
+                    line_handler(line)
+    return process.returncode, list(tail)
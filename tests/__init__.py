@@ -20,7 +20,7 @@ class ScrewdriverTestCase(unittest.TestCase):
     tempdir = None
     environ_keys = {
         'BASE_PYTHON',
-        'CHANGELOG_FILENAME', 'CHANGELOG_ONLY_VERSION_TAGS', 'CHANGELOG_RELEASES',
+        'CHANGELOG_CACHE_FILE', 'CHANGELOG_FILENAME', 'CHANGELOG_ONLY_VERSION_TAGS', 'CHANGELOG_RELEASES',
         'DOCUMENTATION_GIT_TIMEOUT',
         'GIT_DEPLOY_KEY', 'GITHUB_RUN_ID',
         'PACKAGE_DIR', 'PACKAGE_DIRECTORY', 'PACKAGE_TAG',
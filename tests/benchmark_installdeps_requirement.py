@@ -0,0 +1,198 @@
+#!/usr/bin/env python
+# Copyright 2019, Oath Inc.
+# Licensed under the terms of the Apache 2.0 license.  See the LICENSE file in the project root for terms
+"""
+Benchmarks for the installdeps Requirement parsing and environment marker filtering.
+
+The benchmarks are not collected with the unit tests, run them with `tox -e benchmark` or
+`pytest tests/benchmark_installdeps_requirement.py`.
+
+Settings are read from environment variables:
+
+INSTALLDEPS_BENCHMARK_SIZES - Comma separated dependency list sizes, default 1,10,100,1000,10000
+INSTALLDEPS_BENCHMARK_THRESHOLD - Allowed regression against the baseline as a fraction, default 0.5
+INSTALLDEPS_BENCHMARK_BASELINE - Baseline JSON file, default benchmark_installdeps_requirement_baseline.json next to
+    this file
+INSTALLDEPS_BENCHMARK_UPDATE - If true, write the results to the baseline file instead of comparing them
+
+The throughput is compared as the items per run of a pure Python calibration loop timed just before each benchmark,
+so a slower or busier host than the one that wrote the baseline does not look like a regression.
+"""
+import gc
+import json
+import os
+import random
+import time
+import tracemalloc
+import unittest
+from typing import Any, Callable, Dict, List
+
+from screwdrivercd.installdeps.installer import Installer
+from screwdrivercd.installdeps.requirement import Requirement, marker_cache
+from screwdrivercd.utility.contextmanagers import InTemporaryDirectory
+from screwdrivercd.utility.environment import env_bool
+
+
+BASELINE_FILENAME = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'benchmark_installdeps_requirement_baseline.json')
+MARKERS = [
+    'python_version>="3.6"',
+    'sys_platform=="linux"',
+    'distro_id=="rhel" and distro_version>="7"',
+    'distro_id=="ubuntu" or distro_id=="debian"',
+    'platform_machine=="x86_64"',
+    'python_version<"3.0"',
+]
+
+
+def synthetic_dependencies(count: int, seed: int = 508) -> List[str]:
+    """
+    Generate a repeatable list of dependencies with a mix of plain names, version specifiers, extras, urls and
+    environment markers
+    """
+    generator = random.Random(seed)
+    dependencies = []
+    for number in range(count):
+        name = f'package{number}'
+        kind = generator.randrange(5)
+        if kind == 0:
+            dependency = name
+        elif kind == 1:
+            dependency = f'{name}>={generator.randrange(10)}.{generator.randrange(10)},<{generator.randrange(10, 20)}'
+        elif kind == 2:
+            dependency = f'{name}[extra{generator.randrange(3)},test]>=1.0'
+        elif kind == 3:
+            dependency = f'{name} @ https://example.com/packages/{name}-1.0.tar.gz'
+        else:
+            dependency = f'{name}=={generator.randrange(10)}.0'
+        if generator.random() < 0.5:
+            dependency += f' ; {generator.choice(MARKERS)}'  # PEP 508 requires whitespace between a url and its marker
+        dependencies.append(dependency)
+    return dependencies
+
+
+def calibration_workload() -> int:
+    """
+    A fixed amount of pure Python string and dictionary work, similar to the parsing being benchmarked
+    """
+    counts: Dict[str, int] = {}
+    for number in range(500):
+        name, _, version = f'package{number % 50}>={number}.0'.partition('>=')
+        counts[name.lower()] = counts.get(name.lower(), 0) + len(version.split('.'))
+    return len(counts)
+
+
+def timed_rate(function: Callable[[], Any], minimum_time: float = 0.2) -> float:
+    """
+    Get the number of times per second a function runs
+
+    The function is repeated until it has run for minimum_time seconds so the small sizes are not dominated by timer
+    noise.
+    """
+    runs = 0
+    start = time.perf_counter()
+    while True:
+        function()
+        runs += 1
+        elapsed = time.perf_counter() - start
+        if elapsed >= minimum_time:
+            break
+    return runs / elapsed
+
+
+def measure(function: Callable[[], Any], count: int, minimum_time: float = 0.2) -> Dict[str, float]:
+    """
+    Run a function, returning the items per second, the items per calibration run and the peak memory allocated
+    while it runs
+    """
+    gc.collect()
+    tracemalloc.start()
+    function()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    # Time the runs without tracemalloc, which slows down allocations
+    calibration = timed_rate(calibration_workload, minimum_time)
+    per_second = count * timed_rate(function, minimum_time)
+    return {
+        'per_second': round(per_second, 1),
+        'per_calibration': float(f'{per_second / calibration:.4g}'),
+        'peak_memory': peak
+    }
+
+
+def benchmark_sizes() -> List[int]:
+    """
+    Get the dependency list sizes to benchmark
+    """
+    return [int(_) for _ in os.environ.get('INSTALLDEPS_BENCHMARK_SIZES', '1,10,100,1000,10000').split(',') if _.strip()]
+
+
+class BenchmarkRequirement(unittest.TestCase):
+    results: Dict[str, Dict[str, Dict[str, float]]] = {}
+
+    @classmethod
+    def setUpClass(cls):
+        cls.results = {'parse': {}, 'filter': {}}
+        Requirement('warmup>=1.0')  # Compile the grammar before timing
+
+    @classmethod
+    def tearDownClass(cls):
+        artifacts_dir = os.environ.get('SD_ARTIFACTS_DIR', '')
+        if artifacts_dir:
+            report_dir = os.path.join(artifacts_dir, 'reports/benchmarks')
+            os.makedirs(report_dir, exist_ok=True)
+            with open(os.path.join(report_dir, 'installdeps_requirement.json'), 'w') as fh:
+                json.dump(cls.results, fh, indent=4)
+
+        if env_bool('INSTALLDEPS_BENCHMARK_UPDATE', False):
+            with open(os.environ.get('INSTALLDEPS_BENCHMARK_BASELINE', BASELINE_FILENAME), 'w') as fh:
+                json.dump(cls.results, fh, indent=4, sort_keys=True)
+                fh.write('\n')
+
+    def check_baseline(self, benchmark: str, size: int, result: Dict[str, float]) -> None:
+        """
+        Fail if the result regressed more than the threshold from the baseline
+        """
+        self.results[benchmark][str(size)] = result
+        if env_bool('INSTALLDEPS_BENCHMARK_UPDATE', False):
+            return
+        try:
+            with open(os.environ.get('INSTALLDEPS_BENCHMARK_BASELINE', BASELINE_FILENAME)) as fh:
+                baseline = json.load(fh)[benchmark][str(size)]
+        except (OSError, KeyError, ValueError):
+            self.skipTest(f'No {benchmark} baseline for {size} dependencies')
+        threshold = float(os.environ.get('INSTALLDEPS_BENCHMARK_THRESHOLD', '0.5'))
+        self.assertGreaterEqual(
+            result['per_calibration'], baseline['per_calibration'] * (1 - threshold),
+            f'{benchmark} throughput for {size} dependencies regressed from {baseline["per_calibration"]} to {result["per_calibration"]} '
+            f'items per calibration run ({result["per_second"]}/s)'
+        )
+        self.assertLessEqual(
+            result['peak_memory'], baseline['peak_memory'] * (1 + threshold),
+            f'{benchmark} peak memory for {size} dependencies grew from {baseline["peak_memory"]} to {result["peak_memory"]} bytes'
+        )
+
+    def test__parse(self):
+        for size in benchmark_sizes():
+            with self.subTest(size=size):
+                dependencies = synthetic_dependencies(size)
+                result = measure(lambda: [Requirement(_) for _ in dependencies], size)
+                self.check_baseline('parse', size, result)
+
+    def test__filter_environment_markers(self):
+        with InTemporaryDirectory():
+            installer = Installer(bin_dir='/bin')
+            for size in benchmark_sizes():
+                with self.subTest(size=size):
+                    dependencies = synthetic_dependencies(size)
+
+                    def filter_dependencies():
+                        marker_cache.clear()
+                        installer.filter_environment_markers(dependencies)
+
+                    result = measure(filter_dependencies, size)
+                    self.check_baseline('filter', size, result)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,12 +1,21 @@
 # Copyright 2019, Oath Inc.
 # Licensed under the terms of the Apache 2.0 license.  See the LICENSE file in the project root for termsimport copy
 import base64
+import json
 import os
 import stat
+import subprocess
+import time
 import unittest
+import unittest.mock
+from pathlib import Path
 
 from screwdrivercd.changelog.generate import changelog_contents, create_first_commit_tag_if_missing, git_tag_dates, write_changelog
 from screwdrivercd.changelog.generate import main as changelog_generate_main
+from screwdrivercd.changelog.generate import changed_files, release_changes
+from screwdrivercd.changelog.cache import SectionCache
+from screwdrivercd.changelog.history import BlobReader, release_fragments, tag_commits
+from screwdrivercd.changelog.tags import TagIndex, tag_index
 from . import ScrewdriverTestCase
 
 
@@ -296,3 +305,355 @@ class ScrewdriverChangelogTestCase(ScrewdriverTestCase):
         self.create_example_repo()
         create_first_commit_tag_if_missing()
         create_first_commit_tag_if_missing()
+
+    def test__release_fragments(self):
+        self.create_example_repo()
+        create_first_commit_tag_if_missing()
+
+        result = release_fragments(['first_commit', 'v0.0.1', 'v0.1.0', 'v0.1.1'])
+
+        self.assertDictEqual(result, {
+            'first_commit': [Path('changelog.d/1.feature.md')],
+            'v0.0.1': [Path('changelog.d/2.feature.md')],
+            'v0.1.0': [Path('changelog.d/3.feature.md')],
+            'v0.1.1': [Path('changelog.d/4.bugfix.md')],
+        })
+
+    def test__release_fragments__skipped_release(self):
+        self.create_example_repo()
+        create_first_commit_tag_if_missing()
+
+        result = release_fragments(['first_commit', 'v0.0.1', 'v0.1.1'])
+
+        self.assertListEqual(result['v0.1.1'], [Path('changelog.d/3.feature.md'), Path('changelog.d/4.bugfix.md')])
+
+    def test__release_fragments__merged_branch(self):
+        self.create_example_repo()
+        create_first_commit_tag_if_missing()
+        os.system('git checkout -b feature v0.0.1')
+        self.write_config_files({'changelog.d/5.feature.md': b'Feature branch\n'})
+        os.system('git add changelog.d/5.feature.md')
+        os.system('git commit -a -m "feature commit"')
+        os.system('git checkout -')
+        os.system('git merge --no-edit feature')
+        os.system('git tag -a -m "new tag" v0.2.0')
+
+        result = release_fragments(['first_commit', 'v0.0.1', 'v0.1.0', 'v0.1.1', 'v0.2.0'])
+
+        self.assertListEqual(result['v0.2.0'], [Path('changelog.d/5.feature.md')])
+
+    def test__release_fragments__merge_resolution(self):
+        self.create_example_repo()
+        create_first_commit_tag_if_missing()
+        os.system('git checkout -b feature v0.0.1')
+        self.write_config_files({'changelog.d/5.feature.md': b'Feature branch\n'})
+        os.system('git add changelog.d/5.feature.md')
+        os.system('git commit -a -m "feature commit"')
+        os.system('git checkout -')
+        os.system('git merge --no-commit feature')
+        self.write_config_files({'changelog.d/6.bugfix.md': b'Fixed while merging\n'})
+        os.system('git add changelog.d/6.bugfix.md')
+        os.system('git commit --no-edit')
+        os.system('git tag -a -m "new tag" v0.2.0')
+
+        result = release_fragments(['first_commit', 'v0.0.1', 'v0.1.0', 'v0.1.1', 'v0.2.0'])
+
+        self.assertListEqual(result['v0.2.0'], [Path('changelog.d/5.feature.md'), Path('changelog.d/6.bugfix.md')])
+
+    def test__release_fragments__merged_release_branch(self):
+        self.create_example_repo()
+        create_first_commit_tag_if_missing()
+        os.system('git checkout -b maintenance v0.0.1')
+        self.write_config_files({'changelog.d/5.bugfix.md': b'Maintenance fix\n'})
+        os.system('git add changelog.d/5.bugfix.md')
+        os.system('git commit -a -m "maintenance commit"')
+        os.system('git tag -a -m "new tag" v0.0.2')
+        os.system('git checkout -')
+        os.system('git merge --no-edit maintenance')
+        os.system('git tag -a -m "new tag" v0.2.0')
+
+        result = release_fragments(['first_commit', 'v0.0.1', 'v0.0.2', 'v0.1.0', 'v0.1.1', 'v0.2.0'])
+
+        self.assertListEqual(result['v0.0.2'], [Path('changelog.d/5.bugfix.md')])
+        self.assertNotIn('v0.2.0', result)
+
+    def test__changed_files(self):
+        self.create_example_repo()
+
+        self.assertListEqual(changed_files('v0.0.1', 'v0.1.1'), [Path('changelog.d/3.feature.md'), Path('changelog.d/4.bugfix.md')])
+
+    def test__release_changes__single_history_walk(self):
+        self.create_example_repo()
+
+        with unittest.mock.patch('screwdrivercd.changelog.history.subprocess.Popen', wraps=subprocess.Popen) as mock_popen:
+            result = release_changes('changelog.d')
+
+        git_commands = [_[0][0] for _ in mock_popen.call_args_list]
+        self.assertEqual(len([_ for _ in git_commands if '--full-history' in _]), 1)
+        self.assertNotIn(['git', 'diff'], [_[:2] for _ in git_commands])
+        self.assertDictEqual(result, {
+            'v0.0.1': {'feature': {'2': 'Added another new feature'}},
+            'v0.1.0': {'feature': {'3': 'Added a second new feature'}},
+            'v0.1.1': {'bugfix': {'4': 'Fixed the second new feature'}},
+        })
+
+    def test__tag_commits__unresolved(self):
+        self.create_example_repo()
+
+        result = tag_commits(['v0.0.1', 'HEAD -> master', 'missing'])
+
+        self.assertListEqual(list(result.keys()), ['v0.0.1'])
+
+    def test__blob_reader(self):
+        self.create_example_repo()
+
+        with BlobReader() as reader:
+            self.assertEqual(reader.read('v0.1.0', 'changelog.d/3.feature.md'), 'Added a second new feature\n')
+            self.assertIsNone(reader.read('v0.0.1', 'changelog.d/3.feature.md'))
+            self.assertIsNone(reader.read('missing', 'changelog.d/3.feature.md'))
+            self.assertIsNone(reader.read('v0.1.0', 'changelog.d'))
+            self.assertIsNone(reader.read('v0.1.0', 'changelog.d/missing 5.md'))
+            self.assertEqual(reader.read('v0.1.1', 'changelog.d/4.bugfix.md'), 'Fixed the second new feature\n')
+        self.assertIsNone(reader.process)
+
+    def test__release_changes__fragment_from_release(self):
+        self.create_example_repo()
+        self.write_config_files({'changelog.d/3.feature.md': b'Edited after the release\n'})
+        os.remove('changelog.d/2.feature.md')
+
+        with unittest.mock.patch('screwdrivercd.changelog.history.subprocess.Popen', wraps=subprocess.Popen) as mock_popen:
+            result = release_changes('changelog.d')
+
+        self.assertEqual(result['v0.0.1'], {'feature': {'2': 'Added another new feature'}})
+        self.assertEqual(result['v0.1.0'], {'feature': {'3': 'Added a second new feature'}})
+        self.assertEqual(len([_ for _ in mock_popen.call_args_list if _[0][0][1:3] == ['cat-file', '--batch']]), 1)
+
+    def test__release_changes__fragment_removed_before_release(self):
+        self.create_example_repo()
+        self.write_config_files({'changelog.d/5.feature.md': b'Reverted feature\n'})
+        os.system('git add changelog.d/5.feature.md')
+        os.system('git commit -a -m "fifth commit"')
+        os.system('git rm -q changelog.d/5.feature.md')
+        os.system('git commit -a -m "revert fifth commit"')
+        os.system('git tag -a -m "new tag" v0.2.0')
+
+        result = release_changes('changelog.d')
+
+        self.assertDictEqual(result['v0.2.0'], {})
+
+    def test__tag_index(self):
+        self.create_example_repo()
+        os.system('git tag lightweight v0.0.1')
+        commits = tag_commits(['v0.0.1', 'v0.1.1'])
+
+        index = TagIndex()
+
+        self.assertSetEqual(set(index), {'lightweight', 'v0.0.1', 'v0.1.0', 'v0.1.1'})
+        self.assertEqual(index['v0.1.1'].commit, commits['v0.1.1'])
+        self.assertEqual(index['lightweight'].commit, commits['v0.0.1'])
+        self.assertEqual(index['lightweight'].date, index['v0.0.1'].date)
+        self.assertEqual(index.dates()['v0.0.1'], str(index['v0.0.1'].date))
+
+    def test__tag_index__not_a_repo(self):
+        self.assertEqual(len(TagIndex()), 0)
+
+    def test__tag_index__shared(self):
+        self.create_example_repo()
+        self.assertIs(tag_index(), tag_index())
+
+        with unittest.mock.patch('screwdrivercd.changelog.tags.subprocess.check_output', wraps=subprocess.check_output) as mock_check_output:
+            changelog_contents()
+
+        ref_commands = [_ for _ in mock_check_output.call_args_list if _[0][0][1] == 'for-each-ref']
+        self.assertEqual(len(ref_commands), 2)  # Start of the run and after adding the first_commit tag
+        self.assertIn('first_commit', tag_index())
+
+    def create_future_release(self, version, days=1):
+        """
+        Add a release with a commit date after the example repo releases
+        """
+        self.write_config_files({'changelog.d/5.feature.md': b'Newer feature\n'})
+        os.system('git add changelog.d/5.feature.md')
+        os.environ['GIT_COMMITTER_DATE'] = f'{int(time.time()) + days * 86400} +0000'
+        try:
+            os.system('git commit -a -m "newer commit"')
+        finally:
+            del os.environ['GIT_COMMITTER_DATE']
+        os.system(f'git tag -a -m "new tag" {version}')
+
+    def commit_at(self, message, days):
+        """
+        Commit all the changes with a commit date after the example repo releases
+        """
+        os.environ['GIT_COMMITTER_DATE'] = f'{int(time.time()) + days * 86400} +0000'
+        try:
+            os.system(f'git commit -a --no-edit -m "{message}"')
+        finally:
+            del os.environ['GIT_COMMITTER_DATE']
+
+    def create_hotfix_release(self):
+        """
+        Add a hotfix release from a maintenance branch
+        """
+        os.system('git checkout -b maintenance v0.1.1')
+        self.write_config_files({'changelog.d/6.bugfix.md': b'Hotfix\n'})
+        os.system('git add changelog.d/6.bugfix.md')
+        self.commit_at('hotfix commit', 1)
+        os.system('git tag -a -m "new tag" v0.1.2')
+        os.system('git checkout -')
+
+    def merge_hotfix_release(self):
+        """
+        Add a release that merges the maintenance branch
+        """
+        self.write_config_files({'changelog.d/7.feature.md': b'Mainline feature\n'})
+        os.system('git add changelog.d/7.feature.md')
+        self.commit_at('feature commit', 2)
+        os.environ['GIT_COMMITTER_DATE'] = f'{int(time.time()) + 3 * 86400} +0000'
+        try:
+            os.system('git merge --no-ff --no-edit maintenance')
+        finally:
+            del os.environ['GIT_COMMITTER_DATE']
+        os.system('git tag -a -m "new tag" v0.2.0')
+
+    def test__section_cache(self):
+        cache = SectionCache('cache/changelog.json', settings={'changelog_dir': 'changelog.d'})
+        cache.set('v0.0.1', 'abc', 'section')
+        cache.save()
+
+        cache = SectionCache('cache/changelog.json', settings={'changelog_dir': 'changelog.d'})
+        self.assertEqual(cache.get('v0.0.1', 'abc'), 'section')
+        self.assertIsNone(cache.get('v0.0.1', 'def'))
+        self.assertIsNone(cache.get('v0.1.0', 'abc'))
+
+        cache = SectionCache('cache/changelog.json', settings={'changelog_dir': 'news'})
+        self.assertIsNone(cache.get('v0.0.1', 'abc'))
+
+    def test__section_cache__invalid_file(self):
+        with open('changelog.json', 'w') as fh:
+            fh.write('not json')
+        self.assertDictEqual(SectionCache('changelog.json').releases, {})
+
+    def test__changelog_contents__cache(self):
+        os.environ['CHANGELOG_CACHE_FILE'] = os.path.join(self.tempdir.name, 'cache/changelog.json')
+        self.create_example_repo()
+        first = changelog_contents()
+        with open(os.environ['CHANGELOG_CACHE_FILE']) as fh:
+            cache = json.load(fh)
+        self.assertListEqual(list(cache['releases'].keys()), ['v0.0.1', 'v0.1.0', 'v0.1.1'])
+
+        # Released sections come from the cache, only the new release is read from the git history
+        cache['releases']['v0.0.1']['section'] = cache['releases']['v0.0.1']['section'].replace('Added another new feature', 'Cached feature')
+        with open(os.environ['CHANGELOG_CACHE_FILE'], 'w') as fh:
+            json.dump(cache, fh)
+        self.create_future_release('v0.2.0')
+        with unittest.mock.patch('screwdrivercd.changelog.history.subprocess.Popen', wraps=subprocess.Popen) as mock_popen:
+            second = changelog_contents()
+
+        walk = [_[0][0] for _ in mock_popen.call_args_list if '--full-history' in _[0][0]][0]
+        self.assertIn(f'^{tag_commits(["v0.1.1"])["v0.1.1"]}', walk)
+        self.assertIn('- Cached feature', second)
+        self.assertIn('- Newer feature', second)
+        self.assertIn('- Fixed the second new feature', second)
+        self.assertLess(second.index('v0.2.0'), second.index('v0.1.1'))
+        self.assertEqual(len(second.split('---')), len(first.split('---')) + 1)
+
+        # Nothing is read from the git history when all the releases are cached
+        with unittest.mock.patch('screwdrivercd.changelog.history.subprocess.Popen', wraps=subprocess.Popen) as mock_popen:
+            self.assertEqual(changelog_contents(), second)
+        self.assertFalse([_ for _ in mock_popen.call_args_list if '--full-history' in _[0][0]])
+
+    def test__changelog_contents__cache__moved_tag(self):
+        os.environ['CHANGELOG_CACHE_FILE'] = os.path.join(self.tempdir.name, 'changelog.json')
+        self.create_example_repo()
+        changelog_contents()
+
+        self.create_future_release('v0.1.1')
+        os.system('git tag -d v0.1.1')
+        os.system('git tag -a -m "moved tag" v0.1.1')
+        result = changelog_contents()
+
+        self.assertIn('- Newer feature', result)
+        self.assertIn('- Fixed the second new feature', result)
+
+    def test__changelog_contents__cache__older_release(self):
+        os.environ['CHANGELOG_CACHE_FILE'] = os.path.join(self.tempdir.name, 'changelog.json')
+        self.create_example_repo()
+        self.create_future_release('v0.2.0')
+        os.system('git tag -d v0.1.0')
+        changelog_contents()
+
+        os.system('git tag -a -m "new tag" v0.1.0 v0.1.1~1')
+        result = changelog_contents()
+
+        self.assertIn('v0.1.0', result)
+        self.assertNotIn('Added a second new feature', result.split('v0.1.1')[1].split('---')[0])
+
+    def test__changelog_contents__cache__merged_hotfix(self):
+        os.environ['CHANGELOG_CACHE_FILE'] = os.path.join(self.tempdir.name, 'changelog.json')
+        self.create_example_repo()
+        self.create_hotfix_release()
+        changelog_contents()
+
+        self.merge_hotfix_release()
+        cached = changelog_contents()
+        del os.environ['CHANGELOG_CACHE_FILE']
+        uncached = changelog_contents()
+
+        self.assertEqual(cached, uncached)
+        self.assertEqual(cached.count('- Hotfix'), 1)
+
+    def history_walks(self, mock_popen):
+        return [_[0][0] for _ in mock_popen.call_args_list if '--full-history' in _[0][0]]
+
+    def test__changelog_contents__selected_newest_release(self):
+        self.create_example_repo()
+        self.create_future_release('v0.2.0')
+        commits = tag_commits(['v0.0.1', 'v0.1.0', 'v0.1.1', 'v0.2.0'])
+
+        with unittest.mock.patch('screwdrivercd.changelog.history.subprocess.Popen', wraps=subprocess.Popen) as mock_popen:
+            result = changelog_contents('v0.2.0')
+
+        walks = self.history_walks(mock_popen)
+        self.assertEqual(len(walks), 1)
+        self.assertIn(commits['v0.2.0'], walks[0])
+        for release in ['v0.0.1', 'v0.1.0', 'v0.1.1']:
+            self.assertIn(f'^{commits[release]}', walks[0])
+        self.assertIn('- Newer feature', result)
+        self.assertNotIn('v0.1.1', result)
+        self.assertNotIn('Fixed the second new feature', result)
+
+    def test__changelog_contents__selected_older_release(self):
+        self.create_example_repo()
+        self.create_future_release('v0.2.0')
+        commits = tag_commits(['v0.1.1', 'v0.2.0'])
+
+        with unittest.mock.patch('screwdrivercd.changelog.history.subprocess.Popen', wraps=subprocess.Popen) as mock_popen:
+            result = changelog_contents('v0.1.1')
+
+        walk = self.history_walks(mock_popen)[0]
+        self.assertNotIn(commits['v0.2.0'], walk)
+        self.assertIn('- Fixed the second new feature', result)
+        self.assertNotIn('Newer feature', result)
+        self.assertNotIn('Added a second new feature', result)
+
+    def test__changelog_contents__selected_merged_hotfix(self):
+        self.create_example_repo()
+        self.create_hotfix_release()
+        self.merge_hotfix_release()
+        sections = changelog_contents('all').split(f'{os.linesep}---{os.linesep}')
+
+        result = changelog_contents('v0.2.0')
+
+        self.assertIn('- Mainline feature', result)
+        self.assertNotIn('Hotfix', result)
+        self.assertEqual(result, [_ for _ in sections if 'v0.2.0' in _][0])
+
+    def test__changelog_contents__selected_missing_release(self):
+        self.create_example_repo()
+
+        with unittest.mock.patch('screwdrivercd.changelog.history.subprocess.Popen', wraps=subprocess.Popen) as mock_popen:
+            result = changelog_contents('v9.9.9')
+
+        self.assertEqual(result, '')
+        self.assertListEqual(self.history_walks(mock_popen), [])
@@ -0,0 +1,140 @@
+#!/usr/bin/env python
+# Copyright 2019, Oath Inc.
+# Licensed under the terms of the Apache 2.0 license.  See the LICENSE file in the project root for terms
+import json
+import os
+import time
+import unittest.mock
+
+from screwdrivercd.installdeps.cache import cache_directory, cache_files, cache_max_size, cached_package_files, evict
+from screwdrivercd.installdeps.cli import REPORT_META_KEY, download_cache_report, main
+from screwdrivercd.installdeps.installer import Installer
+from screwdrivercd.installdeps.installers.pip3 import PipInstaller
+from screwdrivercd.installdeps.installers.yum import YumInstaller
+
+from . import ScrewdriverTestCase
+
+
+CONFIG_FILE = 'pyproject.toml'
+TEST_CONFIG = '''[build-system]
+# Minimum requirements for the build system to execute.
+requires = ["setuptools", "wheel"]  # PEP 508 specifications.
+
+[tool.sdv4_installdeps]
+install = ['echo']
+
+[tool.sdv4_installdeps.echo]
+deps = ['python3', 'mysql']
+'''
+
+
+def write_file(filename, size=10, age=0):
+    os.makedirs(os.path.dirname(filename), exist_ok=True)
+    with open(filename, 'wb') as fh:
+        fh.write(b'x' * size)
+    modified = time.time() - age
+    os.utime(filename, (modified, modified))
+
+
+class TestDownloadCache(ScrewdriverTestCase):
+
+    def setUp(self):
+        super().setUp()
+        with open(CONFIG_FILE, 'w') as config_handle:
+            config_handle.write(TEST_CONFIG)
+        self.cache_dir = os.path.join(self.tempdir.name, 'cache')
+        patcher = unittest.mock.patch.dict(os.environ, {'INSTALLDEPS_CACHE_DIR': self.cache_dir, 'INSTALLDEPS_SKIP_INSTALLED': 'False'})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test__cache_directory(self):
+        self.assertEqual(cache_directory(), self.cache_dir)
+
+    def test__cache_directory__disabled(self):
+        del os.environ['INSTALLDEPS_CACHE_DIR']
+        self.assertEqual(cache_directory(), '')
+        self.assertEqual(Installer(bin_dir='/bin').download_cache_dir, '')
+
+    def test__cache_max_size(self):
+        os.environ['INSTALLDEPS_CACHE_MAX_SIZE'] = '1.5'
+        self.assertEqual(cache_max_size(), 1572864)
+        os.environ['INSTALLDEPS_CACHE_MAX_SIZE'] = 'big'
+        self.assertEqual(cache_max_size(), 2048 * 1024 * 1024)
+
+    def test__cache_files__extensions(self):
+        write_file(os.path.join(self.cache_dir, 'yum/base/packages/python3-3.6.8-1.el7.x86_64.rpm'))
+        write_file(os.path.join(self.cache_dir, 'yum/base/repomd.xml'))
+        result = cache_files(os.path.join(self.cache_dir, 'yum'), ['.rpm'])
+        self.assertListEqual([os.path.basename(_) for _ in result], ['python3-3.6.8-1.el7.x86_64.rpm'])
+
+    def test__cached_package_files(self):
+        filenames = ['/c/python3-3.6.8-1.el7.x86_64.rpm', '/c/python3-libs-3.6.8-1.el7.x86_64.rpm', '/c/mysql_8.0_amd64.deb']
+        result = cached_package_files(['python3', 'mysql', 'bash'], filenames)
+        self.assertDictEqual(result, {'python3': ['/c/python3-3.6.8-1.el7.x86_64.rpm'], 'mysql': ['/c/mysql_8.0_amd64.deb']})
+
+    def test__evict__least_recently_used(self):
+        write_file(os.path.join(self.cache_dir, 'yum/old.rpm'), size=100, age=300)
+        write_file(os.path.join(self.cache_dir, 'yum/older.rpm'), size=100, age=600)
+        write_file(os.path.join(self.cache_dir, 'apk/new.apk'), size=100)
+        size, removed = evict(self.cache_dir, 250)
+        self.assertEqual(size, 200)
+        self.assertListEqual([os.path.basename(_) for _ in removed], ['older.rpm'])
+
+    def test__evict__package_files_only(self):
+        write_file(os.path.join(self.cache_dir, 'yum/x86_64/8/base/repodata/primary.xml'), size=100, age=600)
+        write_file(os.path.join(self.cache_dir, 'yum/x86_64/8/base/packages/old.rpm'), size=100, age=300)
+        write_file(os.path.join(self.cache_dir, 'yum/x86_64/8/base/packages/new.rpm'), size=100)
+        write_file(os.path.join(self.cache_dir, 'pip3/http/entry'), size=100, age=900)
+        write_file(os.path.join(self.cache_dir, 'other/file'), size=100, age=900)
+        size, removed = evict(self.cache_dir, 150, extensions={'yum': ['.rpm'], 'pip3': None})
+        self.assertEqual(size, 100)
+        self.assertListEqual([os.path.basename(_) for _ in removed], ['entry', 'old.rpm'])
+        self.assertTrue(os.path.exists(os.path.join(self.cache_dir, 'yum/x86_64/8/base/repodata/primary.xml')))
+        self.assertTrue(os.path.exists(os.path.join(self.cache_dir, 'other/file')))
+
+    def test__evict__under_limit(self):
+        write_file(os.path.join(self.cache_dir, 'yum/old.rpm'), size=100)
+        self.assertEqual(evict(self.cache_dir, 1000), (100, []))
+
+    def test__install__cache_usage(self):
+        installer = Installer(bin_dir='/bin')
+        self.assertEqual(installer.download_cache_dir, os.path.join(self.cache_dir, 'echo'))
+        write_file(os.path.join(installer.download_cache_dir, 'python3-3.6.8.rpm'), age=600)
+        installer.install_dependencies()
+        self.assertDictEqual(installer.report_details['cache'], {'hits': 1, 'misses': 0})
+        self.assertLess(time.time() - os.stat(os.path.join(installer.download_cache_dir, 'python3-3.6.8.rpm')).st_mtime, 60)
+
+    def test__yum__cache_arguments(self):
+        installer = YumInstaller()
+        command = installer.install_command_line(['python3'])
+        self.assertIn(f'--setopt=cachedir={self.cache_dir}/yum/$basearch/$releasever', command)
+        self.assertNotIn('--setopt=keepcache=1', installer.install_command_line(['python3'], use_cache=False))
+
+    @unittest.mock.patch.object(PipInstaller, 'install_command', ['pip3', 'install'])
+    def test__pip3__output_cache_usage(self):
+        installer = PipInstaller()
+        self.assertIn('--find-links', installer.install_command_line(['requests']))
+        for line in ['Collecting requests', '  Using cached requests-2.31.0-py3-none-any.whl (62 kB)', f'Processing {installer.wheelhouse}/idna-3.4-py3-none-any.whl', '  Downloading urllib3-2.0.7-py3-none-any.whl (124 kB)']:
+            installer._handle_output_line(line)
+        self.assertDictEqual(installer.report_details['cache'], {'hits': 2, 'misses': 1})
+
+    def test__download_cache_report(self):
+        write_file(os.path.join(self.cache_dir, 'yum/python3-3.6.8.rpm'), size=100)
+        details = {'yum': {'cache': {'hits': 3, 'misses': 1}}, 'pip3': {'skipped': []}}
+        result = download_cache_report(details)
+        self.assertDictEqual(result, {'directory': self.cache_dir, 'hits': 3, 'misses': 1, 'hit_rate': 0.75, 'size': 100, 'evicted': 0})
+
+    def test__download_cache_report__disabled(self):
+        del os.environ['INSTALLDEPS_CACHE_DIR']
+        self.assertDictEqual(download_cache_report({}), {})
+
+    def test__main__report(self):
+        os.environ['INSTALLDEPS_STAMP_DIR'] = os.path.join(self.tempdir.name, 'stamp')
+        echo_installer = type('EchoInstaller', (Installer,), {'bin_dir': '/bin'})
+        with unittest.mock.patch('screwdrivercd.installdeps.cli.install_plugins', {'echo': echo_installer}):
+            self.assertEqual(main([]), 0)
+        with open(os.path.join(os.environ['SD_ARTIFACTS_DIR'], 'reports/installdeps/installdeps.json')) as fh:
+            report = json.load(fh)
+        self.assertSetEqual(set(report.keys()), {'echo', REPORT_META_KEY})
+        self.assertSetEqual(set(report[REPORT_META_KEY].keys()), {'details', 'timing', 'cache'})
+        self.assertIn('echo', report[REPORT_META_KEY]['details'])
@@ -124,6 +124,40 @@ class TestConfig(unittest.TestCase):
             self.assertListEqual(result.configuration['yinst']['deps'], ['python36', 'dist_utils'])
             self.assertListEqual(result.configuration['yum']['deps'], ['yahoo_python36;distro_version<"7.5', 'yahoo_python37;distro_version>="7.5"', 'mysql;distro_version<"7"', 'mariadb;distro_version>="7"'])
             self.assertListEqual(result.configuration['pip3']['deps'], [])
+    def test__configuration__cached__shared(self):
+        with InTemporaryDirectory():
+            with open('pyproject.toml', 'w') as file_handle:
+                file_handle.write(TEST_CONFIG)
+            result = Configuration.cached()
+            self.assertIs(result, Configuration.cached())
+            self.assertEqual(result.configuration['apk']['deps'], ('python3', 'mysql-client'))
+
+    def test__configuration__cached__file_changed(self):
+        with InTemporaryDirectory():
+            with open('pyproject.toml', 'w') as file_handle:
+                file_handle.write(TEST_CONFIG)
+            result = Configuration.cached()
+            with open('pyproject.toml', 'w') as file_handle:
+                file_handle.write(TEST_CONFIG.replace("'mysql-client'", "'mariadb-client'"))
+            updated = Configuration.cached()
+            self.assertIsNot(result, updated)
+            self.assertEqual(updated.configuration['apk']['deps'], ('python3', 'mariadb-client'))
+
+    def test__configuration__cached__no_config(self):
+        with InTemporaryDirectory():
+            result = Configuration.cached()
+            self.assertEqual(result.configuration['install'], ('apk', 'apt-get', 'yinst', 'yum', 'pip3'))
+
+    def test__configuration__cached__read_only(self):
+        with InTemporaryDirectory():
+            with open('pyproject.toml', 'w') as file_handle:
+                file_handle.write(TEST_CONFIG)
+            result = Configuration.cached()
+            with self.assertRaises(TypeError):
+                result.configuration['apk']['deps'] = []
+            with self.assertRaises(AttributeError):
+                result.configuration['apk']['deps'].append('python3')
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,104 @@
+#!/usr/bin/env python
+# Copyright 2019, Oath Inc.
+# Licensed under the terms of the Apache 2.0 license.  See the LICENSE file in the project root for terms
+import os
+import time
+import unittest.mock
+
+from screwdrivercd.installdeps.installers.apt import AptInstaller
+
+from . import ScrewdriverTestCase
+
+
+CONFIG_FILE = 'pyproject.toml'
+TEST_CONFIG = f'''[build-system]
+# Minimum requirements for the build system to execute.
+requires = ["setuptools", "wheel"]  # PEP 508 specifications.
+
+[tool.sdv4_installdeps]
+    install = ['apt-get']
+
+    [tool.sdv4_installdeps.apt-get]
+        index_max_age = 600
+        deps = [
+            'python3',
+            'mysql-client'
+        ]
+'''
+
+
+class TestApt(ScrewdriverTestCase):
+
+    def setUp(self):
+        super().setUp()
+        with open(CONFIG_FILE, 'w') as config_handle:
+            config_handle.write(TEST_CONFIG)
+        self.installer = AptInstaller()
+        self.installer.lists_dir = os.path.join(self.tempdir.name, 'lists')
+        os.makedirs(os.path.join(self.installer.lists_dir, 'partial'))
+        self.installer.index_stamp = os.path.join(self.tempdir.name, 'periodic', 'update-success-stamp')
+
+    def write_list(self, age=0):
+        """
+        Write a package list with the mirror's modification time, updated age seconds ago
+        """
+        list_filename = os.path.join(self.installer.lists_dir, 'deb.debian.org_debian_dists_bookworm_main_binary-amd64_Packages')
+        with open(list_filename, 'w') as fh:
+            fh.write('Package: python3\n')
+        os.utime(list_filename, (time.time() - 86400 * 30, time.time() - 86400 * 30))
+        self.installer.write_index_stamp()
+        modified = time.time() - age
+        os.utime(self.installer.index_stamp, (modified, modified))
+
+    def test__index_max_age__configuration(self):
+        self.assertEqual(self.installer.index_max_age, 600)
+
+    def test__index_max_age__invalid(self):
+        with open(CONFIG_FILE, 'w') as config_handle:
+            config_handle.write(TEST_CONFIG.replace('index_max_age = 600', 'index_max_age = "hourly"'))
+        self.assertEqual(AptInstaller().index_max_age, 3600)
+
+    def test__index_age__no_stamp(self):
+        self.write_list()
+        os.remove(self.installer.index_stamp)
+        modified = time.time() - 20
+        os.utime(self.installer.lists_dir, (modified, modified))
+        self.assertAlmostEqual(self.installer.index_age(), 20, delta=5)
+
+    def test__index_age__no_lists(self):
+        self.assertIsNone(self.installer.index_age())
+
+    def test__index_update_reason__no_lists(self):
+        self.assertEqual(self.installer.index_update_reason(), 'there are no package lists')
+
+    def test__index_update_reason__fresh(self):
+        self.write_list(age=10)
+        self.assertEqual(self.installer.index_update_reason(), '')
+
+    def test__index_update_reason__stale(self):
+        self.write_list(age=1200)
+        self.assertTrue(self.installer.index_update_reason().startswith('the package lists are '))
+
+    def test__index_update_reason__sources_changed(self):
+        self.write_list(age=10)
+        self.installer._sources_changed = True
+        self.assertEqual(self.installer.index_update_reason(), 'repositories were added')
+
+    def test__index_update_reason__max_age_zero(self):
+        self.write_list(age=10)
+        self.installer.index_max_age = 0
+        self.assertEqual(self.installer.index_update_reason(), 'index_max_age is 0')
+
+    def test__update_index__fresh(self):
+        self.write_list(age=10)
+        with unittest.mock.patch('screwdrivercd.installdeps.installers.apt.subprocess.check_call') as mock_check_call:
+            self.installer.update_index()
+        mock_check_call.assert_not_called()
+        self.assertFalse(self.installer.report_details['index_update']['updated'])
+
+    def test__update_index__stale(self):
+        self.write_list(age=1200)
+        with unittest.mock.patch('screwdrivercd.installdeps.installers.apt.subprocess.check_call') as mock_check_call:
+            self.installer.update_index()
+        mock_check_call.assert_called_once()
+        self.assertTrue(self.installer.report_details['index_update']['updated'])
@@ -91,6 +91,49 @@ class TestEcho(ScrewdriverTestCase):
             result = self.installer.install_dependencies()
             self.assertListEqual(result, [])
 
+    def test__echo__install__skip_installed(self):
+        self.installer._installed_packages = {'python3'}
+        result = self.installer.install_dependencies()
+        self.assertListEqual(result, ['foo'])
+        self.assertListEqual(self.installer.skipped, ['python3'])
+
+    def test__echo__install__skip_installed__disabled(self):
+        os.environ['INSTALLDEPS_SKIP_INSTALLED'] = 'False'
+        installer = Installer(bin_dir='/bin')
+        installer._installed_packages = {'python3'}
+        result = installer.install_dependencies()
+        self.assertListEqual(result, ['python3', 'foo'])
+        self.assertListEqual(installer.skipped, [])
+
+    def test__echo__install__all_installed(self):
+        self.installer._installed_packages = {'python3', 'foo'}
+        with unittest.mock.patch.object(Installer, 'install') as mock_install:
+            result = self.installer.install_dependencies()
+        self.assertListEqual(result, [])
+        mock_install.assert_not_called()
+
+    def test__echo__install__log_file(self):
+        self.installer.install_dependencies()
+        log_filename = os.path.join(self.artifacts_dir, 'logs/installdeps/echo.log')
+        self.assertEqual(self.installer.log_filename, log_filename)
+        with open(log_filename) as fh:
+            self.assertEqual(fh.read(), 'fake install python3 foo\n')
+
+    def test__echo__install__timing(self):
+        self.installer._installed_packages = set()
+        self.installer.install_dependencies()
+        timing = self.installer.report_details['timing']
+        self.assertListEqual(list(timing.keys()), ['add_repos', 'update_index', 'query_installed', 'validate', 'install'])
+        self.assertEqual(timing['install']['subprocesses'], 1)
+
+    def test__query_package_names(self):
+        result = self.installer.query_package_names(['/bin/echo', '-e', 'python3 1.0\\nfoo'])
+        self.assertSetEqual(result, {'python3', 'foo'})
+
+    def test__query_package_names__failed(self):
+        result = self.installer.query_package_names(['/bin/false'])
+        self.assertSetEqual(result, set())
+
     def test__determine_bin_directory__install_command_path(self):
         self.installer.install_command[0] = 'echo'
         self.installer.bin_dir = None
@@ -1,6 +1,7 @@
 #!/usr/bin/env python
 # Copyright 2019, Oath Inc.
 # Licensed under the terms of the Apache 2.0 license.  See the LICENSE file in the project root for terms
+import json
 import os
 import tempfile
 import unittest.mock
@@ -9,9 +10,11 @@ import sys
 
 import distro
 from pypirun.cli import interpreter_parent
-from screwdrivercd.installdeps.installers.pip3 import PipInstaller
+from screwdrivercd.installdeps.installers.pip3 import PipInstaller, dependencies_fingerprint, lock_environment
 from screwdrivercd.utility.contextmanagers import InTemporaryDirectory
 
+from . import ScrewdriverTestCase
+
 
 CONFIG_FILE = 'pyproject.toml'
 TEST_CONFIG = f'''[build-system]
@@ -65,3 +68,103 @@ class TestPip3(unittest.TestCase):
         expected_command = os.path.join(self.tempdir.name, 'venv/bin/pypirun')
         self.assertFalse(os.path.exists(expected_command), f'Command found {expected_command!r}')
 
+
+    @unittest.mock.patch.object(PipInstaller, 'install_command', ['pip3', 'install'])
+    def test__dependency_satisfied(self):
+        installer = PipInstaller(bin_dir=self.venv_bin_dir)
+        self.assertTrue(installer.dependency_satisfied('pip'))
+        self.assertTrue(installer.dependency_satisfied('pip>=1.0'))
+        self.assertFalse(installer.dependency_satisfied('pip<1.0'))
+        self.assertFalse(installer.dependency_satisfied('pip[foo]'))
+        self.assertFalse(installer.dependency_satisfied('serviceping'))
+
+
+LOCK_CONFIG = '''[tool.sdv4_installdeps.pip3]
+    lock_file = 'pip3.lock'
+    deps = ['serviceping', 'pypirun;python_version<"3.0"']
+'''
+PIP_REPORT = {
+    'install': [
+        {
+            'metadata': {'name': 'ServicePing', 'version': '20.1.0'},
+            'download_info': {'url': 'https://files.example.com/serviceping-20.1.0-py3-none-any.whl', 'archive_info': {'hashes': {'sha256': 'aaaa'}}},
+        },
+        {
+            'metadata': {'name': 'dnspython', 'version': '2.4.2'},
+            'download_info': {'url': 'https://files.example.com/dnspython-2.4.2-py3-none-any.whl', 'archive_info': {'hash': 'sha256=bbbb'}},
+        },
+    ]
+}
+
+
+@unittest.mock.patch.object(PipInstaller, 'install_command', ['pip3', 'install'])
+class TestPip3Lock(ScrewdriverTestCase):
+
+    def setUp(self):
+        super().setUp()
+        with open(CONFIG_FILE, 'w') as config_handle:
+            config_handle.write(LOCK_CONFIG)
+
+    def write_lock(self):
+        completed = subprocess.CompletedProcess(args=[], returncode=0, stdout=json.dumps(PIP_REPORT).encode())
+        installer = PipInstaller()
+        with unittest.mock.patch('screwdrivercd.installdeps.installers.pip3.subprocess.run', return_value=completed) as mock_run:
+            lock_filename = installer.write_lock_file()
+        self.assertEqual(mock_run.call_args[0][0][-3:], ['--report', '-', 'serviceping'])
+        return lock_filename
+
+    def test__write_lock_file(self):
+        lock_filename = self.write_lock()
+        self.assertEqual(lock_filename, os.path.join(self.tempdir.name, 'pip3.lock'))
+        with open(lock_filename) as fh:
+            lines = fh.read().splitlines()
+        self.assertIn(f'# deps-sha256: {dependencies_fingerprint(["serviceping"])}', lines)
+        self.assertListEqual([_ for _ in lines if not _.startswith('#')], [
+            'dnspython==2.4.2 --hash=sha256:bbbb',
+            'serviceping==20.1.0 --hash=sha256:aaaa',
+        ])
+
+    def test__write_lock_file__no_hash(self):
+        report = {'install': [{'metadata': {'name': 'foo', 'version': '1.0'}, 'download_info': {'url': 'file:///src/foo', 'dir_info': {}}}]}
+        completed = subprocess.CompletedProcess(args=[], returncode=0, stdout=json.dumps(report).encode())
+        with unittest.mock.patch('screwdrivercd.installdeps.installers.pip3.subprocess.run', return_value=completed):
+            with self.assertRaises(ValueError):
+                PipInstaller().write_lock_file()
+
+    def test__write_lock_file__invalid_report(self):
+        for report in [{}, {'install': [{'metadata': {'name': 'foo', 'version': '1.0'}}]}, []]:
+            with self.subTest(report=report):
+                completed = subprocess.CompletedProcess(args=[], returncode=0, stdout=json.dumps(report).encode())
+                with unittest.mock.patch('screwdrivercd.installdeps.installers.pip3.subprocess.run', return_value=completed):
+                    with self.assertRaises(ValueError):
+                        PipInstaller().write_lock_file()
+
+    def test__install_command_line__locked(self):
+        lock_filename = self.write_lock()
+        installer = PipInstaller()
+        self.assertListEqual(installer.unsatisfied_dependencies(['serviceping']), ['serviceping'])
+        command = installer.install_command_line(['serviceping'])
+        self.assertListEqual(command[-4:], ['--no-deps', '--require-hashes', '-r', lock_filename])
+        self.assertEqual(installer.report_details['lock_file'], lock_filename)
+
+    def test__install_command_line__stale_lock(self):
+        self.write_lock()
+        installer = PipInstaller()
+        command = installer.install_command_line(['serviceping', 'requests'])
+        self.assertListEqual(command[-2:], ['serviceping', 'requests'])
+        self.assertNotIn('lock_file', installer.report_details)
+
+    def test__install_command_line__other_python(self):
+        lock_filename = self.write_lock()
+        with open(lock_filename) as fh:
+            contents = fh.read().replace(f'# python: {lock_environment()}', '# python: 2.7 linux x86_64')
+        with open(lock_filename, 'w') as fh:
+            fh.write(contents)
+        installer = PipInstaller()
+        command = installer.install_command_line(['serviceping'])
+        self.assertListEqual(command[-1:], ['serviceping'])
+        self.assertNotIn('lock_file', installer.report_details)
+
+    def test__install_command_line__no_lock_file(self):
+        command = PipInstaller().install_command_line(['serviceping'])
+        self.assertListEqual(command[-1:], ['serviceping'])
@@ -2,6 +2,7 @@
 # Copyright 2019, Oath Inc.
 # Licensed under the terms of the Apache 2.0 license.  See the LICENSE file in the project root for terms
 import os
+import subprocess
 import tempfile
 import unittest.mock
 
@@ -56,3 +57,85 @@ class TestYum(unittest.TestCase):
         installer = YumInstaller(dry_run=True)
         result = installer.install_dependencies()
         self.assertIn('python36', result)
+
+    def test__invalid_dependencies__batched(self):
+        yum_info = b'''Installed Packages
+Name         : bash
+Version      : 5.1.8
+
+Available Packages
+Name         : mariadb
+Version      : 10.5.16
+'''
+        installer = YumInstaller(bin_dir='/bin')
+        installer.concurrent_validation = False
+        completed = subprocess.CompletedProcess(args=[], returncode=0, stdout=yum_info)
+        with unittest.mock.patch('screwdrivercd.installdeps.installers.yum.subprocess.run', return_value=completed) as mock_run:
+            with unittest.mock.patch.object(YumInstaller, 'validate_dependency', return_value=False) as mock_validate:
+                result = installer.invalid_dependencies(['bash', 'mariadb', 'missing'])
+        self.assertListEqual(result, ['missing'])
+        mock_run.assert_called_once()
+        self.assertListEqual(mock_run.call_args[0][0][1:], ['info', 'bash', 'mariadb', 'missing'])
+        mock_validate.assert_called_once_with('missing')
+
+    def test__confirmed_dependencies__no_output(self):
+        installer = YumInstaller(bin_dir='/bin')
+        completed = subprocess.CompletedProcess(args=[], returncode=1, stdout=b'Error: No matching Packages to list\n')
+        with unittest.mock.patch('screwdrivercd.installdeps.installers.yum.subprocess.run', return_value=completed):
+            self.assertListEqual(installer.confirmed_dependencies(['missing']), [])
+
+    def test__max_concurrent_commands(self):
+        for binary, expected in [('yum', 1), ('dnf-3', 4)]:
+            with self.subTest(binary=binary):
+                bin_dir = os.path.join(self.tempdir.name, binary)
+                os.makedirs(bin_dir)
+                with open(os.path.join(bin_dir, binary), 'w') as fh:
+                    fh.write('')
+                if binary != 'yum':
+                    os.symlink(binary, os.path.join(bin_dir, 'yum'))
+                installer = YumInstaller(bin_dir=bin_dir)
+                self.assertEqual(installer.max_concurrent_commands, expected)
+
+    def test__repo_batches(self):
+        installer = YumInstaller(bin_dir='/bin')
+        installer.install_repo_command = ['/usr/bin/yum-config-manager', '--add-repo']
+        repos = {
+            'epel': 'https://example.com/epel.repo',
+            'optional': 'enable:rhel-7-server-optional-rpms',
+            'extras': 'enable:rhel-7-server-extras-rpms',
+            'local': 'https://example.com/local.repo',
+            'debug': 'disable:rhel-7-server-debug-rpms',
+        }
+        commands = installer.add_repos_commands(repos)
+        self.assertListEqual(commands, [
+            ['/usr/bin/yum-config-manager', '--add-repo', 'https://example.com/epel.repo', '--add-repo', 'https://example.com/local.repo'],
+            ['/usr/bin/yum-config-manager', '--enable', 'rhel-7-server-optional-rpms', 'rhel-7-server-extras-rpms', '--save'],
+            ['/usr/bin/yum-config-manager', '--disable', 'rhel-7-server-debug-rpms', '--save'],
+        ])
+
+    def test__add_repos__batched(self):
+        installer = YumInstaller(bin_dir='/bin')
+        repos = {'optional': 'enable:optional-rpms', 'extras': 'enable:extras-rpms'}
+        with unittest.mock.patch.object(YumInstaller, 'filtered_repos', return_value=repos), unittest.mock.patch.object(YumInstaller, 'install_repo_tool'):
+            with unittest.mock.patch('screwdrivercd.installdeps.installers.yum.subprocess.check_call') as mock_check_call:
+                with self.assertLogs('screwdrivercd.installdeps.installers.yum', level='DEBUG') as logs:
+                    installer.add_repos()
+        mock_check_call.assert_called_once()
+        self.assertEqual(len([_ for _ in logs.output if _.endswith(': Ok')]), 2)
+
+    def test__add_repos__batch_failed(self):
+        installer = YumInstaller(bin_dir='/bin')
+        repos = {'optional': 'enable:optional-rpms', 'extras': 'enable:extras-rpms'}
+
+        def check_call(command, **kwargs):
+            if 'extras-rpms' in command:
+                raise subprocess.CalledProcessError(1, command)
+            return 0
+
+        with unittest.mock.patch.object(YumInstaller, 'filtered_repos', return_value=repos), unittest.mock.patch.object(YumInstaller, 'install_repo_tool'):
+            with unittest.mock.patch('screwdrivercd.installdeps.installers.yum.subprocess.check_call', side_effect=check_call) as mock_check_call:
+                with self.assertLogs('screwdrivercd.installdeps.installers.yum', level='DEBUG') as logs:
+                    installer.add_repos()
+        self.assertEqual(mock_check_call.call_count, 3)
+        self.assertTrue(any("'optional-rpms' repo: Ok" in _ for _ in logs.output))
+        self.assertTrue(any("'extras-rpms' repo: Failed" in _ for _ in logs.output))
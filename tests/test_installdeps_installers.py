@@ -0,0 +1,174 @@
+#!/usr/bin/env python
+# Copyright 2019, Oath Inc.
+# Licensed under the terms of the Apache 2.0 license.  See the LICENSE file in the project root for terms
+import importlib.metadata
+import os
+import sys
+import tempfile
+import time
+import unittest
+import unittest.mock
+
+from screwdrivercd.installdeps.installer import Installer, clear_command_cache, resolve_command, run_commands
+from screwdrivercd.installdeps.installers import BUILTIN_INSTALLERS, ENTRY_POINT_GROUP, InstallerRegistry, install_plugins
+from screwdrivercd.utility.contextmanagers import InTemporaryDirectory
+
+
+class TestInstallerRegistry(unittest.TestCase):
+
+    def test__builtin_installers(self):
+        self.assertListEqual(list(install_plugins)[:5], ['apk', 'apt-get', 'brew', 'pip3', 'yum'])
+
+    def test__lookup(self):
+        from screwdrivercd.installdeps.installers.yum import YumInstaller
+        self.assertIs(install_plugins['yum'], YumInstaller)
+        self.assertIsNone(install_plugins.get('yinst', None))
+
+    def test__lazy_import(self):
+        registry = InstallerRegistry({'fake': 'tests.fake_installer_module:FakeInstaller'})
+        self.assertIn('fake', registry)
+        self.assertNotIn('tests.fake_installer_module', sys.modules)
+
+    def test__broken_plugin(self):
+        registry = InstallerRegistry({'fake': 'tests.fake_installer_module:FakeInstaller', 'echo': 'screwdrivercd.installdeps.installer:Installer'})
+        with self.assertRaises(KeyError):
+            registry['fake']
+        self.assertIsNone(registry.get('fake', None))
+        self.assertIs(registry.get('echo', None), Installer)
+
+    def test__class_exports(self):
+        from screwdrivercd.installdeps.installers import AptInstaller, YumInstaller
+        self.assertIs(YumInstaller, install_plugins['yum'])
+        self.assertIs(AptInstaller, install_plugins['apt-get'])
+        with self.assertRaises(ImportError):
+            from screwdrivercd.installdeps.installers import MissingInstaller  # noqa: F401
+
+    def test__entry_points(self):
+        entry_point = importlib.metadata.EntryPoint(name='echo', value='screwdrivercd.installdeps.installer:Installer', group=ENTRY_POINT_GROUP)
+        with unittest.mock.patch('screwdrivercd.installdeps.installers.importlib.metadata.entry_points', return_value=[entry_point]) as mock_entry_points:
+            registry = InstallerRegistry()
+            self.assertListEqual(list(registry), list(BUILTIN_INSTALLERS) + ['echo'])
+            self.assertIs(registry['echo'], Installer)
+        mock_entry_points.assert_called_once_with(group=ENTRY_POINT_GROUP)
+
+
+class TestCommandAvailable(unittest.TestCase):
+
+    def setUp(self):
+        self.tempdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tempdir.cleanup)
+
+    def installer_class(self, **attributes):
+        return type('TestInstaller', (Installer,), attributes)
+
+    def test__install_command_path(self):
+        with open(os.path.join(self.tempdir.name, 'fakepkg'), 'w'):
+            pass
+        self.assertTrue(self.installer_class(install_command=['fakepkg', 'install'], install_command_path=[self.tempdir.name]).command_available())
+
+    def test__missing(self):
+        self.assertFalse(self.installer_class(install_command=['fakepkg', 'install'], install_command_path=[self.tempdir.name]).command_available())
+
+    def test__system_path(self):
+        installer_class = self.installer_class(install_command=['sh'], install_command_path=[self.tempdir.name], use_system_path=True)
+        self.assertTrue(installer_class.command_available())
+
+    def test__absolute_path(self):
+        self.assertTrue(self.installer_class(install_command=[sys.executable]).command_available())
+
+
+class TestResolveCommand(unittest.TestCase):
+
+    def setUp(self):
+        clear_command_cache()
+        self.addCleanup(clear_command_cache)
+        self.tempdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tempdir.cleanup)
+        with open(os.path.join(self.tempdir.name, 'fakepkg'), 'w'):
+            pass
+        os.chmod(os.path.join(self.tempdir.name, 'fakepkg'), 0o755)
+
+    def test__search_path(self):
+        self.assertEqual(resolve_command('fakepkg', ['/nonexistent', self.tempdir.name]), os.path.join(self.tempdir.name, 'fakepkg'))
+        self.assertIsNone(resolve_command('fakepkg', ['/nonexistent']))
+
+    def test__system_path(self):
+        with unittest.mock.patch.dict(os.environ, {'PATH': self.tempdir.name}):
+            self.assertEqual(resolve_command('fakepkg', [], use_system_path=True), os.path.join(self.tempdir.name, 'fakepkg'))
+
+    def test__cached(self):
+        with unittest.mock.patch('screwdrivercd.installdeps.installer.os.path.exists', return_value=False) as mock_exists:
+            for _ in range(3):
+                resolve_command('fakepkg', ['/a', '/b'])
+        self.assertEqual(mock_exists.call_count, 2)
+
+    def test__installers_share_resolution(self):
+        installer_class = type('TestInstaller', (Installer,), {'install_command': ['fakepkg', 'install'], 'install_command_path': [self.tempdir.name]})
+        first = installer_class()
+        with unittest.mock.patch('screwdrivercd.installdeps.installer.os.path.exists') as mock_exists:
+            second = installer_class()
+        mock_exists.assert_not_called()
+        self.assertEqual(first.install_command[0], os.path.join(self.tempdir.name, 'fakepkg'))
+        self.assertListEqual(second.install_command, first.install_command)
+        self.assertIsNot(second.install_command, first.install_command)
+        self.assertListEqual(installer_class.install_command, ['fakepkg', 'install'])
+
+class TestRunCommands(unittest.TestCase):
+
+    def test__results(self):
+        results = run_commands([['sh', '-c', 'echo one'], ['sh', '-c', 'exit 3'], ['/nonexistent/command']])
+        self.assertEqual(results[0].stdout, b'one\n')
+        self.assertListEqual([_.returncode for _ in results], [0, 3, 127])
+
+    def test__empty(self):
+        self.assertListEqual(run_commands([]), [])
+
+    def test__concurrent(self):
+        start = time.monotonic()
+        run_commands([['sleep', '0.5']] * 4, max_concurrency=4)
+        self.assertLess(time.monotonic() - start, 1.5)
+
+    def test__max_concurrency(self):
+        start = time.monotonic()
+        run_commands([['sleep', '0.2']] * 3, max_concurrency=1)
+        self.assertGreaterEqual(time.monotonic() - start, 0.6)
+
+    def test__stop_on_failure(self):
+        start = time.monotonic()
+        results = run_commands([['sh', '-c', 'exit 1'], ['sleep', '10']], stop_on_failure=True)
+        self.assertLess(time.monotonic() - start, 5)
+        self.assertEqual(results[0].returncode, 1)
+        self.assertIsNone(results[1])
+
+
+class TestConcurrentValidation(unittest.TestCase):
+
+    def setUp(self):
+        self.installer_class = type('TestInstaller', (Installer,), {'validation_command': lambda self, dependency: ['sh', '-c', f'[ {dependency} != bad ]']})
+
+    def test__invalid_dependencies(self):
+        with InTemporaryDirectory():
+            installer = self.installer_class(bin_dir='/bin')
+            with unittest.mock.patch('screwdrivercd.installdeps.installer.run_commands', wraps=run_commands) as mock_run_commands:
+                result = installer.invalid_dependencies(['good', 'bad', 'fine'])
+        self.assertListEqual(result, ['bad'])
+        mock_run_commands.assert_called_once()
+
+    def test__invalid_dependencies__not_concurrent(self):
+        with InTemporaryDirectory():
+            installer = self.installer_class(bin_dir='/bin')
+            installer.concurrent_validation = False
+            with unittest.mock.patch.object(installer, 'validate_dependency', side_effect=lambda dependency: dependency != 'bad') as mock_validate:
+                result = installer.invalid_dependencies(['good', 'bad', 'fine'])
+        self.assertListEqual(result, ['bad'])
+        self.assertEqual(mock_validate.call_count, 3)
+
+    def test__validate_dependency(self):
+        with InTemporaryDirectory():
+            installer = self.installer_class(bin_dir='/bin')
+            self.assertTrue(installer.validate_dependency('good'))
+            self.assertFalse(installer.validate_dependency('bad'))
+
+
+if __name__ == '__main__':
+    unittest.main()
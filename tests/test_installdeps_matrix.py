@@ -0,0 +1,95 @@
+#!/usr/bin/env python
+# Copyright 2019, Oath Inc.
+# Licensed under the terms of the Apache 2.0 license.  See the LICENSE file in the project root for terms
+import contextlib
+import io
+import os
+
+from screwdrivercd.installdeps.cli import main
+from screwdrivercd.installdeps.installers.apt import AptInstaller
+from screwdrivercd.installdeps.installers.yum import YumInstaller
+from screwdrivercd.installdeps.matrix import dependency_matrix, load_environments, render_matrix
+from screwdrivercd.installdeps.requirement import EnvironmentLookup, environment_lookup, marker_cache
+
+from . import ScrewdriverTestCase
+
+
+CONFIG_FILE = 'pyproject.toml'
+TEST_CONFIG = '''[build-system]
+# Minimum requirements for the build system to execute.
+requires = ["setuptools", "wheel"]  # PEP 508 specifications.
+
+[tool.sdv4_installdeps]
+    install = ['apt-get', 'yum']
+
+    [tool.sdv4_installdeps.apt-get]
+        deps = [
+            'python3;distro_id=="ubuntu"',
+        ]
+
+    [tool.sdv4_installdeps.yum]
+        deps = [
+            'python3;distro_id=="rhel"',
+            'mysql;distro_id=="rhel" and distro_version=="7"',
+            'mariadb;distro_id=="rhel" and distro_version!="7"',
+        ]
+'''
+
+
+class TestMatrix(ScrewdriverTestCase):
+
+    def setUp(self):
+        super().setUp()
+        with open(CONFIG_FILE, 'w') as config_handle:
+            config_handle.write(TEST_CONFIG)
+        self.environments = {
+            'rhel7': dict(environment_lookup, distro_id='rhel', distro_version='7'),
+            'rhel8': dict(environment_lookup, distro_id='rhel', distro_version='8'),
+            'ubuntu20': dict(environment_lookup, distro_id='ubuntu', distro_version='20.04'),
+        }
+        self.installers = [('apt-get', AptInstaller()), ('yum', YumInstaller())]
+
+    def test__dependency_matrix(self):
+        rows = dependency_matrix(self.installers, self.environments)
+        result = {(_['installer'], _['dependency']): _['environments'] for _ in rows}
+        self.assertDictEqual(result, {
+            ('apt-get', 'python3'): {'rhel7': False, 'rhel8': False, 'ubuntu20': True},
+            ('yum', 'python3'): {'rhel7': True, 'rhel8': True, 'ubuntu20': False},
+            ('yum', 'mysql'): {'rhel7': True, 'rhel8': False, 'ubuntu20': False},
+            ('yum', 'mariadb'): {'rhel7': False, 'rhel8': True, 'ubuntu20': False},
+        })
+
+    def test__dependency_matrix__markers_parsed_once(self):
+        marker_cache.clear()
+        dependency_matrix(self.installers, self.environments)
+        self.assertEqual(len(marker_cache._parsed), 4)
+        self.assertEqual(marker_cache.misses, 12)
+
+    def test__dependency_matrix__missing_variable(self):
+        with self.assertRaises(ValueError):
+            dependency_matrix(self.installers, {'empty': {}})
+
+    def test__render_matrix(self):
+        rows = dependency_matrix(self.installers, self.environments)
+        lines = render_matrix(rows, ['rhel7', 'rhel8', 'ubuntu20']).splitlines()
+        self.assertEqual(lines[0].split(), ['installer', 'package', 'rhel7', 'rhel8', 'ubuntu20'])
+        self.assertEqual(lines[4].split(), ['yum', 'mysql', 'x', '-', '-'])
+        self.assertEqual(len(lines), 6)
+
+    def test__load_environments(self):
+        os.makedirs('a')
+        EnvironmentLookup.write_snapshot('rhel7.json', self.environments['rhel7'])
+        EnvironmentLookup.write_snapshot('a/rhel7.json', self.environments['rhel7'])
+        EnvironmentLookup.write_snapshot('ubuntu20.json', self.environments['ubuntu20'])
+        self.assertListEqual(list(load_environments(['ubuntu20.json'])), ['ubuntu20'])
+        self.assertListEqual(list(load_environments(['rhel7.json', 'a/rhel7.json'])), ['rhel7.json', 'a/rhel7.json'])
+
+    def test__main__matrix(self):
+        for name, environment in self.environments.items():
+            EnvironmentLookup.write_snapshot(f'{name}.json', environment)
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            result = main(['--matrix', 'rhel7.json', 'rhel8.json', 'ubuntu20.json'])
+        self.assertEqual(result, 0)
+        self.assertIn('mariadb', output.getvalue())
+        self.assertFalse(os.path.exists(os.path.join(os.environ['SD_ARTIFACTS_DIR'], 'reports/installdeps/installdeps.json')))
@@ -0,0 +1,118 @@
+#!/usr/bin/env python
+# Copyright 2019, Oath Inc.
+# Licensed under the terms of the Apache 2.0 license.  See the LICENSE file in the project root for terms
+import json
+import os
+
+from screwdrivercd.installdeps.cli import main
+from screwdrivercd.installdeps.installers.apt import AptInstaller
+from screwdrivercd.installdeps.installers.yum import YumInstaller
+from screwdrivercd.installdeps.plan import installation_plan, plan_commands, render_dockerfile, render_shell, write_plan
+from screwdrivercd.installdeps.requirement import EnvironmentLookup, environment_lookup
+
+from . import ScrewdriverTestCase
+
+
+CONFIG_FILE = 'pyproject.toml'
+TEST_CONFIG = '''[build-system]
+# Minimum requirements for the build system to execute.
+requires = ["setuptools", "wheel"]  # PEP 508 specifications.
+
+[tool.sdv4_installdeps]
+    install = ['apt-get', 'yum']
+
+    [tool.sdv4_installdeps.apt-get]
+        deps = [
+            'python3;distro_id=="ubuntu"',
+        ]
+
+    [tool.sdv4_installdeps.yum]
+        deps = [
+            'python3',
+            'mysql;distro_version=="7"',
+            'mariadb;distro_version!="7"',
+        ]
+        [tool.sdv4_installdeps.yum.repos]
+            epel = "https://dl.fedoraproject.org/pub/epel/7/x86_64/;distro_version=='7'"
+            optional = "enable:rhel-7-server-optional-rpms;distro_version=='7'"
+'''
+
+
+class TestPlan(ScrewdriverTestCase):
+
+    def setUp(self):
+        super().setUp()
+        with open(CONFIG_FILE, 'w') as config_handle:
+            config_handle.write(TEST_CONFIG)
+        self.environment = dict(environment_lookup, distro_id='rhel', distro_version='7')
+        self.installers = [('apt-get', AptInstaller()), ('yum', YumInstaller())]
+
+    def test__installation_plan(self):
+        plan = installation_plan(self.installers, self.environment)
+        self.assertEqual(plan['environment'], self.environment)
+        self.assertEqual(len(plan['installers']), 1)
+        yum_plan = plan['installers'][0]
+        self.assertEqual(yum_plan['installer'], 'yum')
+        self.assertDictEqual(yum_plan['dependencies'], {'deps': ['python3', 'mysql']})
+        commands = [_[1:] for _ in yum_plan['commands']]
+        self.assertListEqual(commands, [
+            ['--add-repo', 'https://dl.fedoraproject.org/pub/epel/7/x86_64/'],
+            ['--enable', 'rhel-7-server-optional-rpms', '--save'],
+            ['install', '-y', 'python3', 'mysql'],
+        ])
+
+    def test__installation_plan__other_environment(self):
+        environment = dict(self.environment, distro_id='ubuntu', distro_version='20.04')
+        plan = installation_plan(self.installers, environment)
+        self.assertListEqual([_['installer'] for _ in plan['installers']], ['apt-get'])
+        apt_commands = [_[1:] for _ in plan['installers'][0]['commands']]
+        self.assertListEqual(apt_commands, [['update'], ['install', '-y', 'python3']])
+
+    def test__supports_environment(self):
+        self.assertTrue(YumInstaller.supports_environment(self.environment))
+        self.assertFalse(AptInstaller.supports_environment(self.environment))
+        self.assertTrue(YumInstaller.supports_environment({'distro_id': 'rocky', 'distro_like': 'rhel centos fedora'}))
+        self.assertTrue(AptInstaller.supports_environment({'distro_id': 'linuxmint', 'distro_like': 'ubuntu debian'}))
+        self.assertTrue(AptInstaller.supports_environment({'python_version': '3.8'}))
+
+    def test__render_shell(self):
+        plan = installation_plan(self.installers, self.environment)
+        script = render_shell(plan)
+        self.assertTrue(script.startswith('#!/bin/sh'))
+        self.assertIn('set -e', script)
+        for command in plan_commands(plan):
+            self.assertIn(command, script)
+
+    def test__render_dockerfile(self):
+        plan = installation_plan(self.installers, self.environment)
+        dockerfile = render_dockerfile(plan)
+        run_lines = [_ for _ in dockerfile.splitlines() if not _.startswith('#')]
+        self.assertTrue(run_lines[0].startswith('RUN '))
+        self.assertEqual(len(run_lines), 3)
+        self.assertTrue(all(_.endswith(' && \\') for _ in run_lines[:-1]))
+
+    def test__render_dockerfile__no_commands(self):
+        plan = installation_plan([], self.environment)
+        self.assertNotIn('RUN', render_dockerfile(plan))
+
+    def test__write_plan(self):
+        plan = installation_plan(self.installers, self.environment)
+        json_filename, script_filename = write_plan(plan, output_dir='plan')
+        with open(json_filename) as fh:
+            self.assertEqual(json.load(fh), plan)
+        self.assertTrue(os.access(script_filename, os.X_OK))
+
+    def test__main__plan_environment_snapshot(self):
+        EnvironmentLookup.write_snapshot('environment.json', self.environment)
+        result = main(['--plan', '--plan_format', 'dockerfile', '--plan_dir', 'plan', '--environment', 'environment.json'])
+        self.assertEqual(result, 0)
+        self.assertTrue(os.path.exists('plan/installdeps_plan.Dockerfile'))
+        with open('plan/installdeps_plan.json') as fh:
+            plan = json.load(fh)
+        self.assertEqual(plan['environment']['distro_version'], '7')
+        self.assertFalse(os.path.exists(os.path.join(os.environ['SD_ARTIFACTS_DIR'], 'reports/installdeps/installdeps.json')))
+
+    def test__main__plan_invalid_snapshot(self):
+        with open('environment.json', 'w') as fh:
+            fh.write('[]')
+        self.assertEqual(main(['--plan', '--environment', 'environment.json']), 1)
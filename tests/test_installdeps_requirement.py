@@ -0,0 +1,175 @@
+#!/usr/bin/env python
+# Copyright 2019, Oath Inc.
+# Licensed under the terms of the Apache 2.0 license.  See the LICENSE file in the project root for terms
+import json
+import os
+import tempfile
+import threading
+import unittest
+import unittest.mock
+
+import distro
+from screwdrivercd.installdeps import requirement
+from screwdrivercd.installdeps.requirement import EnvironmentLookup, MarkerCache, MarkerVariable, Requirement, requirement_grammar
+
+
+class TestRequirement(unittest.TestCase):
+
+    def test__requirement_grammar__shared(self):
+        self.assertIs(requirement_grammar(), requirement_grammar())
+
+    def test__requirement_grammar__threads(self):
+        results = []
+
+        def get_grammar():
+            results.append(requirement_grammar())
+
+        threads = [threading.Thread(target=get_grammar) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len(results), 4)
+        for result in results:
+            self.assertIs(result, requirement._grammar)
+
+    def test__plain_name__matches_grammar(self):
+        for name in ['foo', ' foo ', 'foo-bar', 'foo_bar.baz', 'python3']:
+            self.assertEqual(Requirement(name)._parsed_requirement, requirement_grammar()(name).specification())
+
+    def test__plain_name(self):
+        req = Requirement('python3')
+        self.assertEqual(req.name, 'python3')
+        self.assertListEqual(req.extra, [])
+        self.assertListEqual(req.version_evals, [])
+        self.assertListEqual(req.env_evals, [])
+        self.assertTrue(req.env_matches)
+
+    def test__extras_and_version(self):
+        req = Requirement('foo[bar, baz]>=1.0,<2')
+        self.assertEqual(req.name, 'foo')
+        self.assertListEqual(req.extra, ['bar', 'baz'])
+        self.assertListEqual(req.version_evals, [('>=', '1.0'), ('<', '2')])
+
+    def test__url(self):
+        req = Requirement('foo @ https://foo.bar.com/foo-1.0.tar.gz')
+        self.assertEqual(req.name, 'foo')
+        self.assertEqual(req.version_evals, 'https://foo.bar.com/foo-1.0.tar.gz')
+
+    def test__env_matches(self):
+        self.assertTrue(Requirement(f'foo;distro_version=="{distro.version()}"').env_matches)
+        self.assertFalse(Requirement(f'foo;distro_version!="{distro.version()}"').env_matches)
+
+    def test__env_evals__variables(self):
+        req = Requirement('foo;distro_version>="7"')
+        self.assertEqual(req.env_evals, ('>=', MarkerVariable('distro_version'), '7'))
+
+    def test__env_matches__and_or(self):
+        version = distro.version()
+        self.assertTrue(Requirement(f'foo;distro_version=="{version}" and distro_version=="{version}"').env_matches)
+        self.assertFalse(Requirement(f'foo;distro_version=="{version}" and distro_version!="{version}"').env_matches)
+        self.assertTrue(Requirement(f'foo;distro_version!="{version}" or distro_version=="{version}"').env_matches)
+
+
+class TestMarkerCache(unittest.TestCase):
+
+    def setUp(self):
+        self.cache = MarkerCache()
+
+    def test__evaluate(self):
+        self.assertTrue(self.cache.evaluate('distro_version>="7"', {'distro_version': '7.5'}))
+        self.assertFalse(self.cache.evaluate('distro_version>="7"', {'distro_version': '6.10'}))
+
+    def test__evaluate__strings(self):
+        self.assertTrue(self.cache.evaluate('distro_id=="rhel"', {'distro_id': 'rhel'}))
+        self.assertFalse(self.cache.evaluate('distro_id=="rhel"', {'distro_id': 'ubuntu'}))
+        self.assertTrue(self.cache.evaluate('distro_id=="rhel" and distro_version>="7"', {'distro_id': 'rhel', 'distro_version': '8'}))
+
+    def test__evaluate__default_environment(self):
+        self.assertTrue(self.cache.evaluate(f'distro_version=="{distro.version()}"'))
+
+    def test__evaluate__counters(self):
+        environment = {'distro_version': '7.5'}
+        self.cache.evaluate('distro_version>="7"', environment)
+        self.cache.evaluate(' distro_version>="7"', environment)
+        self.cache.evaluate('distro_version>="7"', {'distro_version': '6.10'})
+        self.assertEqual(self.cache.misses, 2)
+        self.assertEqual(self.cache.hits, 1)
+
+    def test__parse__once(self):
+        self.assertIs(self.cache.parse('distro_version>="7"'), self.cache.parse('distro_version>="7" '))
+
+    def test__clear(self):
+        self.cache.evaluate('distro_version>="7"', {'distro_version': '7.5'})
+        self.cache.clear()
+        self.assertEqual(self.cache.misses, 0)
+        self.assertEqual(self.cache.hits, 0)
+
+
+class TestEnvironmentLookup(unittest.TestCase):
+
+    def setUp(self):
+        self.tempdir = tempfile.TemporaryDirectory()
+        self.snapshot_filename = os.path.join(self.tempdir.name, 'snapshot', 'environment.json')
+        self.orig_snapshot = os.environ.pop('INSTALLDEPS_ENVIRONMENT_SNAPSHOT', None)
+
+    def tearDown(self):
+        os.environ.pop('INSTALLDEPS_ENVIRONMENT_SNAPSHOT', None)
+        if self.orig_snapshot is not None:
+            os.environ['INSTALLDEPS_ENVIRONMENT_SNAPSHOT'] = self.orig_snapshot
+        self.tempdir.cleanup()
+
+    def test__lazy(self):
+        with unittest.mock.patch.object(requirement, 'probe_environment', return_value={'distro_version': '7.5'}) as mock_probe:
+            lookup = EnvironmentLookup()
+            mock_probe.assert_not_called()
+            self.assertEqual(lookup['distro_version'], '7.5')
+            self.assertEqual(lookup['distro_version'], '7.5')
+            mock_probe.assert_called_once()
+
+    def test__probe_environment__keys(self):
+        lookup = EnvironmentLookup()
+        for key in ['distro_version', 'implementation_name', 'python_full_version', 'python_version', 'sys_platform']:
+            self.assertIn(key, lookup)
+        self.assertEqual(lookup['python_version'].count('.'), 1)
+
+    def test__save__load(self):
+        lookup = EnvironmentLookup({'distro_id': 'rhel', 'distro_version': '7.5'})
+        lookup.save(self.snapshot_filename)
+        loaded = EnvironmentLookup({})
+        loaded.load(self.snapshot_filename)
+        self.assertDictEqual(dict(loaded), {'distro_id': 'rhel', 'distro_version': '7.5'})
+
+    def test__load__invalid(self):
+        os.makedirs(os.path.dirname(self.snapshot_filename))
+        with open(self.snapshot_filename, 'w') as fh:
+            json.dump(['distro_version'], fh)
+        with self.assertRaises(ValueError):
+            EnvironmentLookup().load(self.snapshot_filename)
+
+    def test__snapshot_variable__load(self):
+        EnvironmentLookup({'distro_version': '6.10'}).save(self.snapshot_filename)
+        os.environ['INSTALLDEPS_ENVIRONMENT_SNAPSHOT'] = self.snapshot_filename
+        with unittest.mock.patch.object(requirement, 'probe_environment') as mock_probe:
+            lookup = EnvironmentLookup()
+            self.assertEqual(lookup['distro_version'], '6.10')
+            mock_probe.assert_not_called()
+
+    def test__snapshot_variable__save(self):
+        os.environ['INSTALLDEPS_ENVIRONMENT_SNAPSHOT'] = self.snapshot_filename
+        with unittest.mock.patch.object(requirement, 'probe_environment', return_value={'distro_version': '7.5'}):
+            EnvironmentLookup()['distro_version']
+        with open(self.snapshot_filename) as fh:
+            self.assertDictEqual(json.load(fh), {'distro_version': '7.5'})
+
+    def test__reset(self):
+        with unittest.mock.patch.object(requirement, 'probe_environment', return_value={'distro_version': '7.5'}) as mock_probe:
+            lookup = EnvironmentLookup()
+            lookup['distro_version']
+            lookup.reset()
+            lookup['distro_version']
+            self.assertEqual(mock_probe.call_count, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
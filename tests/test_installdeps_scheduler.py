@@ -0,0 +1,73 @@
+#!/usr/bin/env python
+# Copyright 2019, Oath Inc.
+# Licensed under the terms of the Apache 2.0 license.  See the LICENSE file in the project root for terms
+import contextlib
+import io
+import sys
+import threading
+import time
+import unittest
+
+from screwdrivercd.installdeps.scheduler import installer_stages, run_concurrently
+
+
+class TestInstallerStages(unittest.TestCase):
+
+    def test__no_groups(self):
+        self.assertListEqual(installer_stages(['apk', 'yum', 'pip3']), [['apk'], ['yum'], ['pip3']])
+
+    def test__group(self):
+        result = installer_stages(['apk', 'yum', 'pip3'], [['yum', 'pip3']])
+        self.assertListEqual(result, [['apk'], ['yum', 'pip3']])
+
+    def test__group__install_order(self):
+        result = installer_stages(['yum', 'apk', 'pip3'], [['pip3', 'yum']])
+        self.assertListEqual(result, [['yum', 'pip3'], ['apk']])
+
+    def test__group__unsupported_installer(self):
+        result = installer_stages(['yum', 'pip3'], [['apt-get', 'pip3']])
+        self.assertListEqual(result, [['yum'], ['pip3']])
+
+    def test__installer_in_two_groups(self):
+        result = installer_stages(['apk', 'yum', 'pip3'], [['apk', 'yum'], ['yum', 'pip3']])
+        self.assertListEqual(result, [['apk', 'yum'], ['pip3']])
+
+
+class TestRunConcurrently(unittest.TestCase):
+
+    def test__single(self):
+        self.assertDictEqual(run_concurrently([('yum', lambda: ['python3'])]), {'yum': ['python3']})
+
+    def test__concurrent(self):
+        started = threading.Barrier(2, timeout=10)
+
+        def task(name):
+            def run():
+                started.wait()
+                for line_number in range(3):
+                    print(f'{name} {line_number}', flush=True)
+                    time.sleep(.01)
+                return [name]
+            return run
+
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            result = run_concurrently([('yum', task('yum')), ('pip3', task('pip3'))])
+            self.assertIs(sys.stdout, output)
+        self.assertDictEqual(result, {'yum': ['yum'], 'pip3': ['pip3']})
+        self.assertEqual(output.getvalue(), 'yum 0\nyum 1\nyum 2\npip3 0\npip3 1\npip3 2\n')
+
+    def test__exit(self):
+        def exit_task():
+            print('failed')
+            sys.exit(1)
+
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            with self.assertRaises(SystemExit):
+                run_concurrently([('yum', exit_task), ('pip3', lambda: print('pip3 ok'))])
+        self.assertEqual(output.getvalue(), 'failed\npip3 ok\n')
+
+
+if __name__ == '__main__':
+    unittest.main()
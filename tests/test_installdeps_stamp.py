@@ -0,0 +1,93 @@
+#!/usr/bin/env python
+# Copyright 2019, Oath Inc.
+# Licensed under the terms of the Apache 2.0 license.  See the LICENSE file in the project root for terms
+import copy
+import os
+import unittest
+import unittest.mock
+
+from screwdrivercd.installdeps.cli import main
+from screwdrivercd.installdeps.config import CONFIGURATION_SCHEMA
+from screwdrivercd.installdeps.installer import Installer
+from screwdrivercd.installdeps.stamp import configuration_fingerprint, read_stamp, stamp_filename, write_stamp
+
+from . import ScrewdriverTestCase
+
+
+class TestStamp(ScrewdriverTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.configuration = copy.deepcopy(CONFIGURATION_SCHEMA)
+        self.configuration['yum']['deps'] = ['python3']
+        os.environ['INSTALLDEPS_STAMP_DIR'] = os.path.join(self.tempdir.name, 'stamp')
+
+    def tearDown(self):
+        del os.environ['INSTALLDEPS_STAMP_DIR']
+        super().tearDown()
+
+    def test__stamp_filename(self):
+        self.assertEqual(stamp_filename(), os.path.join(self.tempdir.name, 'stamp', 'installdeps_stamp.json'))
+
+    def test__configuration_fingerprint__stable(self):
+        self.assertEqual(
+            configuration_fingerprint(self.configuration, [['/bin/echo']]),
+            configuration_fingerprint(copy.deepcopy(self.configuration), [['/bin/echo']])
+        )
+
+    def test__configuration_fingerprint__configuration_changed(self):
+        fingerprint = configuration_fingerprint(self.configuration, [['/bin/echo']])
+        self.configuration['yum']['deps'].append('mariadb')
+        self.assertNotEqual(fingerprint, configuration_fingerprint(self.configuration, [['/bin/echo']]))
+
+    def test__configuration_fingerprint__binary_changed(self):
+        binary = os.path.join(self.tempdir.name, 'installer')
+        with open(binary, 'w') as fh:
+            fh.write('1')
+        fingerprint = configuration_fingerprint(self.configuration, [[binary]])
+        with open(binary, 'w') as fh:
+            fh.write('12')
+        self.assertNotEqual(fingerprint, configuration_fingerprint(self.configuration, [[binary]]))
+
+    def test__configuration_fingerprint__lock_file_changed(self):
+        lock_file = os.path.join(self.tempdir.name, 'requirements.lock')
+        with open(lock_file, 'w') as fh:
+            fh.write('six==1.16.0 --hash=sha256:1\n')
+        fingerprint = configuration_fingerprint(self.configuration, [['/bin/echo']], lock_files=[lock_file])
+        with open(lock_file, 'w') as fh:
+            fh.write('six==1.16.0 --hash=sha256:2\n')
+        self.assertNotEqual(fingerprint, configuration_fingerprint(self.configuration, [['/bin/echo']], lock_files=[lock_file]))
+
+    def test__configuration_fingerprint__settings_changed(self):
+        for variable, values in [('INSTALLDEPS_SKIP_INSTALLED', ['True', 'False']), ('INSTALLDEPS_CACHE_DIR', ['', self.tempdir.name])]:
+            with self.subTest(variable=variable):
+                fingerprints = []
+                for value in values:
+                    os.environ[variable] = value
+                    fingerprints.append(configuration_fingerprint(self.configuration, [['/bin/echo']]))
+                del os.environ[variable]
+                self.assertNotEqual(fingerprints[0], fingerprints[1])
+
+    def test__main__stamp_checked_before_installers(self):
+        echo_installer = type('EchoInstaller', (Installer,), {'bin_dir': '/bin'})
+        with unittest.mock.patch('screwdrivercd.installdeps.cli.install_plugins', {'echo': echo_installer}):
+            self.assertEqual(main([]), 0)
+            with unittest.mock.patch.object(echo_installer, '__init__', side_effect=AssertionError('installer created')):
+                self.assertEqual(main([]), 0)
+
+    def test__read_stamp__missing(self):
+        self.assertDictEqual(read_stamp(), {})
+
+    def test__read_stamp__invalid(self):
+        os.makedirs(os.path.dirname(stamp_filename()))
+        with open(stamp_filename(), 'w') as fh:
+            fh.write('not json')
+        self.assertDictEqual(read_stamp(), {})
+
+    def test__write_stamp(self):
+        write_stamp('abc', {'yum': ['python3']})
+        self.assertDictEqual(read_stamp(), {'fingerprint': 'abc', 'report': {'yum': ['python3']}})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,64 @@
+#!/usr/bin/env python
+# Copyright 2019, Oath Inc.
+# Licensed under the terms of the Apache 2.0 license.  See the LICENSE file in the project root for terms
+import subprocess
+import sys
+import threading
+import time
+import unittest
+
+from screwdrivercd.installdeps.timing import PhaseTimer, subprocess_count
+
+
+class TestPhaseTimer(unittest.TestCase):
+
+    def test__phase(self):
+        timer = PhaseTimer()
+        with timer.phase('install'):
+            time.sleep(.01)
+            subprocess.check_call(['true'])
+        self.assertGreaterEqual(timer.phases['install']['seconds'], .01)
+        self.assertEqual(timer.phases['install']['subprocesses'], 1)
+
+    def test__phase__accumulates(self):
+        timer = PhaseTimer()
+        for _ in range(2):
+            with timer.phase('validate'):
+                subprocess.check_call(['true'])
+        self.assertEqual(timer.phases['validate']['subprocesses'], 2)
+
+    def test__phase__exception(self):
+        timer = PhaseTimer()
+        with self.assertRaises(ValueError):
+            with timer.phase('add_repos'):
+                raise ValueError()
+        self.assertIn('add_repos', timer.phases)
+
+    def test__subprocess_count__per_thread(self):
+        start_count = subprocess_count()
+        thread = threading.Thread(target=subprocess.check_call, args=[['true']])
+        thread.start()
+        thread.join()
+        self.assertEqual(subprocess_count(), start_count)
+
+    def test__subprocess_count__outside_phase(self):
+        with PhaseTimer().phase('install'):
+            pass
+        start_count = subprocess_count()
+        subprocess.check_call(['true'])
+        self.assertEqual(subprocess_count(), start_count)
+
+    def test__audit_hook__not_added_on_import(self):
+        code = 'import screwdrivercd.installdeps.cli, screwdrivercd.installdeps.timing as timing; print(timing._hook_installed)'
+        output = subprocess.check_output([sys.executable, '-c', code]).decode().strip()
+        self.assertEqual(output, 'False')
+
+    def test__summary(self):
+        timer = PhaseTimer()
+        with timer.phase('install'):
+            pass
+        self.assertTrue(timer.summary(prefix='  ').startswith('  install '))
+
+
+if __name__ == '__main__':
+    unittest.main()
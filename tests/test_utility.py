@@ -17,7 +17,7 @@ from screwdrivercd.utility.exceptions import TimeoutError
 from screwdrivercd.utility.output import header, print_error, status_message
 from screwdrivercd.utility.package import run_setup_command, setup_query, PackageMetadata
 from screwdrivercd.utility.screwdriver import create_artifact_directory
-from screwdrivercd.utility.run import run_and_log_output
+from screwdrivercd.utility.run import run_and_log_output, run_and_stream_output
 from screwdrivercd.utility.tox import run_tox, store_tox_logs
 
 from . import ScrewdriverTestCase
@@ -220,6 +220,31 @@ sys.exit(1)
                 test_output = fh.read()
             self.assertEqual(test_output, 'hello\n')
 
+    def test__run__run_and_stream_output__success(self):
+        lines = []
+        with InTemporaryDirectory():
+            returncode, tail = run_and_stream_output(['echo', 'hello'], 'logs/echo.log', line_handler=lines.append)
+            self.assertEqual(returncode, 0)
+            self.assertListEqual(tail, ['hello'])
+            self.assertListEqual(lines, ['hello'])
+            with open('logs/echo.log') as fh:
+                self.assertEqual(fh.read(), 'hello\n')
+
+    def test__run__run_and_stream_output__fail(self):
+        testscript_content = """import sys
+for i in range(5):
+    print(i)
+sys.exit(1)
+"""
+        with InTemporaryDirectory():
+            with open('testscript.py', 'w') as fh:
+                fh.write(testscript_content)
+            returncode, tail = run_and_stream_output([sys.executable, 'testscript.py'], 'test.log', tail_lines=2)
+            self.assertEqual(returncode, 1)
+            self.assertListEqual(tail, ['3', '4'])
+            with open('test.log') as fh:
+                self.assertEqual(fh.read(), '0\n1\n2\n3\n4\n')
+
     def test__setup_query(self):
         with InTemporaryDirectory():
             with open('setup.py', 'w') as setup_py_handle: